@@ -0,0 +1,296 @@
+"""
+벤치마크용 가짜 외부 서비스 (네트워크/API 키 없이 실제 파이프라인을 그대로 돌리기 위함)
+
+- FixtureServer: 구글 Places(검색/상세/사진), 네이버 블로그, 미디어 파일을 흉내내는 로컬 HTTP 서버
+- FakeGeminiClient: 업로드/처리 대기/생성을 녹화된 지연 시간과 미리 준비한 JSON으로 재현
+- FakeApifyClientAsync: 인스타 게시물 데이터셋을 fixtures/apify.json에서 돌려줌
+- install(): 서비스 모듈들이 위 가짜들을 쓰도록 바꿔 끼움
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+import itertools
+from io import BytesIO
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 실제 호스트 → 로컬 서버 경로 앞부분
+HOST_REWRITES = {
+    "maps.googleapis.com": "",
+    "m.blog.naver.com": "/naver",
+    "blog.naver.com": "/naver",
+}
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read() if not name.endswith(".json") else json.load(f)
+
+def _sleep_ms(ms, scale):
+    if ms and scale:
+        time.sleep(ms * scale / 1000)
+
+async def _async_sleep_ms(ms, scale):
+    if ms and scale:
+        await asyncio.sleep(ms * scale / 1000)
+
+class FixtureServer:
+    """
+    녹화해 둔 응답을 녹화된 지연 시간(latency_ms × latency_scale)만큼 기다렸다가 돌려줍니다.
+    """
+
+    def __init__(self, latency_scale=1.0, video_bytes=4 * 1024 * 1024):
+        self.latency_scale = latency_scale
+        self.video_bytes = video_bytes
+        fixture = load_fixture("places.json")
+        self.latency = fixture["latency_ms"]
+        self.places = fixture["places"]
+        self.by_query = {p["query"]: p for p in self.places}
+        self.by_id = {p["place_id"]: p for p in self.places}
+        self.regions = fixture.get("regions", {})
+        self.blog_template = load_fixture("naver_blog.html")
+        self._media = {}
+        self._media_lock = threading.Lock()
+        self._httpd = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    # --- 미디어 (이름마다 한 번만 만들고 재사용) ---
+    def photo(self, name):
+        with self._media_lock:
+            if name not in self._media:
+                from PIL import Image
+                # 노이즈 사진은 실제 음식 사진처럼 JPEG 압축이 잘 안 됨
+                img = Image.effect_noise((800, 600), 64).convert("RGB")
+                buffer = BytesIO()
+                img.save(buffer, format="JPEG", quality=85)
+                self._media[name] = buffer.getvalue()
+            return self._media[name]
+
+    def video(self, name):
+        with self._media_lock:
+            if name not in self._media:
+                self._media[name] = random.Random(name).randbytes(self.video_bytes)
+            return self._media[name]
+
+    # --- 라우팅 ---
+    def handle(self, req):
+        parts = urlsplit(req.path)
+        path, query = parts.path, {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        if path == "/maps/api/place/findplacefromtext/json":
+            _sleep_ms(self.latency.get("findplace"), self.latency_scale)
+            text = query.get("input", "").strip()
+            if text in self.regions:
+                return self._json(req, {"status": "OK", "candidates": [{"geometry": {"location": self.regions[text]}}]})
+            place = self.by_query.get(text)
+            if not place:
+                return self._json(req, {"status": "ZERO_RESULTS", "candidates": []})
+            return self._json(req, {"status": "OK", "candidates": [{
+                "place_id": place["place_id"],
+                "name": place["name"],
+                "rating": place["rating"],
+                "formatted_address": place["formatted_address"],
+                "photos": [{"photo_reference": place["photo_reference"]}]
+            }]})
+
+        if path == "/maps/api/place/details/json":
+            _sleep_ms(self.latency.get("details"), self.latency_scale)
+            place = self.by_id.get(query.get("place_id"))
+            if not place:
+                return self._json(req, {"status": "NOT_FOUND"})
+            return self._json(req, {"status": "OK", "result": {"reviews": place["reviews"]}})
+
+        if path == "/maps/api/place/photo":
+            _sleep_ms(self.latency.get("photo"), self.latency_scale)
+            req.send_response(302)
+            req.send_header("Location", f"{self.base_url}/media/photo/{query.get('photoreference')}.jpg")
+            req.send_header("Content-Length", "0")
+            req.end_headers()
+            return
+
+        if path.startswith("/media/photo/"):
+            return self._bytes(req, self.photo(os.path.basename(path)), "image/jpeg")
+
+        if path.startswith("/media/video/"):
+            return self._bytes(req, self.video(os.path.basename(path)), "video/mp4")
+
+        if path.startswith("/naver/"):
+            post_id = path.rstrip("/").rsplit("/", 1)[-1]
+            html = self.blog_template.replace("{post_id}", post_id)
+            return self._bytes(req, html.encode("utf-8"), "text/html; charset=utf-8")
+
+        req.send_response(404)
+        req.send_header("Content-Length", "0")
+        req.end_headers()
+
+    def _json(self, req, data):
+        self._bytes(req, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _bytes(self, req, body, content_type):
+        req.send_response(200)
+        req.send_header("Content-Type", content_type)
+        req.send_header("Content-Length", str(len(body)))
+        req.end_headers()
+        req.wfile.write(body)
+
+class FakeGeminiClient:
+    """
+    google-genai Client 중 이 앱이 쓰는 부분(aio.files.upload/get/delete, aio.models.generate_content)만 흉내냅니다.
+    """
+
+    def __init__(self, latency_scale=1.0):
+        fixture = load_fixture("analysis.json")
+        self.latency = fixture["latency_ms"]
+        self.latency_scale = latency_scale
+        self._responses = itertools.cycle(fixture["responses"])
+        self._lock = threading.Lock()
+        self._uploaded = {}
+        self.calls = {"upload": 0, "generate": 0, "delete": 0}
+        self.aio = SimpleNamespace(
+            files=SimpleNamespace(upload=self._upload, get=self._get, delete=self._delete),
+            models=SimpleNamespace(generate_content=self._generate_content)
+        )
+
+    async def _upload(self, file, config=None):
+        # 실제 SDK처럼 경로나 파일 객체를 받음
+        if isinstance(file, str):
+            size = os.path.getsize(file)
+        else:
+            size = len(file.read())
+        await _async_sleep_ms(self.latency.get("upload"), self.latency_scale)
+        with self._lock:
+            self.calls["upload"] += 1
+            name = f"files/bench-{self.calls['upload']}"
+            self._uploaded[name] = time.monotonic()
+        return SimpleNamespace(name=name, state="PROCESSING", size_bytes=size)
+
+    async def _get(self, name):
+        ready_at = self._uploaded[name] + (self.latency.get("processing", 0) * self.latency_scale / 1000)
+        state = "ACTIVE" if time.monotonic() >= ready_at else "PROCESSING"
+        return SimpleNamespace(name=name, state=state)
+
+    async def _delete(self, name):
+        with self._lock:
+            self.calls["delete"] += 1
+            self._uploaded.pop(name, None)
+
+    async def _generate_content(self, model, contents, config=None):
+        prompt = contents if isinstance(contents, str) else " ".join(c for c in contents if isinstance(c, str))
+        with self._lock:
+            self.calls["generate"] += 1
+            answer = None if "장소 ID별" in prompt else next(self._responses)
+
+        if answer is None:
+            # 리뷰 요약: 프롬프트에 들어있는 장소 ID마다 요약을 만들어 돌려줌
+            await _async_sleep_ms(self.latency.get("summary"), self.latency_scale)
+            batch = json.loads(prompt.split("[리뷰]", 1)[1].strip())
+            answer = {place_id: f"{text.splitlines()[0][:40]} 등 리뷰 {len(text.splitlines())}개 요약" for place_id, text in batch.items()}
+        else:
+            await _async_sleep_ms(self.latency.get("generate"), self.latency_scale)
+
+        text = json.dumps(answer, ensure_ascii=False)
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 2 + 1, candidates_token_count=len(text) // 2 + 1)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+class FakeApifyClientAsync:
+    """apify_client.ApifyClientAsync 중 actor().call()과 dataset().list_items()만 흉내냅니다."""
+
+    fixture = None
+    media_base = ""
+    latency_scale = 1.0
+
+    def __init__(self, token=None):
+        self.token = token
+
+    def actor(self, name):
+        async def call(run_input):
+            await _async_sleep_ms(self.fixture["latency_ms"].get("actor_call"), self.latency_scale)
+            match = re.search(r"/(?:p|reel|reels)/([^/?#]+)", run_input["directUrls"][0])
+            return {"defaultDatasetId": match.group(1) if match else ""}
+        return SimpleNamespace(call=call)
+
+    def dataset(self, dataset_id):
+        async def list_items():
+            await _async_sleep_ms(self.fixture["latency_ms"].get("dataset"), self.latency_scale)
+            post = self.fixture["posts"].get(dataset_id)
+            if not post:
+                return SimpleNamespace(items=[])
+            item = json.loads(json.dumps(post).replace("{media}", f"{self.media_base}/media"))
+            return SimpleNamespace(items=[item])
+        return SimpleNamespace(list_items=list_items)
+
+def _rewrite(server, url):
+    parts = urlsplit(url)
+    if parts.netloc in HOST_REWRITES:
+        return f"{server.base_url}{HOST_REWRITES[parts.netloc]}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    return url
+
+@contextmanager
+def install(server, latency_scale=1.0):
+    """
+    서비스 모듈들이 가짜 외부 서비스를 쓰도록 바꿔 끼우고, 블록이 끝나면 되돌립니다.
+    실제 http_client/async_http(세션/재시도/메트릭)는 그대로 거치고 주소만 로컬 서버로 바꿉니다.
+    """
+    import services.http_client as http
+    import services.async_http as ahttp
+    import services.ai_service as ai
+    import services.client_registry as clients
+
+    gemini = FakeGeminiClient(latency_scale)
+    FakeApifyClientAsync.fixture = load_fixture("apify.json")
+    FakeApifyClientAsync.media_base = server.base_url
+    FakeApifyClientAsync.latency_scale = latency_scale
+
+    original_request = http.request
+    original_async_request = ahttp.request
+    original_get_client = ai.get_client
+    original_apify = clients.apify
+
+    def request(method, url, **kwargs):
+        return original_request(method, _rewrite(server, url), **kwargs)
+
+    async def async_request(method, url, **kwargs):
+        return await original_async_request(method, _rewrite(server, url), **kwargs)
+
+    http.request = request
+    ahttp.request = async_request
+    ai.get_client = lambda: gemini
+    clients.apify = FakeApifyClientAsync
+    try:
+        yield gemini
+    finally:
+        http.request = original_request
+        ahttp.request = original_async_request
+        ai.get_client = original_get_client
+        clients.apify = original_apify
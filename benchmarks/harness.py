@@ -0,0 +1,118 @@
+"""
+벤치마크 측정 / 기준값(baseline) 비교 도구
+"""
+import gc
+import json
+import time
+import platform
+import resource
+import tracemalloc
+
+# 기준값보다 이만큼(비율) 나빠지면 회귀로 표시
+DEFAULT_TOLERANCE = 0.2
+
+# 지표별로 어느 쪽이 좋은지 (True: 클수록 좋음)
+HIGHER_IS_BETTER = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput": True,
+    "peak_rss_mb": False,
+    "alloc_peak_kb": False,
+}
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def peak_rss_mb():
+    # 리눅스는 KB, macOS는 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+def measure(func, repeat=5, warmup=1, items=1, unit="ops/s", setup=None):
+    """
+    func()를 warmup번 돌린 뒤 repeat번 시간을 재고, 한 번 더 tracemalloc으로 메모리 할당량을 잽니다.
+    setup()은 매 실행 전에 호출되며 시간에 포함되지 않습니다. (캐시 비우기 등)
+    items는 한 번 실행에서 처리하는 개수로, 처리량(items/초) 계산에 씁니다.
+    """
+    for _ in range(warmup):
+        if setup: setup()
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        if setup: setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    # 할당 추적은 느려지므로 시간 측정과 따로 한 번만 실행
+    if setup: setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = sum(samples) / len(samples)
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "mean_ms": round(mean * 1000, 2),
+        "throughput": round(items / mean, 3) if mean else 0.0,
+        "unit": unit,
+        "runs": repeat,
+        "peak_rss_mb": peak_rss_mb(),
+        "alloc_peak_kb": round(alloc_peak / 1024, 1),
+    }
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_baseline(path, results, meta):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    기준값과 비교해 tolerance보다 나빠진 지표 목록을 반환합니다.
+    반환값: [(벤치마크, 지표, 기준값, 현재값, 변화율), ...]
+    """
+    regressions = []
+    for name, current in results.items():
+        base = (baseline or {}).get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append((name, metric, old, new, round(change * 100, 1)))
+    return regressions
+
+def format_table(results, baseline=None):
+    base_results = (baseline or {}).get("results", {})
+    lines = [f"{'benchmark':<20} {'p50 ms':>10} {'p95 ms':>10} {'throughput':>18} {'RSS MB':>8} {'alloc KB':>10}"]
+    for name, r in results.items():
+        line = f"{name:<20} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['throughput']:>10.2f} {r['unit']:<7} {r['peak_rss_mb']:>8.1f} {r['alloc_peak_kb']:>10.0f}"
+        base = base_results.get(name)
+        if base and base.get("throughput"):
+            line += f"  ({(r['throughput'] - base['throughput']) / base['throughput'] * 100:+.0f}% vs baseline)"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,440 @@
+"""
+오프라인 벤치마크 (네트워크/API 키 없이 로컬 가짜 서비스로 실제 파이프라인을 실행)
+
+사용법:
+    python -m benchmarks.run                          # 측정 후 baseline.json과 비교 (나빠지면 종료 코드 1)
+    python -m benchmarks.run --save-baseline          # 현재 결과를 기준값으로 저장
+    python -m benchmarks.run --only card_render html_parse --latency-scale 0
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import importlib.util
+
+# 서비스 모듈을 불러오기 전에 캐시/임시 폴더와 가짜 키를 정해둬야 함
+_WORK_DIR = tempfile.mkdtemp(prefix="curator_bench_")
+os.environ["CURATOR_CACHE_DIR"] = os.path.join(_WORK_DIR, "cache")
+os.environ["CURATOR_TEMP_DIR"] = os.path.join(_WORK_DIR, "tmp")
+os.environ.pop("TRACE_JSONL_PATH", None)
+for _key in ("GOOGLE_MAPS_API_KEY", "GEMINI_API_KEY", "APIFY_API_TOKEN"):
+    os.environ[_key] = "bench"
+
+from benchmarks import fakes, harness
+import services.ai_service as ai
+import services.map_service as map_api
+import services.enrich_service as enricher
+import services.image_service as image_gen
+import services.scraper_service as scraper
+import services.blog_service as blog
+import services.batch_service as batch
+import services.client_registry as clients
+import services.history_service as history
+import services.view_service as views
+import services.export_service as export
+import services.curation_service as engine
+import services.runtime_service as runtime
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 끝까지 돌려볼 링크 (블로그 3 + 사진 게시물 2 + 릴스 1)
+E2E_LINKS = [
+    "https://m.blog.naver.com/benchuser/1001",
+    "https://m.blog.naver.com/benchuser/1002",
+    "https://m.blog.naver.com/benchuser/1003",
+    "https://www.instagram.com/p/BENCHIMG1/",
+    "https://www.instagram.com/p/BENCHIMG2/",
+    "https://www.instagram.com/reel/BENCHREEL1/",
+]
+HTML_PAGES_PER_RUN = 20
+# 같은 릴스를 여러 사람이 (주소 형태만 다르게) 동시에 넣는 경우
+SAME_LINK_BURST = [
+    "https://www.instagram.com/reel/BENCHREEL1/",
+    "https://www.instagram.com/p/BENCHREEL1/",
+    "https://instagram.com/reel/BENCHREEL1?igsh=bench",
+    "https://www.instagram.com/benchuser/reel/BENCHREEL1/",
+] * 2
+# 본문 추출만 따로 잴 저장된 블로그 HTML (기본 글 / 사진 설명·지도 위젯이 많은 긴 글)
+BLOG_FIXTURES = ["naver_blog.html", "naver_blog_rich.html"]
+BLOG_PARSES_PER_RUN = 40
+
+# 앱(main.py)이 시작할 때 불러오는 모듈들 - 콜드 스타트 측정용
+APP_IMPORTS = [
+    "streamlit",
+    "services.map_service",
+    "services.image_service",
+    "services.download_service",
+    "services.notion_service",
+    "services.curation_service",
+    "services.trace_service",
+]
+# 처음 화면에서는 필요 없는 무거운 의존성 (실제로 쓸 때 불러와야 함)
+HEAVY_MODULES = ["pandas", "pytubefix", "apify_client", "PIL", "qrcode", "google.genai", "yt_dlp"]
+CLIENT_CALLS_PER_RUN = 200
+# 결과 저장소 검색: 장소 10만 개를 넣어두고 조건별로 두 페이지씩 조회
+HISTORY_PLACES = 100_000
+HISTORY_PLACES_PER_ANALYSIS = 5
+HISTORY_QUERIES = [
+    {},
+    {"query": "국수"},
+    {"query": "빈대떡"},
+    {"query": "마포구"},
+    {"query": "Ichiran"},
+    {"region": "서울", "min_rating": 4.5},
+    {"query": "없는가게이름"},
+]
+# 내보내기 벤치마크 행 수 (결과는 제너레이터로 만들어서 메모리에 한꺼번에 두지 않음)
+EXPORT_ROWS = int(os.getenv("EXPORT_BENCH_ROWS", "20000"))
+
+# 결과 화면 재실행(버튼 클릭 등) 한 번에 허용하는 시간 (p95, 넘으면 종료 코드 1)
+RERUN_BUDGET_MS = float(os.getenv("RERUN_BUDGET_MS", "15"))
+RERUN_BUDGETS = {"results_rerun": RERUN_BUDGET_MS}
+
+_COLD_START_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+for name in {imports!r}:
+    __import__(name)
+print(json.dumps({{"seconds": time.perf_counter() - start, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def _clear_maps_cache():
+    for cache in (map_api.query_cache, map_api.details_cache, map_api.photo_cache):
+        cache.clear()
+
+def _clear_cards():
+    image_gen.get_renderer().clear()
+    shutil.rmtree(image_gen.CARD_DIR, ignore_errors=True)
+
+def _clear_views():
+    views.clear()
+    _clear_cards()
+
+def _clear_all():
+    _clear_maps_cache()
+    ai.analysis_cache.clear()
+    _clear_cards()
+
+def _sample_places(server):
+    return [{"search_query": p["query"], "display_name": p["name"], "description": ""} for p in server.places]
+
+def _sample_cards(server):
+    return [{
+        "식당이름": p["name"],
+        "평점": p["rating"],
+        "특징": p["reviews"][0]["text"],
+        "리뷰요약": " ".join(r["text"] for r in p["reviews"]),
+        "지도링크": map_api.get_map_link(p["place_id"]),
+        "사진URL": f"{server.base_url}/media/photo/{p['photo_reference']}.jpg"
+    } for p in server.places]
+
+# --- 벤치마크들 ---
+def bench_maps_enrich(server, args):
+    """지도 검색 + 리뷰 + 요약 (캐시 없음)"""
+    places = _sample_places(server)
+    return harness.measure(lambda: enricher.enrich_places(places), repeat=args.repeat,
+                           items=len(places), unit="places/s", setup=_clear_maps_cache)
+
+def bench_maps_enrich_warm(server, args):
+    """지도 검색 + 리뷰 + 요약 (지도 캐시 적중)"""
+    places = _sample_places(server)
+    return harness.measure(lambda: enricher.enrich_places(places), repeat=args.repeat,
+                           items=len(places), unit="places/s")
+
+def bench_card_render(server, args):
+    """카드 한 장 그리기 + 인코딩 (사진은 미리 받아둠, 캐시 없음)"""
+    renderer = image_gen.CardRenderer()
+    cards = _sample_cards(server)
+    photo = server.photo("card_render.jpg")
+
+    def run():
+        for card in cards:
+            renderer.encode(renderer.render(card, photo_bytes=photo)[0])
+    return harness.measure(run, repeat=args.repeat, items=len(cards), unit="cards/s")
+
+def bench_card_batch(server, args):
+    """사진 받기 + 프로세스 풀 렌더링 (render_cards_batch)"""
+    cards = _sample_cards(server)
+    return harness.measure(lambda: image_gen.render_cards_batch(cards), repeat=args.repeat,
+                           items=len(cards), unit="cards/s", setup=_clear_cards)
+
+def bench_html_parse(server, args):
+    """네이버 블로그 가져오기 + 본문 추출"""
+    def run():
+        for i in range(HTML_PAGES_PER_RUN):
+            text = scraper.get_naver_blog_content(f"https://m.blog.naver.com/benchuser/{2000 + i}")
+            if text.startswith(("크롤링 실패", "본문 없음")):
+                raise RuntimeError(text)
+    return harness.measure(run, repeat=args.repeat, items=HTML_PAGES_PER_RUN, unit="pages/s")
+
+def bench_blog_extract(server, args):
+    """저장된 블로그 HTML에서 본문 추출 + 토큰 예산 맞추기 (네트워크 없음)"""
+    pages = [fakes.load_fixture(name).replace("{post_id}", str(3000 + i)) for i, name in enumerate(BLOG_FIXTURES)]
+    desktop = fakes.load_fixture("naver_blog_desktop.html").replace("{post_id}", "3100")
+
+    def run():
+        if blog.post_url(blog.find_post_frame(desktop, "https://blog.naver.com/benchuser") or "") is None:
+            raise RuntimeError("데스크톱 iframe 주소를 찾지 못했습니다.")
+        for i in range(BLOG_PARSES_PER_RUN):
+            post = blog.extract_post(pages[i % len(pages)])
+            if post is None:
+                raise RuntimeError(f"본문 없음 ({BLOG_FIXTURES[i % len(pages)]})")
+            blog.pack_text(blog.post_to_text(post))
+    return harness.measure(run, repeat=args.repeat, items=BLOG_PARSES_PER_RUN, unit="pages/s")
+
+def _fill_history(server):
+    rnd = random.Random(42)
+    districts = ["중구", "마포구", "종로구", "용산구", "강남구"]
+
+    def result(i):
+        places = []
+        for p in rnd.sample(server.places, min(HISTORY_PLACES_PER_ANALYSIS, len(server.places))):
+            # 같은 장소가 여러 번 소개되는 경우도 섞음
+            place_id = f"{p['place_id']}_{rnd.randrange(HISTORY_PLACES // 2)}"
+            places.append({
+                "ai_info": {"display_name": p["name"], "description": p["reviews"][0]["text"], "region": "서울"},
+                "map_info": {"place_id": place_id, "name": f"{p['name']} {place_id[-4:]}", "rating": p["rating"],
+                             "address": f"서울 {rnd.choice(districts)} {p['formatted_address']}"},
+                "review_summary": ""
+            })
+        return {"url": f"https://m.blog.naver.com/benchuser/{100000 + i}", "summary": "벤치마크", "region": "서울", "places_data": places}
+
+    analyses = HISTORY_PLACES // HISTORY_PLACES_PER_ANALYSIS
+    for start in range(0, analyses, 1000):
+        history.save_results([result(i) for i in range(start, min(start + 1000, analyses))])
+
+def bench_history_search(server, args):
+    """결과 저장소에서 장소 검색 + 다음 페이지 (장소 10만 개)"""
+    _fill_history(server)
+
+    def run():
+        for q in HISTORY_QUERIES:
+            rows, cursor = history.search_places(**q)
+            if cursor:
+                history.search_places(before=cursor, **q)
+        history.latest_for_url("https://m.blog.naver.com/benchuser/100123")
+    return harness.measure(run, repeat=args.repeat, items=len(HISTORY_QUERIES), unit="queries/s")
+
+def _sample_result(server):
+    return {
+        "url": "https://m.blog.naver.com/benchuser/4001",
+        "summary": "벤치마크 결과 화면",
+        "places_data": [{
+            "ai_info": {"search_query": p["query"], "display_name": p["name"], "description": p["reviews"][0]["text"]},
+            "map_info": {"place_id": p["place_id"], "name": p["name"], "rating": p["rating"],
+                         "address": p["formatted_address"],
+                         "photo_url": f"{server.base_url}/media/photo/{p['photo_reference']}.jpg"},
+            "review_summary": p["reviews"][1]["text"] if len(p["reviews"]) > 1 else ""
+        } for p in server.places]
+    }
+
+def _render_results(result):
+    # main.py 결과 화면이 재실행마다 꺼내 쓰는 것들 (카드, ZIP, 표, 엑셀, 노션 행)
+    view = views.get_view(result)
+    view.cards()
+    view.zip_bytes()
+    view.dataframe()
+    view.xlsx_bytes()
+    view.csv_bytes()
+    return view.notion_rows
+
+def bench_results_first(server, args):
+    """결과 화면 처음 그리기 (카드 렌더링 + 표 + 엑셀 만들기)"""
+    result = _sample_result(server)
+    return harness.measure(lambda: _render_results(result), repeat=args.repeat,
+                           items=len(result["places_data"]), unit="places/s", setup=_clear_views)
+
+def bench_results_rerun(server, args):
+    """결과 화면 재실행 (링크/다운로드 버튼 클릭 후, 만들어 둔 것 재사용)"""
+    # 세션 상태에서 꺼낸 결과는 매번 같은 내용의 dict
+    result = _sample_result(server)
+    _clear_views()
+    _render_results(result)
+    return harness.measure(lambda: _render_results(json.loads(json.dumps(result))), repeat=max(args.repeat, 20),
+                           items=1, unit="reruns/s")
+
+def _export_results(server):
+    places = _sample_result(server)["places_data"]
+    for i in range(EXPORT_ROWS // len(server.places)):
+        yield {"url": f"https://m.blog.naver.com/benchuser/{5000 + i}", "places_data": places}
+
+def _bench_export(server, args, fmt):
+    path = os.path.join(_WORK_DIR, f"export.{fmt}")
+    rows = len(server.places) * (EXPORT_ROWS // len(server.places))
+    result = harness.measure(lambda: export.export_file(_export_results(server), path, fmt, with_source=True),
+                             repeat=args.repeat, items=rows, unit="rows/s")
+    result["file_kb"] = round(os.path.getsize(path) / 1024, 1)
+    return result
+
+def bench_export_xlsx(server, args):
+    """엑셀 내보내기 (write-only 스트리밍, 지도/원본 링크 포함)"""
+    return _bench_export(server, args, "xlsx")
+
+def bench_export_csv(server, args):
+    """CSV 내보내기 (스트리밍)"""
+    return _bench_export(server, args, "csv")
+
+def bench_export_parquet(server, args):
+    """Parquet 내보내기 (묶음 단위 스트리밍, pyarrow가 있을 때만)"""
+    return _bench_export(server, args, "parquet")
+
+def bench_end_to_end(server, args):
+    """링크 여러 개를 배치 파이프라인으로 끝까지 (가져오기 → 분석 → 지도 → 카드)"""
+    def run():
+        journal_path = os.path.join(_WORK_DIR, f"journal_{time.time_ns()}.jsonl")
+        journal = batch.run_batch(E2E_LINKS, journal_path)
+        if len(journal.done) != len(E2E_LINKS):
+            raise RuntimeError(f"{len(E2E_LINKS) - len(journal.done)}개 링크 처리 실패 ({journal_path})")
+    # 처리량은 분당 링크 수로 표시
+    return harness.measure(run, repeat=args.e2e_repeat, warmup=0,
+                           items=len(E2E_LINKS) * 60, unit="links/min", setup=_clear_all)
+
+def bench_same_link_burst(server, args):
+    """같은 릴스 링크 동시 요청 (Apify/다운로드/Gemini 업로드/장소 검색을 한 번만 하고 결과 공유)"""
+    gemini = ai.get_client()
+    uploads = []
+
+    def run():
+        before = gemini.calls["upload"]
+        for url, result, error in runtime.run_sync(engine.curate_urls_async(SAME_LINK_BURST)):
+            if error:
+                raise RuntimeError(f"{url}: {error}")
+        uploads.append(gemini.calls["upload"] - before)
+    result = harness.measure(run, repeat=args.repeat, items=len(SAME_LINK_BURST), unit="links/s", setup=_clear_all)
+    # 한 번에 올린 영상 수 (1이어야 정상)
+    result["uploads_per_burst"] = max(uploads)
+    return result
+
+def _import_app_once():
+    script = _COLD_START_SCRIPT.format(imports=APP_IMPORTS, heavy=HEAVY_MODULES)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def bench_cold_start(server, args):
+    """새 프로세스에서 앱 모듈 불러오기 (컨테이너 시작 / 첫 접속)"""
+    loaded = {}
+
+    def run():
+        loaded.update(_import_app_once())
+    result = harness.measure(run, repeat=args.repeat, unit="starts/s")
+    # 시작할 때 미리 불러온 무거운 모듈 (비어 있어야 정상)
+    result["heavy_modules"] = loaded.get("heavy", [])
+    return result
+
+def bench_client_reuse(server, args):
+    """Streamlit 재실행마다 하는 클라이언트/비밀값 조회 (공용 클라이언트 재사용)"""
+    def run():
+        for _ in range(CLIENT_CALLS_PER_RUN):
+            clients.gemini()
+            clients.http_session("maps.googleapis.com", 16)
+    return harness.measure(run, repeat=args.repeat, items=CLIENT_CALLS_PER_RUN, unit="calls/s", setup=clients.reset)
+
+BENCHMARKS = {
+    "maps_enrich": bench_maps_enrich,
+    "maps_enrich_warm": bench_maps_enrich_warm,
+    "card_render": bench_card_render,
+    "card_batch": bench_card_batch,
+    "html_parse": bench_html_parse,
+    "blog_extract": bench_blog_extract,
+    "history_search": bench_history_search,
+    "results_first": bench_results_first,
+    "results_rerun": bench_results_rerun,
+    "export_xlsx": bench_export_xlsx,
+    "export_csv": bench_export_csv,
+    "end_to_end": bench_end_to_end,
+    "same_link_burst": bench_same_link_burst,
+    "cold_start": bench_cold_start,
+    "client_reuse": bench_client_reuse,
+}
+
+if importlib.util.find_spec("pyarrow"):
+    BENCHMARKS["export_parquet"] = bench_export_parquet
+
+@contextlib.contextmanager
+def _quiet(enabled):
+    # 서비스 모듈들의 진행 로그(print)를 숨김
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 맛집 큐레이터 오프라인 벤치마크")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="실행할 벤치마크만 고르기")
+    parser.add_argument("--repeat", type=int, default=5, help="벤치마크별 반복 횟수")
+    parser.add_argument("--e2e-repeat", type=int, default=3, help="end_to_end 반복 횟수")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="녹화된 외부 서비스 지연 시간 배율 (0이면 지연 없이 CPU만 측정)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 파일 (기본: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--require-baseline", action="store_true", default=bool(os.getenv("CI")),
+                        help="기준값이 없으면 실패로 처리 (CI 환경 변수가 있으면 기본으로 켜짐)")
+    parser.add_argument("--tolerance", type=float, default=harness.DEFAULT_TOLERANCE,
+                        help="이 비율보다 나빠지면 회귀로 판단 (기본 0.2 = 20%%)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="서비스 로그 출력")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    server = fakes.FixtureServer(latency_scale=args.latency_scale).start()
+    results = {}
+    try:
+        with fakes.install(server, latency_scale=args.latency_scale):
+            for name in names:
+                print(f"⏱️ {name} 측정 중...", flush=True)
+                with _quiet(not args.verbose):
+                    results[name] = BENCHMARKS[name](server, args)
+    finally:
+        server.stop()
+        shutil.rmtree(_WORK_DIR, ignore_errors=True)
+
+    meta = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency_scale": args.latency_scale,
+        "repeat": args.repeat,
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    baseline = harness.load_baseline(args.baseline)
+    print(harness.format_table(results, baseline))
+
+    # 재실행 시간은 기준값과 상관없이 고정 예산으로도 확인
+    over_budget = [(name, results[name]["p95_ms"], budget) for name, budget in RERUN_BUDGETS.items()
+                   if name in results and results[name]["p95_ms"] > budget]
+    for name, p95, budget in over_budget:
+        print(f"❌ 예산 초과: {name} p95 {p95}ms > {budget}ms")
+
+    if args.save_baseline:
+        # --only로 일부만 돌렸으면 나머지 기준값은 그대로 둠
+        merged = dict((baseline or {}).get("results", {}), **results)
+        harness.save_baseline(args.baseline, merged, meta)
+        print(f"💾 기준값 저장: {args.baseline}")
+        return 1 if over_budget else 0
+
+    if baseline is None:
+        if args.require_baseline:
+            # 기준값 없이 통과하면 회귀 검사를 안 한 것과 같음
+            print(f"❌ 기준값이 없습니다: {args.baseline} (--save-baseline으로 저장 후 커밋하세요)")
+            return 1
+        print("ℹ️ 기준값이 없습니다. --save-baseline으로 먼저 저장하세요.")
+        return 1 if over_budget else 0
+    if baseline.get("meta", {}).get("latency_scale") != args.latency_scale:
+        print(f"⚠️ 기준값의 latency_scale({baseline['meta'].get('latency_scale')})과 달라 비교가 정확하지 않습니다.")
+
+    regressions = harness.compare(results, baseline, args.tolerance)
+    for name, metric, old, new, change in regressions:
+        print(f"❌ 회귀: {name} {metric} {old} → {new} ({change:+.1f}%)")
+    if not regressions:
+        print("✅ 기준값 대비 회귀 없음")
+    return 1 if regressions or over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Streamlit 없이 여러 링크를 한 번에 처리하는 명령줄 도구
+
+사용법:
+    python cli.py urls.txt -o output --formats xlsx csv parquet --fetch 4 --analyze 3 --enrich 4 --render 2 --stats-interval 10
+"""
+import os
+import sys
+import time
+import argparse
+import services.batch_service as batch
+import services.export_service as export
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 맛집 큐레이터 배치 실행")
+    parser.add_argument("urls_file", help="한 줄에 링크 하나씩 적은 파일")
+    parser.add_argument("-o", "--out-dir", default="output", help="결과 저장 폴더 (기본: output)")
+    parser.add_argument("--journal", help="체크포인트 파일 (기본: <out-dir>/journal.jsonl)")
+    parser.add_argument("--fetch", type=int, help="다운로드 단계 워커 수")
+    parser.add_argument("--analyze", type=int, help="AI 분석 단계 워커 수")
+    parser.add_argument("--enrich", type=int, help="지도/리뷰 단계 워커 수")
+    parser.add_argument("--render", type=int, help="카드 렌더링 단계 워커 수 (0이면 카드 생략)")
+    parser.add_argument("--queue-size", type=int, default=batch.QUEUE_SIZE, help="단계 사이 큐 크기")
+    parser.add_argument("--formats", nargs="+", choices=export.FORMATS, default=["xlsx", "csv"],
+                        help="표 저장 형식 (parquet는 pyarrow 필요)")
+    parser.add_argument("--thumbnails", action="store_true", help="엑셀에 카드 미리보기 넣기 (그려 둔 카드만)")
+    parser.add_argument("--link-formulas", action="store_true",
+                        help="엑셀 링크를 HYPERLINK 수식으로 넣기 (엑셀에서 클릭 가능, pandas 등에서는 빈 칸으로 읽힘)")
+    parser.add_argument("--stats-interval", type=float, help="단계별 큐/처리량 출력 간격(초)")
+    args = parser.parse_args(argv)
+
+    urls = batch.read_urls(args.urls_file)
+    os.makedirs(args.out_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(args.out_dir, "journal.jsonl")
+
+    start = time.perf_counter()
+    failed = []
+
+    def on_result(url, status, payload):
+        if status == "ok":
+            print(f"✅ {url} ({len(payload['places_data'])}곳)")
+        else:
+            failed.append(url)
+            print(f"❌ {url}: {payload}")
+
+    workers = {"fetch": args.fetch, "analyze": args.analyze, "enrich": args.enrich, "render": args.render}
+    journal = batch.run_batch(
+        urls, journal_path, workers=workers, queue_size=args.queue_size,
+        on_result=on_result, stats_interval=args.stats_interval
+    )
+    # 결과는 메모리에 모으지 않고 체크포인트 파일에서 필요할 때마다 다시 읽음
+    results = lambda: journal.results(urls)
+    paths = batch.write_outputs(results, args.out_dir, formats=args.formats,
+                                thumbnails=args.thumbnails, link_formulas=args.link_formulas)
+    elapsed = time.perf_counter() - start
+
+    completed = sum(1 for url in urls if url in journal.done)
+    print(f"\n📊 {completed}/{len(urls)}개 링크 완료, {len(failed)}개 실패 ({elapsed:.1f}초)")
+    for stage, stats in batch.summarize_timings(results()).items():
+        print(f"  {stage:<8} 건수 {stats['count']:>4}  평균 {stats['avg']:>6}s  p95 {stats['p95']:>6}s  최대 {stats['max']:>6}s")
+    for tier, stats in batch.summarize_tiers(results()).items():
+        print(f"  유튜브 {tier:<10} 건수 {stats['count']:>4}  영상 전환 {stats['escalated']:>4}  절약 {stats['bytes_avoided'] / (1024 * 1024):.0f}MB")
+    for kind, path in paths.items():
+        print(f"💾 {kind}: {path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,108 +1,118 @@
 import streamlit as st
-import os
-import re
-import pandas as pd
-import io
-import services.scraper_service as scraper
-import services.ai_service as ai
+import time
 import services.map_service as map_api
-import services.image_service as image_gen 
+import services.download_service as downloader
+import services.image_service as image_gen
+import services.notion_service as notion
+import services.curation_service as engine
+import services.history_service as history
+import services.view_service as views
+import services.trace_service as trace
 
 st.set_page_config(page_title="AI 큐레이터 Pro", page_icon="🎥", layout="centered")
 
 st.title("🎥 보고 듣는 AI 맛집 큐레이터")
 st.caption("유튜브 쇼츠, 인스타 릴스/게시물 링크를 넣으면 AI가 맛집을 찾아줍니다!")
 
+# METRICS_PORT가 설정된 경우에만 /metrics 엔드포인트를 띄움
+trace.start_metrics_server()
+
 if "analysis_result" not in st.session_state:
     st.session_state.analysis_result = None
 
-def clean_text_for_card(text):
-    if not text: return ""
-    cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s\(\)\-\&]', '', text)
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-    return cleaned
-
 with st.form("input_form"):
     url = st.text_input("링크 입력 (Youtube, Instagram, Naver)", placeholder="https://...")
+    show_waterfall = st.checkbox("🔍 단계별 소요 시간(워터폴) 보기")
+    force_rerun = st.checkbox("🔄 저장된 결과가 있어도 다시 분석")
     submitted = st.form_submit_button("분석 시작 🚀", type="primary")
 
-if submitted and url:
-    # 링크 타입 판단
-    is_youtube = "youtube.com" in url or "youtu.be" in url
-    is_instagram = "instagram.com" in url
+# 같은 링크를 이미 분석했으면 (다른 세션/다른 사람이어도) 외부 호출 없이 바로 보여줌
+saved_result = history.latest_for_url(url) if submitted and url and not force_rerun else None
+if saved_result:
+    st.session_state.analysis_result = saved_result
+    st.info(f"⚡ {time.strftime('%Y-%m-%d %H:%M', time.localtime(saved_result['saved_at']))}에 분석한 결과를 불러왔습니다.")
+elif submitted and url:
+    # 이전 작업이 남긴 오래된 임시 파일, 오래된 카드 파일 정리
+    downloader.cleanup_temp_dir()
+    image_gen.prune_card_dir()
     
     with st.status("🕵️ AI가 분석을 시작합니다...", expanded=True) as status:
-        
-        ai_result = {"summary": "분석 실패", "places": []}
-        
-        # [A] 유튜브 처리 (영상)
-        if is_youtube:
-            st.write("📥 유튜브 영상 다운로드 중...")
-            video_path, error = scraper.get_video_file(url)
-            if error:
-                st.error(error)
-                st.stop()
-            
-            st.write("🧠 Gemini가 유튜브 영상을 분석 중...")
-            ai_result = ai.analyze_video(video_path)
-            if os.path.exists(video_path): os.remove(video_path)
-
-        # [B] 인스타그램 처리 (릴스 or 게시물)
-        elif is_instagram:
-            st.write("📸 인스타그램 콘텐츠 가져오는 중 (Apify)...")
-            # scraper가 'video'인지 'image'인지 알려줌
-            content_type, content_path, error = scraper.get_instagram_content(url)
-            
-            if error:
-                st.error(error)
-                st.stop()
-            
-            if content_type == 'video':
-                st.write("🎥 릴스(영상) 분석 중...")
-                ai_result = ai.analyze_video(content_path)
-                if os.path.exists(content_path): os.remove(content_path)
-                
-            elif content_type == 'image':
-                st.write(f"🖼️ 사진 게시물({len(content_path)}장) 분석 중...")
-                ai_result = ai.analyze_images(content_path)
-                # 사용한 이미지 파일 삭제
-                for p in content_path:
-                    if os.path.exists(p): os.remove(p)
-
-        # [C] 텍스트 (블로그 등)
-        else:
-            st.write("📄 텍스트 정보 수집 중...")
-            raw_text = scraper.get_naver_blog_content(url) if "naver" in url else "텍스트 추출 불가"
-            st.write("🧠 텍스트 읽는 중...")
-            ai_result = ai.analyze_text(raw_text)
-
-        # [공통] 지도 검색 및 결과 정리
-        places_data = []
-        if ai_result.get("places"):
-            st.write("🗺️ 구글 지도에서 위치 확인 중...")
-            
-            for place in ai_result["places"]:
-                query = place.get("search_query", "맛집")
-                map_info = map_api.search_place(query)
-                review_summary = ""
-                
-                if map_info:
-                    reviews = map_api.get_place_reviews(map_info['place_id'])
-                    review_summary = ai.summarize_reviews(reviews)
-                
-                places_data.append({
-                    "ai_info": place,
-                    "map_info": map_info,
-                    "review_summary": review_summary
-                })
-        
-        st.session_state.analysis_result = {
-            "summary": ai_result.get("summary"),
-            "places_data": places_data,
-            "url": url
-        }
+        try:
+            with trace.collect(url) as tr:
+                result = engine.curate_url(url, report=st.write)
+        except engine.CurationError as e:
+            st.error(str(e))
+            st.stop()
+        result["history_id"] = history.save_result(result)
+        st.session_state.analysis_result = result
+        if show_waterfall:
+            st.code(trace.format_waterfall(tr))
         status.update(label="✅ 분석 완료!", state="complete")
 
+# --- 지난 분석 / 장소 검색 (저장소에서만 읽으므로 외부 호출 없음) ---
+def open_history(analysis_id):
+    st.session_state.analysis_result = history.get_analysis(analysis_id)
+
+with st.sidebar:
+    st.header("🕘 지난 분석")
+    history_limit = st.session_state.setdefault("history_limit", 10)
+    recent, more_recent = history.list_analyses(limit=history_limit)
+    for item in recent:
+        label = f"{time.strftime('%m-%d %H:%M', time.localtime(item['created_at']))} · {item['place_count']}곳 · {(item['summary'] or item['url'])[:24]}"
+        st.button(label, key=f"history_{item['id']}", on_click=open_history, args=(item["id"],), use_container_width=True)
+    if more_recent and st.button("더 보기", key="history_more"):
+        st.session_state.history_limit += 10
+        st.rerun()
+
+    st.header("🔎 장소 검색")
+    place_query = st.text_input("이름/주소/특징", key="place_query")
+    place_region = st.text_input("지역", key="place_region")
+    place_min_rating = st.slider("최소 평점", 0.0, 5.0, 0.0, 0.5, key="place_min_rating")
+    # 검색 조건이 바뀌면 첫 페이지부터
+    search_key = (place_query, place_region, place_min_rating)
+    if st.session_state.get("place_search_key") != search_key:
+        st.session_state.place_search_key = search_key
+        st.session_state.place_cursors = [None]
+    if place_query or place_region or place_min_rating:
+        places, next_cursor = history.search_places(
+            place_query, region=place_region or None, min_rating=place_min_rating or None,
+            limit=20, before=st.session_state.place_cursors[-1]
+        )
+        if not places:
+            st.caption("찾은 장소가 없습니다.")
+        for place in places:
+            rating = f" ★{place['rating']}" if place["rating"] else ""
+            seen = f" · {place['seen_count']}번 소개됨" if place["seen_count"] > 1 else ""
+            st.markdown(f"**{place['name']}**{rating}  \n{place['address'] or place['region']}{seen}")
+            st.button("결과 열기", key=f"place_{place['id']}", on_click=open_history, args=(place["analysis_id"],))
+        prev_col, next_col = st.columns(2)
+        if len(st.session_state.place_cursors) > 1 and prev_col.button("◀ 이전"):
+            st.session_state.place_cursors.pop()
+            st.rerun()
+        if next_cursor and next_col.button("다음 ▶"):
+            st.session_state.place_cursors.append(next_cursor)
+            st.rerun()
+
+# 노션 내보내기 (동시 전송 + 초당 요청 제한 + 중복 건너뛰기)
+# fragment라서 버튼을 눌러도 이 부분만 다시 실행됨 (카드/표는 그대로)
+@st.fragment
+def notion_export(notion_rows):
+    if st.button("📝 노션으로 내보내기", use_container_width=True):
+        with st.status("📝 노션에 저장 중...", expanded=True) as notion_status:
+            icons = {"created": "✅", "skipped": "⏭️", "failed": "❌"}
+            try:
+                report = notion.export_to_notion(
+                    notion_rows,
+                    on_progress=lambda idx, r: st.write(f"{icons[r['status']]} {r['name']}" + (f" ({r['error']})" if r['error'] else ""))
+                )
+                notion_status.update(
+                    label=f"노션 저장 완료: 생성 {report['created']} · 중복 {report['skipped']} · 실패 {report['failed']} ({report['seconds']}초)",
+                    state="error" if report["failed"] else "complete"
+                )
+            except Exception as e:
+                st.error(str(e))
+                notion_status.update(label="❌ 노션 저장 실패", state="error")
+
 # --- 결과 화면 ---
 if st.session_state.analysis_result:
     res = st.session_state.analysis_result
@@ -117,33 +127,19 @@ if st.session_state.analysis_result:
     if not res["places_data"]:
         st.write("발견된 식당이 없습니다.")
     
-    for item in res["places_data"]:
-        p_ai = item['ai_info']
-        p_map = item['map_info']
-        review_summ = item.get('review_summary', '')
-        
-        if p_map and p_map.get('name'):
-            original_name = p_map['name']
-        elif p_ai.get('display_name'):
-            original_name = p_ai['display_name']
-        else:
-            original_name = p_ai.get('search_query', '알 수 없는 식당')
-
-        card_name_clean = clean_text_for_card(original_name)
-        if not card_name_clean.strip():
-            card_name_clean = clean_text_for_card(p_ai.get('display_name', 'Global Restaurant'))
-
-        desc = p_ai.get('description', '')
-        
-        card_data = {
-            "식당이름": card_name_clean,
-            "평점": p_map['rating'] if p_map else 0.0,
-            "특징": desc,
-            "리뷰요약": review_summ,
-            "지도링크": map_api.get_map_link(p_map['place_id']) if p_map else "",
-            "사진URL": p_map.get('photo_url') if p_map else None
-        }
+    # 카드/표/엑셀은 결과마다 한 번만 만들고, 재실행 때는 만들어 둔 것을 그대로 씀
+    view = views.get_view(res)
+    entries = view.entries
 
+    # 카드는 한 번에 병렬로 그리고, 완성되는 대로 ZIP에 담음
+    cards_bytes, cards_zip_path = [None] * len(entries), None
+    if entries:
+        try:
+            cards_bytes, cards_zip_path = view.cards()
+        except Exception as e:
+            st.error(f"카드 생성 실패: {e}")
+
+    for (original_name, desc, review_summ, p_map, card_data), card_bytes in zip(entries, cards_bytes):
         with st.container():
             c1, c2 = st.columns([3, 2])
             with c1:
@@ -155,40 +151,43 @@ if st.session_state.analysis_result:
                     map_link = map_api.get_map_link(p_map['place_id'])
                     st.link_button("🗺️ 구글 지도 보기", map_link)
             with c2:
-                try:
-                    img_path = image_gen.create_restaurant_card(card_data)
-                    st.image(img_path, caption="📸 저장해서 공유하세요!", use_container_width=True)
-                except Exception as e:
-                    st.error(f"카드 생성 실패: {e}")
+                if card_bytes:
+                    st.image(card_bytes, caption="📸 저장해서 공유하세요!", use_container_width=True)
+                else:
+                    st.error("카드 생성 실패")
         st.markdown("---")
 
+    # 다운로드 버튼은 눌러도 화면을 다시 그리지 않음 (on_click="ignore")
+    if cards_zip_path:
+        st.download_button(
+            label="🗂️ 카드 전체 ZIP 다운로드",
+            data=view.zip_bytes(),
+            file_name="AI_맛집카드.zip",
+            mime="application/zip",
+            on_click="ignore",
+            use_container_width=True
+        )
+
     # 엑셀 다운로드 (최하단)
     if res["places_data"]:
         st.subheader("📊 데이터 모아보기")
-        excel_data = []
-        for item in res["places_data"]:
-            p_ai = item['ai_info']
-            p_map = item['map_info']
-            excel_data.append({
-                "식당이름": p_map['name'] if p_map else p_ai.get('search_query'),
-                "평점": p_map['rating'] if p_map else 0.0,
-                "특징": p_ai.get('description', ''),
-                "리뷰요약": item.get('review_summary', ''),
-                "주소": p_map['address'] if p_map else "",
-                "구글맵링크": map_api.get_map_link(p_map['place_id']) if p_map else ""
-            })
-            
-        df = pd.DataFrame(excel_data)
-        st.dataframe(df, use_container_width=True)
-        
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='맛집리스트')
+        st.dataframe(view.dataframe(), use_container_width=True)
             
         st.download_button(
             label="📥 엑셀 파일로 다운로드",
-            data=buffer.getvalue(),
+            data=view.xlsx_bytes(),
             file_name="AI_맛집리스트.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=views.XLSX_MIME,
+            on_click="ignore",
             use_container_width=True
         )
+        st.download_button(
+            label="📄 CSV 파일로 다운로드",
+            data=view.csv_bytes(),
+            file_name="AI_맛집리스트.csv",
+            mime=views.CSV_MIME,
+            on_click="ignore",
+            use_container_width=True
+        )
+
+        notion_export(view.notion_rows)
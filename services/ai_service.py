@@ -1,43 +1,197 @@
 import os
 import json
 import time
-import streamlit as st
-from google import genai
-from google.genai import types
+import asyncio
 from dotenv import load_dotenv
+from services.cache_service import DiskCache, hash_bytes, hash_file
+from services.url_service import canonicalize_url
+import services.trace_service as trace
+import services.runtime_service as runtime
+import services.client_registry as clients
+import services.singleflight_service as flights
+import services.blog_service as blog
 
 load_dotenv()
 
 MODEL_NAME = 'gemini-2.5-pro'
+# 리뷰 요약은 가벼운 모델로 충분함
+SUMMARY_MODEL_NAME = os.getenv("SUMMARY_MODEL_NAME", "gemini-2.5-flash")
+# 프롬프트를 바꾸면 버전을 올려서 예전 캐시를 무효화
+PROMPT_VERSION = "v3"
+
+# 분석 결과 캐시 (기본 7일, 최대 2000건)
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MAX = int(os.getenv("ANALYSIS_CACHE_MAX", "2000"))
+analysis_cache = DiskCache("analysis", ttl=ANALYSIS_CACHE_TTL, max_entries=ANALYSIS_CACHE_MAX)
+
+# 업로드/처리 대기 설정
+UPLOAD_WORKERS = int(os.getenv("GEMINI_UPLOAD_WORKERS", "4"))
+PROCESSING_TIMEOUT = float(os.getenv("GEMINI_PROCESSING_TIMEOUT", "300"))
+POLL_INITIAL_INTERVAL = 0.5
+POLL_MAX_INTERVAL = 5.0
 
 def get_client():
-    try:
-        api_key = st.secrets["GEMINI_API_KEY"]
-    except:
-        api_key = os.getenv("GEMINI_API_KEY")
-    return genai.Client(api_key=api_key)
+    # 매번 새로 만들지 않고 프로세스 전체에서 하나를 같이 씀
+    return clients.gemini()
 
-# [1] 영상 분석 (유튜브/릴스)
-def analyze_video(video_path):
-    client = get_client()
+def _json_config():
+    # google-genai는 무거워서 실제로 호출할 때 불러옴
+    from google.genai import types
+    return types.GenerateContentConfig(response_mime_type='application/json')
 
-    if not os.path.exists(video_path):
-        return {"summary": "파일 없음", "places": []}
-        
-    try:
-        with open(video_path, "rb") as f:
-            upload_result = client.files.upload(
-                file=f, 
-                config=types.UploadFileConfig(mime_type='video/mp4')
+# [0] 분석 결과 캐시
+def _url_key(source_url):
+    return f"url:{MODEL_NAME}:{PROMPT_VERSION}:{canonicalize_url(source_url)}"
+
+def _content_key(kind, digest):
+    return f"content:{kind}:{MODEL_NAME}:{PROMPT_VERSION}:{digest}"
+
+# 비동기 함수들은 *_async 캐시 메서드를 씀 (SQLite 조회/저장이 공용 이벤트 루프를 막지 않도록)
+async def get_cached_analysis_async(source_url):
+    """
+    같은 링크를 이미 분석했다면 다운로드/모델 호출 없이 결과를 돌려줍니다.
+    """
+    if not source_url:
+        return None
+    with trace.span("analysis.cache", "gemini", key="url") as sp:
+        cached = await analysis_cache.get_async(_url_key(source_url))
+        # 장소를 못 찾은 결과는 다시 분석할 수 있도록 적중으로 치지 않음
+        if cached is not None and not cached.get("places"):
+            cached = None
+        sp.set(cache="hit" if cached is not None else "miss")
+    return cached
+
+def get_cached_analysis(source_url):
+    return runtime.run_sync(get_cached_analysis_async(source_url))
+
+async def _lookup(content_key, source_url):
+    with trace.span("analysis.cache", "gemini", key="content") as sp:
+        cached = await analysis_cache.get_async(content_key)
+        sp.set(cache="hit" if cached is not None else "miss")
+    if cached is not None and source_url and cached.get("places"):
+        # 다른 링크로 같은 콘텐츠가 들어온 경우, 링크 키도 채워둠
+        await analysis_cache.set_async(_url_key(source_url), cached)
+    return cached
+
+async def _remember(result, content_key, source_url):
+    await analysis_cache.set_async(content_key, result)
+    if source_url and result.get("places"):
+        await analysis_cache.set_async(_url_key(source_url), result)
+    return result
+
+async def remember_url_async(source_url, result):
+    """
+    다른 경로(예: 유튜브 자막 분석)로 얻은 결과를 링크 기준으로 저장합니다.
+    """
+    if source_url and result.get("places"):
+        await analysis_cache.set_async(_url_key(source_url), {k: v for k, v in result.items() if k != "timings"})
+
+def remember_url(source_url, result):
+    return runtime.run_sync(remember_url_async(source_url, result))
+
+def get_cache_stats():
+    return analysis_cache.stats()
+
+async def _shared(content_key, source_url, make_coro):
+    """
+    같은 콘텐츠를 동시에 분석하려는 요청들은 업로드/모델 호출을 한 번만 하고 결과를 나눠 받습니다.
+    (같은 릴스를 여러 사람이 넣은 경우, 각자 받은 파일 복사본도 내용 해시가 같아서 합쳐짐)
+    """
+    result = await flights.do(("gemini", content_key), make_coro)
+    # 다른 링크로 들어와 함께 기다린 요청도 다음부터는 링크만으로 캐시 적중
+    await remember_url_async(source_url, result)
+    return result
+
+# [0-1] 파일 업로드 / 처리 대기 / 정리 (genai 비동기 클라이언트 사용)
+async def _generate(client, model, contents, config=None):
+    """generate_content 호출 + 토큰 사용량 기록"""
+    with trace.span("gemini.generate", "gemini", model=model) as sp:
+        response = await client.aio.models.generate_content(model=model, contents=contents, config=config)
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            sp.set(
+                input_tokens=getattr(usage, "prompt_token_count", None),
+                output_tokens=getattr(usage, "candidates_token_count", None)
             )
-        
+        return response
+
+async def _upload_file(client, path, mime_type):
+    with trace.span("gemini.upload", "gemini", mime_type=mime_type, bytes=os.path.getsize(path)):
+        from google.genai import types
+        return await client.aio.files.upload(file=path, config=types.UploadFileConfig(mime_type=mime_type))
+
+async def _upload_files(client, paths, mime_type):
+    """
+    여러 파일을 동시에 업로드합니다. (입력 순서 유지)
+    """
+    slots = asyncio.Semaphore(max(1, min(UPLOAD_WORKERS, len(paths))))
+
+    async def upload(path):
+        async with slots:
+            return await _upload_file(client, path, mime_type)
+    return list(await asyncio.gather(*(upload(p) for p in paths)))
+
+async def _wait_until_active(client, uploaded, timeout=PROCESSING_TIMEOUT):
+    """
+    업로드한 파일이 ACTIVE가 될 때까지 간격을 점점 늘려가며 확인합니다.
+    FAILED면 None, 제한 시간을 넘기면 TimeoutError.
+    """
+    deadline = time.monotonic() + timeout
+    interval = POLL_INITIAL_INTERVAL
+    with trace.span("gemini.processing", "gemini") as sp:
+        polls = 0
         while True:
-            file_meta = client.files.get(name=upload_result.name)
+            polls += 1
+            file_meta = await client.aio.files.get(name=uploaded.name)
             if file_meta.state == "ACTIVE":
-                break
+                sp.set(polls=polls)
+                return file_meta
             elif file_meta.state == "FAILED":
-                return {"summary": "영상 처리 실패", "places": []}
-            time.sleep(1)
+                sp.set(polls=polls, state="FAILED")
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"영상 처리 대기 시간 초과 ({timeout:.0f}초)")
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 1.5, POLL_MAX_INTERVAL)
+
+async def _delete_files(client, uploaded_files):
+    # 프로젝트 파일 저장 용량이 차지 않도록 사용한 파일은 바로 삭제
+    results = await asyncio.gather(
+        *(client.aio.files.delete(name=uploaded.name) for uploaded in uploaded_files),
+        return_exceptions=True
+    )
+    for uploaded, result in zip(uploaded_files, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ 업로드 파일 삭제 실패 ({uploaded.name}): {result}")
+
+# [1] 영상 분석 (유튜브/릴스)
+async def analyze_video_async(video_path, source_url=None):
+    if not os.path.exists(video_path):
+        return {"summary": "파일 없음", "places": []}
+
+    content_key = _content_key("video", await asyncio.to_thread(hash_file, video_path))
+    cached = await _lookup(content_key, source_url)
+    if cached is not None:
+        return cached
+    return await _shared(content_key, source_url, lambda: _analyze_video_uncached(video_path, content_key, source_url))
+
+async def _analyze_video_uncached(video_path, content_key, source_url):
+    client = get_client()
+    timings = {}
+    uploaded_files = []
+    try:
+        t0 = time.perf_counter()
+        upload_result = await _upload_file(client, video_path, 'video/mp4')
+        uploaded_files.append(upload_result)
+        timings["upload"] = round(time.perf_counter() - t0, 2)
+
+        t0 = time.perf_counter()
+        file_meta = await _wait_until_active(client, upload_result)
+        timings["processing"] = round(time.perf_counter() - t0, 2)
+        if file_meta is None:
+            return {"summary": "영상 처리 실패", "places": [], "timings": timings}
 
         prompt = """
         이 영상을 분석해서 맛집 정보를 JSON으로 줘.
@@ -46,47 +200,64 @@ def analyze_video(video_path):
         1. **시각(OCR):** 간판, 메뉴판을 읽어 상호명을 찾아.
         2. **청각:** 맛 표현이나 특징을 들어.
         3. **이름:** display_name 필드에는 특수문자 없이 한국어/영어로 깔끔하게 적어줘.
+        4. **지역:** 도시/동네를 알 수 있으면 region에 적어줘. (같은 가게는 한 번만)
         
         [출력 형식]
         {{
             "summary": "영상 내용 3줄 요약",
+            "region": "영상 속 지역 (예: 서울 마포구, 오사카 난바 / 모르면 빈 문자열)",
             "places": [
                 {{
                     "search_query": "구글 검색용 정확한 이름 (현지어 포함)",
                     "display_name": "카드용 깔끔한 이름 (한글/영어)",
-                    "description": "특징 설명"
+                    "description": "특징 설명",
+                    "region": "가게가 있는 지역 (모르면 빈 문자열)"
                 }}
             ]
         }}
         """
 
-        response = client.models.generate_content(
-            model=MODEL_NAME, 
-            contents=[upload_result, prompt],
-            config=types.GenerateContentConfig(response_mime_type='application/json')
+        t0 = time.perf_counter()
+        response = await _generate(
+            client, MODEL_NAME,
+            [upload_result, prompt],
+            config=_json_config()
         )
-        return json.loads(response.text)
+        timings["generate"] = round(time.perf_counter() - t0, 2)
+        result = await _remember(json.loads(response.text), content_key, source_url)
+        return dict(result, timings=timings)
 
     except Exception as e:
-        return {"summary": f"에러: {str(e)}", "places": []}
+        return {"summary": f"에러: {str(e)}", "places": [], "timings": timings}
+    finally:
+        await _delete_files(client, uploaded_files)
+
+def analyze_video(video_path, source_url=None):
+    return runtime.run_sync(analyze_video_async(video_path, source_url))
 
 # [2] 이미지 분석 (인스타 사진 게시물) - 신규 추가!
-def analyze_images(image_paths):
-    client = get_client()
-    
+async def analyze_images_async(image_paths, source_url=None):
     if not image_paths:
         return {"summary": "이미지 없음", "places": []}
 
+    digests = await asyncio.to_thread(lambda: [hash_file(p) for p in image_paths])
+    content_key = _content_key("images", hash_bytes(*digests))
+    cached = await _lookup(content_key, source_url)
+    if cached is not None:
+        return cached
+    return await _shared(content_key, source_url, lambda: _analyze_images_uncached(image_paths, content_key, source_url))
+
+async def _analyze_images_uncached(image_paths, content_key, source_url):
+    client = get_client()
+    timings = {}
+    uploaded_files = []
     try:
         print(f"🖼️ 이미지 {len(image_paths)}장 분석 시작...")
         
-        # 이미지 파일들을 업로드
-        uploaded_files = []
-        for path in image_paths:
-            with open(path, "rb") as f:
-                # 이미지 업로드 (작은 파일이라 금방 됨)
-                up_file = client.files.upload(file=f, config=types.UploadFileConfig(mime_type='image/jpeg'))
-                uploaded_files.append(up_file)
+        # 이미지 파일들을 동시에 업로드
+        t0 = time.perf_counter()
+        uploaded_files = await _upload_files(client, image_paths, 'image/jpeg')
+        timings["upload"] = round(time.perf_counter() - t0, 2)
         
         prompt = """
         이 사진들은 인스타그램 맛집 게시물이야. 사진 속 음식과 메뉴판, 간판 등을 분석해줘.
@@ -94,15 +265,18 @@ def analyze_images(image_paths):
         [미션]
         1. **시각 정보:** 메뉴판 텍스트나 간판을 읽어서 식당 이름을 찾아내.
         2. **음식 분석:** 사진에 나온 음식이 뭔지 파악해서 설명해.
+        3. **지역:** 위치 태그나 간판으로 도시/동네를 알 수 있으면 region에 적어줘. (같은 가게는 한 번만)
         
         [출력 형식]
         {{
             "summary": "사진 속 맛집 분위기와 음식 요약 (3줄)",
+            "region": "게시물 속 지역 (모르면 빈 문자열)",
             "places": [
                 {{
                     "search_query": "식당 이름 + 지역 (추정)",
                     "display_name": "카드용 깔끔한 이름 (한글/영어)",
-                    "description": "사진에서 보이는 음식 특징과 분위기"
+                    "description": "사진에서 보이는 음식 특징과 분위기",
+                    "region": "가게가 있는 지역 (모르면 빈 문자열)"
                 }}
             ]
         }}
@@ -111,50 +285,141 @@ def analyze_images(image_paths):
         # 프롬프트 + 이미지들 전송
         contents = [prompt] + uploaded_files
         
-        response = client.models.generate_content(
-            model=MODEL_NAME, 
-            contents=contents,
-            config=types.GenerateContentConfig(response_mime_type='application/json')
+        t0 = time.perf_counter()
+        response = await _generate(
+            client, MODEL_NAME,
+            contents,
+            config=_json_config()
         )
-        return json.loads(response.text)
+        timings["generate"] = round(time.perf_counter() - t0, 2)
+        result = await _remember(json.loads(response.text), content_key, source_url)
+        return dict(result, timings=timings)
 
     except Exception as e:
-        return {"summary": f"이미지 분석 에러: {str(e)}", "places": []}
+        return {"summary": f"이미지 분석 에러: {str(e)}", "places": [], "timings": timings}
+    finally:
+        await _delete_files(client, uploaded_files)
+
+def analyze_images(image_paths, source_url=None):
+    return runtime.run_sync(analyze_images_async(image_paths, source_url))
 
 # [3] 텍스트 분석
-def analyze_text(text):
+async def analyze_text_async(text, source_url=None):
+    content_key = _content_key("text", hash_bytes(text))
+    cached = await _lookup(content_key, source_url)
+    if cached is not None:
+        return cached
+    return await _shared(content_key, source_url, lambda: _analyze_text_uncached(text, content_key, source_url))
+
+async def _analyze_text_uncached(text, content_key, source_url):
     client = get_client()
     prompt = f"""
-    맛집 정보 추출. JSON 포맷.
-    텍스트: {text[:20000]} 
-    Format: {{ "summary": "요약", "places": [{{"search_query": "이름", "display_name": "이름(한/영)", "description": "특징"}}] }}
+    맛집 정보 추출. JSON 포맷. 같은 가게는 한 번만, 지역(도시/동네)을 알면 region에.
+    텍스트: {blog.pack_text(text)} 
+    confidence: 가게 이름이 텍스트에 분명히 적혀 있으면 1에 가깝게, 추측이면 0에 가깝게.
+    Format: {{ "summary": "요약", "region": "지역", "confidence": 0.0, "places": [{{"search_query": "이름", "display_name": "이름(한/영)", "description": "특징", "region": "지역"}}] }}
     """
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config=types.GenerateContentConfig(response_mime_type='application/json')
+        response = await _generate(
+            client, MODEL_NAME,
+            prompt,
+            config=_json_config()
         )
-        return json.loads(response.text)
-    except:
+        return await _remember(json.loads(response.text), content_key, source_url)
+    except Exception:
         return {"summary": "실패", "places": []}
 
+def analyze_text(text, source_url=None):
+    return runtime.run_sync(analyze_text_async(text, source_url))
+
 # [4] 리뷰 요약
-def summarize_reviews(reviews):
-    if not reviews: return ""
-    client = get_client()
+REVIEWS_PER_PLACE = 15
+# 한 번의 요약 호출에 넣을 입력 토큰 예산 (넘으면 여러 번 나눠서 호출)
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "24000"))
+
+def _clean_reviews(reviews):
     cleaned = []
-    for r in reviews[:15]:
+    for r in reviews[:REVIEWS_PER_PLACE]:
         txt = r.get('text', '') if isinstance(r, dict) else str(r)
         if txt: cleaned.append(txt)
-    review_text = "\n".join(cleaned)
-    if not review_text.strip(): return "리뷰 없음"
+    return "\n".join(cleaned)
+
+def _estimate_tokens(text):
+    # 한글은 대략 글자 2개당 1토큰보다 많이 나오므로 보수적으로 계산
+    return len(text) // 2 + 1
 
+def _pack_batches(texts, budget=SUMMARY_TOKEN_BUDGET):
+    """
+    {place_id: 리뷰 텍스트}를 토큰 예산 안에 들어가는 묶음들로 나눕니다.
+    """
+    batches, current, used = [], {}, 0
+    for place_id, text in texts.items():
+        cost = _estimate_tokens(text)
+        if current and used + cost > budget:
+            batches.append(current)
+            current, used = {}, 0
+        current[place_id] = text
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def _summarize_batch(client, batch):
+    prompt = f"""
+    아래 JSON은 장소 ID별 구글 리뷰 모음이야. 장소마다 리뷰를 3줄로 요약해줘. (인사말 생략, 바로 본론)
+
+    [출력 형식]
+    {{ "장소 ID": "3줄 요약", ... }}
+
+    [리뷰]
+    {json.dumps(batch, ensure_ascii=False)}
+    """
     try:
-        res = client.models.generate_content(
-            model=MODEL_NAME, 
-            contents=f"리뷰 3줄 요약 (인사말 생략, 바로 본론): {review_text}"
+        res = await _generate(
+            client, SUMMARY_MODEL_NAME,
+            prompt,
+            config=_json_config()
         )
-        return res.text
-    except:
-        return "요약 실패"
+        data = json.loads(res.text)
+    except Exception as e:
+        print(f"⚠️ 리뷰 요약 실패: {e}")
+        data = {}
+    return {place_id: (data.get(place_id) or "요약 실패") for place_id in batch}
+
+async def summarize_reviews_batch_async(reviews_by_place):
+    """
+    여러 장소의 리뷰를 한 번(필요하면 몇 번)의 호출로 요약합니다.
+    입력: {place_id: reviews}, 반환: {place_id: 요약}
+    """
+    results = {}
+    texts = {}
+    for place_id, reviews in reviews_by_place.items():
+        if not reviews:
+            results[place_id] = ""
+            continue
+        text = _clean_reviews(reviews)
+        if not text.strip():
+            results[place_id] = "리뷰 없음"
+        else:
+            texts[place_id] = text
+
+    batches = _pack_batches(texts)
+    if not batches:
+        return results
+
+    client = get_client()
+    slots = asyncio.Semaphore(4)
+
+    async def summarize(batch):
+        async with slots:
+            return await _summarize_batch(client, batch)
+    for summaries in await asyncio.gather(*(summarize(b) for b in batches)):
+        results.update(summaries)
+    return results
+
+def summarize_reviews_batch(reviews_by_place):
+    return runtime.run_sync(summarize_reviews_batch_async(reviews_by_place))
+
+def summarize_reviews(reviews):
+    if not reviews: return ""
+    return summarize_reviews_batch({"place": reviews})["place"]
@@ -0,0 +1,87 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+import httpx
+import services.http_client as sync_http
+import services.runtime_service as runtime
+import services.trace_service as trace
+
+# http_client의 비동기 버전 (httpx)
+# 타임아웃/재시도 규칙과 호스트별 메트릭은 http_client와 같은 것을 씀
+
+def _make_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(sync_http.READ_TIMEOUT, connect=sync_http.CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_keepalive_connections=sync_http.POOL_SIZE),
+        follow_redirects=True
+    )
+
+def get_client():
+    """이벤트 루프마다 하나의 AsyncClient를 만들어 커넥션을 재사용합니다."""
+    return runtime.loop_local("httpx", _make_client)
+
+def _timeout(timeout):
+    # requests 스타일 (연결, 읽기) 튜플도 받음
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(timeout[1], connect=timeout[0])
+    return timeout
+
+async def request(method, url, retries=sync_http.MAX_RETRIES, timeout=None, **kwargs):
+    """
+    공용 비동기 HTTP 요청 함수. 429/5xx 재시도, POST는 429와 연결 실패에서만 재시도합니다.
+    """
+    method = method.upper()
+    host = urlsplit(url).netloc
+    if timeout is not None:
+        kwargs["timeout"] = _timeout(timeout)
+    with trace.span("http.request", "http", host=host, method=method, client="async") as sp:
+        response = await _request_with_retry(method, url, host, retries, **kwargs)
+        sp.set(http_status=response.status_code, bytes=response.headers.get("Content-Length"))
+        return response
+
+async def _request_with_retry(method, url, host, retries, **kwargs):
+    client = get_client()
+    idempotent = method in sync_http.IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            # 연결 자체가 안 된 경우는 요청이 전달되지 않았으므로 POST도 안전
+            safe_to_retry = idempotent or isinstance(e, (httpx.ConnectTimeout, httpx.ConnectError))
+            if attempt < retries and safe_to_retry:
+                sync_http._record(host, 0, retried=True)
+                await asyncio.sleep(sync_http._backoff_seconds(attempt))
+                attempt += 1
+                continue
+            sync_http._record(host, time.perf_counter() - start, error=True)
+            raise
+
+        elapsed = time.perf_counter() - start
+        status = response.status_code
+        retryable = status in sync_http.RETRY_STATUSES and (idempotent or status == 429)
+        if retryable and attempt < retries:
+            delay = sync_http._retry_after_seconds(response)
+            if delay is None:
+                delay = sync_http._backoff_seconds(attempt)
+            sync_http._record(host, elapsed, retried=True)
+            await asyncio.sleep(min(delay, sync_http.BACKOFF_MAX))
+            attempt += 1
+            continue
+
+        sync_http._record(host, elapsed, status=status, error=status >= 400)
+        return response
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
+
+async def aclose():
+    """지금 루프의 클라이언트를 닫습니다. (asyncio.run으로 따로 돌린 스크립트 끝에서)"""
+    client = runtime.discard_loop_local("httpx")
+    if client is not None:
+        await client.aclose()
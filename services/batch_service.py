@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import threading
+import services.curation_service as engine
+import services.history_service as history
+import services.export_service as export
+import services.download_service as downloader
+import services.image_service as image_gen
+import services.trace_service as trace
+from services.pipeline_service import Pipeline, Stage
+
+# 단계별 워커 수 / 큐 크기 기본값
+STAGE_WORKERS = {"fetch": 4, "analyze": 3, "enrich": 4, "render": 2}
+QUEUE_SIZE = 8
+
+class Journal:
+    """
+    처리 결과를 한 줄씩 JSONL로 남깁니다. 중간에 죽어도 다시 실행하면
+    이미 성공한 링크는 건너뛰고 실패한 링크만 다시 처리합니다.
+    메모리에는 끝난 링크 주소만 두고, 결과는 results()로 파일에서 한 건씩 다시 읽습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        for entry in self._entries():
+            if entry.get("status") == "ok":
+                self.done.add(entry["url"])
+
+    def _entries(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # 쓰다가 끊긴 마지막 줄
+                    continue
+
+    def results(self, urls=None):
+        """성공한 결과를 기록된 순서대로 한 건씩 돌려줍니다. (urls를 주면 그 링크들만)"""
+        wanted = set(urls) if urls is not None else None
+        seen = set()
+        for entry in self._entries():
+            url = entry.get("url")
+            if entry.get("status") != "ok" or url in seen or (wanted is not None and url not in wanted):
+                continue
+            seen.add(url)
+            yield entry["result"]
+
+    def record(self, url, status, result=None, error=None):
+        entry = {"url": url, "status": status, "result": result, "error": error, "at": time.time()}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status == "ok":
+                self.done.add(url)
+
+def read_urls(path):
+    """한 줄에 링크 하나 (빈 줄, #으로 시작하는 줄은 무시, 중복 제거)"""
+    urls = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith("#") and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+def summarize_timings(results):
+    """
+    단계별 소요 시간 통계 (건수, 합계, 평균, p95, 최대)
+    """
+    by_stage = {}
+    for result in results:
+        for stage, seconds in (result.get("stage_timings") or {}).items():
+            by_stage.setdefault(stage, []).append(seconds)
+
+    summary = {}
+    for stage, values in by_stage.items():
+        values.sort()
+        summary[stage] = {
+            "count": len(values),
+            "total": round(sum(values), 2),
+            "avg": round(sum(values) / len(values), 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max": round(values[-1], 2)
+        }
+    return summary
+
+def summarize_tiers(results):
+    """
+    유튜브 분석이 어느 단계(자막/영상)에서 끝났는지 건수와 아낀 다운로드 용량
+    """
+    summary = {}
+    for result in results:
+        report = result.get("tier_report")
+        if not report:
+            continue
+        stats = summary.setdefault(report["tier"], {"count": 0, "escalated": 0, "bytes_avoided": 0})
+        stats["count"] += 1
+        stats["escalated"] += int(bool(report.get("escalated")))
+        stats["bytes_avoided"] += report.get("bytes_avoided") or 0
+    return summary
+
+def _timed_stage(name, func):
+    # 작업(job) dict를 받아 단계를 실행하고 소요 시간을 기록
+    def run(job):
+        start = time.perf_counter()
+        with trace.use(job["trace"]):
+            func(job)
+        job["stage_timings"][name] = round(time.perf_counter() - start, 3)
+        return job
+    return run
+
+# 단계별 제한 시간(CURATE_*_TIMEOUT)은 engine의 동기 래퍼가 적용 (넘기면 CurationError → 실패로 기록)
+def _fetch(job):
+    job["content"] = engine.fetch_content(job["url"], job["report"])
+
+def _analyze(job):
+    job["ai_result"] = engine.analyze_content(job.pop("content"), job["report"])
+
+def _enrich(job):
+    job["result"] = engine.enrich_result(job["url"], job.pop("ai_result"), job["report"])
+
+def _render(job):
+    # 카드는 내용 해시 경로(image_gen.card_path)에 남으므로 경로를 결과에 넣지 않음
+    engine.render_cards(job["result"])
+
+def build_pipeline(workers=None, queue_size=QUEUE_SIZE, on_result=None, on_error=None):
+    """
+    가져오기 → 분석 → 지도/리뷰 → 카드 렌더링 단계를 각각의 워커 풀로 겹쳐서 실행합니다.
+    workers에서 render를 0으로 주면 카드 렌더링 단계를 뺍니다.
+    """
+    workers = dict(STAGE_WORKERS, **{k: v for k, v in (workers or {}).items() if v is not None})
+    steps = [("fetch", _fetch), ("analyze", _analyze), ("enrich", _enrich), ("render", _render)]
+    stages = [
+        Stage(name, _timed_stage(name, func), workers=workers[name], queue_size=queue_size)
+        for name, func in steps if workers[name] > 0
+    ]
+    return Pipeline(stages, on_result=on_result, on_error=on_error)
+
+def run_batch(urls, journal_path, workers=None, queue_size=QUEUE_SIZE, on_result=None, stats_interval=None):
+    """
+    여러 링크를 단계별 파이프라인으로 처리합니다.
+    on_result(url, status, result_or_error)는 링크가 끝날 때마다 호출됩니다. (결과는 모아두지 않음)
+    stats_interval(초)을 주면 단계별 큐 길이/처리량을 주기적으로 출력합니다.
+    반환값: Journal - 성공한 결과는 journal.results(urls)로 파일에서 다시 읽음 (이전 실행에서 끝난 것 포함)
+    """
+    # 이전 실행이 남긴 오래된 임시 파일, 오래된 카드 파일 정리
+    downloader.cleanup_temp_dir()
+    image_gen.prune_card_dir()
+
+    journal = Journal(journal_path)
+    todo = [url for url in urls if url not in journal.done]
+    if len(todo) < len(urls):
+        print(f"↩️ 이전 실행에서 끝난 {len(urls) - len(todo)}개 링크는 건너뜁니다.")
+
+    def handle_result(url, job):
+        result = dict(job["result"], stage_timings=job["stage_timings"])
+        if not result.get("places_data"):
+            # Gemini 에러/크롤링 실패도 빈 결과로 끝까지 오므로, 다음 실행에서 다시 시도하도록 실패로 기록
+            handle_error(url, "result", result.get("summary") or "장소를 찾지 못했습니다")
+            return
+        journal.record(url, "ok", result=result)
+        # 앱의 "지난 분석"/장소 검색에서도 보이도록 결과 저장소에 남김
+        history.save_result(result)
+        if on_result: on_result(url, "ok", result)
+
+    def handle_error(url, stage_name, error):
+        message = f"[{stage_name}] {error}"
+        journal.record(url, "error", error=message)
+        if on_result: on_result(url, "error", message)
+
+    pipeline = build_pipeline(workers, queue_size, on_result=handle_result, on_error=handle_error).start()
+
+    stop_monitor = threading.Event()
+    if stats_interval:
+        def monitor():
+            while not stop_monitor.wait(stats_interval):
+                print(f"📈 {pipeline.format_stats()}")
+        threading.Thread(target=monitor, daemon=True).start()
+
+    for url in todo:
+        pipeline.submit(url, {
+            "url": url,
+            "stage_timings": {},
+            "trace": trace.Trace(url),
+            "report": lambda msg, url=url: print(f"[{url}] {msg}")
+        })
+    pipeline.join()
+    stop_monitor.set()
+
+    if todo:
+        print(f"📈 {pipeline.format_stats()}")
+    return journal
+
+def write_outputs(results, out_dir, formats=("xlsx", "csv"), thumbnails=False, link_formulas=False):
+    """
+    결과를 합쳐서 표(xlsx / csv / parquet 중 formats)와 jsonl로 저장하고 경로를 반환합니다.
+    results에 결과를 새로 돌려주는 함수(예: lambda: journal.results(urls))를 주면 형식마다 처음부터 다시 읽으므로
+    링크/장소 수가 많아도 메모리가 늘지 않습니다. (리스트도 그대로 받음)
+    """
+    load = results if callable(results) else lambda: results
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for fmt in formats:
+        paths[fmt] = os.path.join(out_dir, f"curation.{fmt}")
+        options = {"thumbnails": thumbnails, "link_formulas": link_formulas} if fmt == "xlsx" else {}
+        export.export_file(load(), paths[fmt], fmt, with_source=True, **options)
+    paths["jsonl"] = os.path.join(out_dir, "curation.jsonl")
+    with open(paths["jsonl"], "w", encoding="utf-8") as f:
+        for result in load():
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return paths
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import unicodedata
+from urllib.parse import urlsplit, parse_qs, urljoin
+
+# 네이버 블로그 본문 추출 (스마트에디터 ONE 구성요소 단위로 lxml 파싱)
+# 문단 / 사진 설명 / 지도 위젯 / 링크 카드를 따로 뽑아서, 토큰 예산 안에서 장소 정보가 있는 문단을 우선으로 남김
+
+# analyze_text에 넣을 본문 토큰 예산 (예전 2만 글자 ≈ 1만 토큰)
+TEXT_TOKEN_BUDGET = int(os.getenv("TEXT_TOKEN_BUDGET", "10000"))
+# 남은 예산이 이보다 적으면 긴 줄을 잘라서 넣지 않음 (몇 글자짜리 조각은 도움이 안 됨)
+MIN_PARTIAL_TOKENS = 50
+# 이보다 짧은 문단은 버림 ("ㅎㅎ", "👍" 등)
+MIN_BLOCK_CHARS = 3
+
+MOBILE_HOST = "m.blog.naver.com"
+_BLOG_HOSTS = {"blog.naver.com", "m.blog.naver.com"}
+_POST_PATH = re.compile(r"^/([A-Za-z0-9_-]+)/(\d+)/?$")
+_FRAME_SRC = re.compile(r"""<iframe[^>]+id=["']mainFrame["'][^>]*\bsrc=["']([^"']+)["']""", re.I)
+_INVISIBLE = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+_SPACES = re.compile(r"[ \t\u00a0\u3000]+")
+
+# 장소 정보가 있을 법한 문단 표시 (주소, 전화번호, 영업시간, 가격, 가게 종류)
+_PLACE_SIGNALS = [
+    # 단어 첫 글자에서만 시작 (아니면 띄어쓰기 없는 긴 줄에서 글자마다 끝까지 다시 훑어서 느려짐)
+    (re.compile(r"(?<!\S)\S+(?:로|길)\s?\d+|(?<!\S)\S+(?:동|구|역)\b"), 2),
+    (re.compile(r"\d{2,4}-\d{3,4}-\d{4}"), 3),
+    (re.compile(r"영업\s?시간|브레이크\s?타임|라스트\s?오더|휴무|\d{1,2}:\d{2}"), 2),
+    (re.compile(r"\d[\d,]*\s?원"), 1),
+    (re.compile(r"식당|맛집|카페|가게|본점|주점|호프|포차|베이커리|횟집|국밥|국수|고기|빈대떡"), 1),
+    (re.compile(r"[「『\"'][^「『」』\"']{2,20}[」』\"']"), 1),
+]
+# 구성요소 종류별 기본 점수 (지도 위젯 > 사진 설명 > 일반 문단)
+_KIND_SCORES = {"title": 100, "map": 50, "caption": 3, "link": 2, "text": 0}
+
+def _classes(el):
+    return (el.get("class") or "").split()
+
+def _has_class(el, name):
+    return name in _classes(el)
+
+def _find_class(root, name):
+    return root.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+
+# --- 주소 정리 ---
+def post_url(url):
+    """
+    블로그 글 주소를 모바일 글 주소(m.blog.naver.com/아이디/글번호)로 바꿉니다.
+    데스크톱 주소, PostView.naver?blogId=&logNo= 주소를 모두 받고, 글 주소가 아니면 None.
+    """
+    parts = urlsplit(url)
+    if parts.netloc not in _BLOG_HOSTS:
+        return None
+    query = parse_qs(parts.query)
+    if query.get("blogId") and query.get("logNo"):
+        return f"https://{MOBILE_HOST}/{query['blogId'][0]}/{query['logNo'][0]}"
+    match = _POST_PATH.match(parts.path)
+    if match:
+        return f"https://{MOBILE_HOST}/{match.group(1)}/{match.group(2)}"
+    return None
+
+def find_post_frame(html, base_url):
+    """
+    데스크톱 블로그 페이지의 본문 iframe(mainFrame) 주소를 찾습니다. (없으면 None)
+    """
+    match = _FRAME_SRC.search(html)
+    return urljoin(base_url, match.group(1).replace("&amp;", "&")) if match else None
+
+# --- 본문 추출 ---
+def clean_line(text):
+    """보이지 않는 문자 제거, 공백 정리 (NFC)"""
+    text = _INVISIBLE.sub("", unicodedata.normalize("NFC", text or ""))
+    return _SPACES.sub(" ", text).strip()
+
+def _text_of(el):
+    return clean_line(el.text_content())
+
+def _paragraphs(component):
+    # 문단마다 한 줄 (문단이 없는 구성요소는 전체 텍스트)
+    paragraphs = _find_class(component, "se-text-paragraph")
+    if not paragraphs:
+        return [_text_of(component)]
+    return [_text_of(p) for p in paragraphs]
+
+def _map_places(component):
+    places = []
+    for info in component.xpath(".//*[@data-linkdata]"):
+        try:
+            data = json.loads(info.get("data-linkdata"))
+        except ValueError:
+            continue
+        if data.get("name"):
+            places.append({"name": clean_line(data["name"]), "address": clean_line(data.get("address")),
+                           "place_id": str(data.get("placeId") or "")})
+    if places:
+        return places
+    # 링크 데이터가 없는 예전 지도 위젯은 제목/주소 글자에서
+    addresses = [_text_of(a) for a in _find_class(component, "se-map-address")]
+    return [{"name": _text_of(t), "address": addresses[i] if i < len(addresses) else "", "place_id": ""}
+            for i, t in enumerate(_find_class(component, "se-map-title"))]
+
+def iter_blocks(root):
+    """
+    본문 구성요소를 순서대로 훑으면서 (종류, 텍스트)를 하나씩 돌려줍니다.
+    종류: text / caption(사진 설명) / map(지도 위젯) / link(링크 카드)
+    """
+    for component in _find_class(root, "se-component"):
+        classes = _classes(component)
+        if "se-placesMap" in classes or "se-map" in classes:
+            for place in _map_places(component):
+                yield "map", f"[지도] {place['name']}" + (f" - {place['address']}" if place["address"] else "")
+        elif any(c in classes for c in ("se-image", "se-imageStrip", "se-imageGroup", "se-video")):
+            for caption in _find_class(component, "se-caption"):
+                yield "caption", f"[사진] {_text_of(caption)}"
+        elif "se-oglink" in classes:
+            title = _find_class(component, "se-oglink-title")
+            if title:
+                yield "link", f"[링크] {_text_of(title[0])}"
+        elif "se-text" in classes or "se-quotation" in classes or "se-sectionTitle" in classes:
+            for line in _paragraphs(component):
+                yield "text", line
+
+def _dedupe(blocks):
+    seen = set()
+    for kind, text in blocks:
+        if len(text) < MIN_BLOCK_CHARS or text in seen:
+            continue
+        seen.add(text)
+        yield kind, text
+
+def extract_post(html):
+    """
+    블로그 글 HTML에서 제목과 본문 구성요소들을 뽑습니다.
+    반환값: {"title", "blocks": [(종류, 텍스트), ...], "places": [지도 위젯 장소...]} (본문이 없으면 None)
+    """
+    import lxml.html
+    root = lxml.html.fromstring(html)
+
+    title = _find_class(root, "se-title-text")
+    title = _text_of(title[0]) if title else clean_line(root.findtext(".//title") or "").removesuffix(": 네이버 블로그").strip()
+
+    container = _find_class(root, "se-main-container")
+    if container:
+        blocks = list(_dedupe(iter_blocks(container[0])))
+        places = [p for c in _find_class(container[0], "se-component")
+                  if _has_class(c, "se-placesMap") or _has_class(c, "se-map") for p in _map_places(c)]
+    else:
+        # 예전 에디터(스마트에디터 2) 글
+        legacy = root.xpath(".//*[@id='viewTypeSelector' or @id='postViewArea']")
+        if not legacy:
+            return None
+        lines = (clean_line(line) for line in legacy[0].text_content().splitlines())
+        blocks = list(_dedupe(("text", line) for line in lines))
+        places = []
+
+    if not blocks:
+        return None
+    return {"title": title, "blocks": blocks, "places": places}
+
+def post_to_text(post):
+    lines = [f"제목: {post['title']}"] if post["title"] else []
+    return "\n".join(lines + [text for _, text in post["blocks"]])
+
+# --- 토큰 예산 맞추기 ---
+def _estimate_tokens(text):
+    # ai_service와 같은 보수적인 계산 (글자 2개당 1토큰)
+    return len(text) // 2 + 1
+
+def place_score(text):
+    """문단에 장소 정보가 얼마나 있는지 대충 점수로 (높을수록 먼저 남김)"""
+    kind = "text"
+    if text.startswith("제목:"):
+        kind = "title"
+    elif text.startswith("[지도]"):
+        kind = "map"
+    elif text.startswith("[사진]"):
+        kind = "caption"
+    elif text.startswith("[링크]"):
+        kind = "link"
+    score = _KIND_SCORES.get(kind, 0)
+    for pattern, weight in _PLACE_SIGNALS:
+        if pattern.search(text):
+            score += weight
+    return score
+
+def pack_text(text, budget=TEXT_TOKEN_BUDGET):
+    """
+    줄 단위 텍스트를 토큰 예산 안으로 줄입니다. 앞에서부터 자르지 않고
+    장소 정보가 있는 줄(지도 위젯, 주소, 전화번호, 사진 설명 등)을 먼저 남기고 원래 순서대로 합칩니다.
+    """
+    if _estimate_tokens(text) <= budget:
+        return text
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    # 점수 높은 순, 같은 점수면 앞쪽 문단 우선
+    order = sorted(range(len(lines)), key=lambda i: (-place_score(lines[i]), i))
+    keep, used = {}, 0
+    for i in order:
+        line = lines[i]
+        remaining = budget - used
+        if _estimate_tokens(line) > remaining:
+            # 남은 예산보다 긴 줄(줄바꿈 없는 자막/본문 등)은 버리지 않고 앞부분만 남김
+            if remaining < MIN_PARTIAL_TOKENS:
+                continue
+            line = line[:(remaining - 1) * 2]
+        keep[i] = line
+        used += _estimate_tokens(line)
+    if not keep:
+        return text[:budget * 2]
+    return "\n".join(keep[i] for i in sorted(keep))
@@ -0,0 +1,236 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 캐시 파일 위치 (컨테이너라면 볼륨 경로로 지정)
+CACHE_DIR = os.getenv("CURATOR_CACHE_DIR", ".cache")
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "curator_cache.sqlite")
+
+# 읽을 때마다 accessed_at을 커밋하면 느려서, 최근 사용 시각은 모아 두었다가 한 번에 씀
+# (이 개수가 쌓이거나 이 시간이 지나면, 또는 set()할 때 같이) - 그 사이 DB의 LRU 순서는 근사치
+TOUCH_BATCH = 64
+TOUCH_INTERVAL = 30.0
+
+_db_lock = threading.Lock()
+_db_conn = None
+
+def _get_conn():
+    global _db_conn
+    if _db_conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _db_conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        _db_conn.execute("PRAGMA journal_mode=WAL")
+        _db_conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        _db_conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)")
+        _db_conn.commit()
+    return _db_conn
+
+def hash_bytes(*chunks):
+    """여러 조각(bytes/str)을 하나의 sha256 hex로 묶습니다."""
+    h = hashlib.sha256()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        h.update(chunk)
+    return h.hexdigest()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """파일 내용을 sha256 hex로 반환합니다."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class DiskCache:
+    """
+    SQLite 기반 영구 캐시 (TTL + 개수 제한 LRU).
+    값은 JSON으로 저장되므로 dict/list/str 등만 넣을 수 있습니다.
+    memory_size를 주면 앞단에 메모리 LRU를 두어 자주 쓰는 키는 DB를 거치지 않습니다.
+    메모리에서 찾은 키도 사용 시각은 DB에 (모아서) 기록하므로, 재시작 후에도 자주 쓰던 키가 먼저 지워지지 않습니다.
+    """
+
+    def __init__(self, namespace, ttl=None, max_entries=1000, memory_size=0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._touched = {}
+        self._touched_flushed_at = time.time()
+
+    def _memory_get(self, key, now):
+        if not self.memory_size:
+            return None
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key, value, expires_at):
+        if not self.memory_size:
+            return
+        with self._memory_lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _touch(self, key, now):
+        # 모아 둔 사용 시각을 DB에 쓸 때가 됐으면 True
+        with self._memory_lock:
+            self._touched[key] = now
+            return len(self._touched) >= TOUCH_BATCH or now - self._touched_flushed_at >= TOUCH_INTERVAL
+
+    def flush_touches(self):
+        with _db_lock:
+            conn = _get_conn()
+            self._write_touches(conn)
+            conn.commit()
+
+    def _write_touches(self, conn):
+        # _db_lock 안에서 호출
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+            self._touched_flushed_at = time.time()
+        if touched:
+            conn.executemany(
+                "UPDATE cache_entries SET accessed_at=? WHERE namespace=? AND key=?",
+                [(at, self.namespace, key) for key, at in touched.items()]
+            )
+
+    def _memory_hit(self, key, now):
+        value = self._memory_get(key, now)
+        if value is not None:
+            self.hits += 1
+            self.memory_hits += 1
+        return value
+
+    def get(self, key):
+        now = time.time()
+        value = self._memory_hit(key, now)
+        if value is not None:
+            if self._touch(key, now):
+                self.flush_touches()
+            return json.loads(value)
+        return self._db_get(key, now)
+
+    def _db_get(self, key, now):
+        with _db_lock:
+            conn = _get_conn()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace=? AND key=?",
+                (self.namespace, key)
+            ).fetchone()
+
+            if row and row[1] is not None and row[1] < now:
+                conn.execute("DELETE FROM cache_entries WHERE namespace=? AND key=?", (self.namespace, key))
+                conn.commit()
+                row = None
+
+            if not row:
+                self.misses += 1
+                return None
+
+        if self._touch(key, now):
+            self.flush_touches()
+        self._memory_set(key, row[0], row[1])
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _prepare(self, key, value, ttl):
+        now = time.time()
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = now + ttl if ttl else None
+        payload = json.dumps(value, ensure_ascii=False)
+        self._memory_set(key, payload, expires_at)
+        return key, payload, expires_at, now
+
+    def set(self, key, value, ttl=None):
+        self._db_set(*self._prepare(key, value, ttl))
+
+    def _db_set(self, key, payload, expires_at, now):
+        with _db_lock:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at, now)
+            )
+            # 지우기 전에 모아 둔 사용 시각을 먼저 반영
+            self._write_touches(conn)
+            self._evict(conn, now)
+            conn.commit()
+
+    # 비동기 코드(공용 이벤트 루프)에서는 아래를 씀 - 메모리에 있으면 바로 돌려주고, SQLite는 스레드에서
+    async def get_async(self, key):
+        now = time.time()
+        value = self._memory_hit(key, now)
+        if value is not None:
+            if self._touch(key, now):
+                await asyncio.to_thread(self.flush_touches)
+            return json.loads(value)
+        return await asyncio.to_thread(self._db_get, key, now)
+
+    async def set_async(self, key, value, ttl=None):
+        # 메모리에는 바로 넣어서, DB에 쓰는 동안 들어온 조회도 적중
+        await asyncio.to_thread(self._db_set, *self._prepare(key, value, ttl))
+
+    def _evict(self, conn, now):
+        # 만료된 항목 삭제 후, 개수 초과분은 가장 오래 안 쓴 것부터 삭제
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace=? AND expires_at IS NOT NULL AND expires_at < ?",
+            (self.namespace, now)
+        )
+        if self.max_entries:
+            conn.execute("""
+                DELETE FROM cache_entries WHERE namespace=? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace=?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.namespace, self.namespace, self.max_entries))
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+            self._touched.clear()
+        with _db_lock:
+            conn = _get_conn()
+            conn.execute("DELETE FROM cache_entries WHERE namespace=?", (self.namespace,))
+            conn.commit()
+
+    def stats(self):
+        with _db_lock:
+            size = _get_conn().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace=?", (self.namespace,)
+            ).fetchone()[0]
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "size": size
+        }
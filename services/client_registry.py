@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+
+# 프로세스 전체에서 같이 쓰는 외부 서비스 클라이언트 (Gemini, Apify, 호스트별 HTTP 세션)
+# 처음 쓸 때 한 번만 만들고, Streamlit 재실행/배치 워커/스레드가 모두 재사용함
+# 무거운 SDK는 여기서 처음 필요할 때 불러옴 (앱 시작 시간 단축)
+
+_clients = {}
+_secrets = {}
+_lock = threading.Lock()
+
+def get(key, factory):
+    """key에 해당하는 클라이언트를 돌려줍니다. 없으면 factory()로 한 번만 만듭니다."""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+def reset(key=None):
+    """
+    클라이언트/비밀값을 버려서 다음 호출 때 새로 만들게 합니다. (키 교체, 벤치마크용)
+    key가 없으면 전부 비웁니다.
+    """
+    with _lock:
+        if key is None:
+            _clients.clear()
+            _secrets.clear()
+        else:
+            _clients.pop(key, None)
+
+def secret(name):
+    """
+    st.secrets → 환경 변수 순서로 값을 찾고 기억해 둡니다. (st.secrets는 읽을 때마다 파일을 확인해서 느림)
+    Streamlit 밖(CLI, 배치)에서는 streamlit을 불러오지 않고 환경 변수만 봅니다.
+    """
+    if name in _secrets:
+        return _secrets[name]
+    value = None
+    st = sys.modules.get("streamlit")
+    if st is not None:
+        try:
+            value = st.secrets[name]
+        except Exception:
+            value = None
+    if not value:
+        value = os.getenv(name)
+    _secrets[name] = value
+    return value
+
+def gemini():
+    """google-genai Client (API 키별로 하나)"""
+    api_key = secret("GEMINI_API_KEY")
+
+    def make():
+        from google import genai
+        return genai.Client(api_key=api_key)
+    return get(("gemini", api_key), make)
+
+def apify(token):
+    """ApifyClientAsync (토큰별로 하나)"""
+    def make():
+        from apify_client import ApifyClientAsync
+        return ApifyClientAsync(token)
+    return get(("apify", token), make)
+
+def http_session(host, pool_size):
+    """호스트별 requests.Session (TCP/TLS 연결 재사용)"""
+    def make():
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return get(("http", host), make)
@@ -0,0 +1,443 @@
+import os
+import re
+import time
+import asyncio
+from contextlib import asynccontextmanager
+import services.scraper_service as scraper
+import services.ai_service as ai
+import services.map_service as map_api
+import services.enrich_service as enricher
+import services.media_service as media
+import services.image_service as image_gen
+import services.runtime_service as runtime
+import services.singleflight_service as flights
+import services.trace_service as trace
+from services.url_service import canonicalize_url
+
+# 단계별 동시 실행 상한 (배치 실행 시 조절)
+STAGE_LIMITS = {
+    "fetch": int(os.getenv("CURATE_FETCH_CONCURRENCY", "4")),
+    "analyze": int(os.getenv("CURATE_ANALYZE_CONCURRENCY", "3")),
+    "enrich": int(os.getenv("CURATE_ENRICH_CONCURRENCY", "4")),
+}
+# 단계별 제한 시간(초, 0이면 제한 없음) - 넘으면 그 단계의 작업을 취소하고 CurationError
+STAGE_TIMEOUTS = {
+    "fetch": float(os.getenv("CURATE_FETCH_TIMEOUT", "300")),
+    "analyze": float(os.getenv("CURATE_ANALYZE_TIMEOUT", "600")),
+    "enrich": float(os.getenv("CURATE_ENRICH_TIMEOUT", "180")),
+}
+
+# 유튜브는 제목/설명/자막으로 먼저 분석하고, 부족할 때만 영상을 받아서 분석
+YOUTUBE_TIERED = os.getenv("YOUTUBE_TIERED", "1") == "1"
+TEXT_TIER_MIN_PLACES = int(os.getenv("TEXT_TIER_MIN_PLACES", "1"))
+TEXT_TIER_MIN_CONFIDENCE = float(os.getenv("TEXT_TIER_MIN_CONFIDENCE", "0.6"))
+# 설명+자막이 이보다 짧으면 텍스트 분석을 건너뛰고 바로 영상으로
+TEXT_TIER_MIN_CHARS = int(os.getenv("TEXT_TIER_MIN_CHARS", "40"))
+
+class CurationError(Exception):
+    """링크를 처리할 수 없을 때 (다운로드 실패, 비공개 계정 등)"""
+    pass
+
+def configure_stage_limits(**limits):
+    """예: configure_stage_limits(fetch=2, analyze=2, enrich=8)"""
+    for name, limit in limits.items():
+        if limit:
+            STAGE_LIMITS[name] = limit
+
+def _timeout_error(name, timeout):
+    trace.count("stage_timeout", stage=name)
+    return CurationError(f"⏱️ {name} 단계가 제한 시간({timeout:g}초)을 넘겨 중단했습니다.")
+
+@asynccontextmanager
+async def _stage(name, timings, timeout=None):
+    """
+    단계 하나를 동시 실행 상한 안에서 실행하고 소요 시간을 기록합니다.
+    제한 시간을 넘기면 안쪽 작업(다운로드/업로드/검색)을 모두 취소하고 CurationError를 냅니다.
+    """
+    # 상한이 바뀌면 새 세마포어를 쓰도록 이름에 상한을 포함
+    limit = STAGE_LIMITS[name]
+    async with runtime.semaphore(f"stage.{name}.{limit}", limit):
+        start = time.perf_counter()
+        deadline = asyncio.timeout(timeout or None)
+        try:
+            async with deadline:
+                yield
+        except TimeoutError:
+            # 안쪽 작업이 낸 TimeoutError(httpx/소켓 타임아웃 등)는 그대로 올려보냄
+            if not deadline.expired():
+                raise
+            raise _timeout_error(name, timeout)
+        finally:
+            timings[name] = round(time.perf_counter() - start, 3)
+
+def _noop(message):
+    pass
+
+def detect_link_type(url):
+    if "youtube.com" in url or "youtu.be" in url:
+        return "youtube"
+    if "instagram.com" in url:
+        return "instagram"
+    if "naver" in url:
+        return "naver"
+    return "text"
+
+def _media_message(report):
+    if report and report["bytes_saved"]:
+        return f"🎞️ 업로드 용량 {report['bytes_saved'] / (1024 * 1024):.1f}MB 절약 (약 {report['seconds_saved']}초)"
+    return None
+
+def _youtube_text(meta):
+    lines = [f"제목: {meta['title']}", f"채널: {meta['channel']}"]
+    if meta.get("location"):
+        lines.append(f"위치: {meta['location']}")
+    if meta.get("tags"):
+        lines.append(f"태그: {', '.join(meta['tags'][:20])}")
+    lines += ["설명:", meta.get("description", "")]
+    if meta.get("transcript"):
+        lines += ["자막:", meta["transcript"]]
+    return "\n".join(lines)
+
+async def _fetch_youtube_video(url, report, tier_report=None):
+    report("📥 유튜브 영상 다운로드 중...")
+    video_path, error = await scraper.get_video_file_async(url)
+    if error:
+        raise CurationError(error)
+    video_path, media_report = await asyncio.to_thread(media.shrink_video, video_path, "youtube")
+    return {"url": url, "kind": "video", "path": video_path, "message": "🧠 Gemini가 유튜브 영상을 분석 중...",
+            "media_report": media_report, "tier_report": tier_report}
+
+# [1] 콘텐츠 가져오기 (다운로드 + 업로드 전 축소)
+async def fetch_content_async(url, report=_noop):
+    """
+    링크에서 분석할 콘텐츠를 가져옵니다.
+    반환값: {"url", "kind": cached/video/images/text, ...}
+    """
+    cached_result = await ai.get_cached_analysis_async(url)
+    if cached_result is not None:
+        report("⚡ 이전 분석 결과를 불러왔습니다.")
+        return {"url": url, "kind": "cached", "ai_result": cached_result}
+
+    link_type = detect_link_type(url)
+
+    # [A] 유튜브 처리 (제목/설명/자막 먼저, 부족하면 영상)
+    if link_type == "youtube":
+        if YOUTUBE_TIERED:
+            report("📝 유튜브 제목/설명/자막 확인 중...")
+            meta, error = await scraper.get_youtube_text_async(url)
+            text_chars = len(meta["description"]) + len(meta["transcript"]) if meta else 0
+            if text_chars >= TEXT_TIER_MIN_CHARS:
+                return {"url": url, "kind": "youtube_text", "meta": meta}
+            report(f"⚠️ {error}" if error else "📝 설명/자막이 거의 없어서 영상을 바로 분석합니다.")
+            return await _fetch_youtube_video(url, report, {"tier": "video", "escalated": False, "reason": "no_text"})
+        return await _fetch_youtube_video(url, report)
+
+    # [B] 인스타그램 처리 (릴스 or 게시물)
+    if link_type == "instagram":
+        report("📸 인스타그램 콘텐츠 가져오는 중 (Apify)...")
+        # scraper가 'video'인지 'image'인지 알려줌
+        content_type, content_path, error = await scraper.get_instagram_content_async(url)
+        if error:
+            raise CurationError(error)
+        if content_type == 'video':
+            content_path, media_report = await asyncio.to_thread(media.shrink_video, content_path, "instagram")
+            return {"url": url, "kind": "video", "path": content_path, "message": "🎥 릴스(영상) 분석 중...", "media_report": media_report}
+        content_path, media_report = await asyncio.to_thread(media.shrink_images, content_path)
+        return {"url": url, "kind": "images", "paths": content_path, "media_report": media_report}
+
+    # [C] 텍스트 (블로그 등)
+    report("📄 텍스트 정보 수집 중...")
+    raw_text = await scraper.get_naver_blog_content_async(url) if link_type == "naver" else "텍스트 추출 불가"
+    # 본문을 제대로 가져온 경우에만 링크 기준으로 캐시
+    scraped_ok = link_type == "naver" and not raw_text.startswith(("크롤링 실패", "본문 없음"))
+    return {"url": url, "kind": "text", "text": raw_text, "cache_by_url": scraped_ok}
+
+# [2] AI 분석
+async def analyze_content_async(content, report=_noop):
+    """
+    가져온 콘텐츠를 Gemini로 분석하고, 사용한 임시 파일을 정리합니다.
+    """
+    url = content["url"]
+    message = _media_message(content.get("media_report"))
+    if message:
+        report(message)
+
+    if content["kind"] == "cached":
+        return content["ai_result"]
+
+    if content["kind"] == "youtube_text":
+        return await _analyze_youtube_tiered(content, report)
+
+    if content["kind"] == "video":
+        report(content["message"])
+        try:
+            result = await ai.analyze_video_async(content["path"], source_url=url)
+        finally:
+            if os.path.exists(content["path"]): os.remove(content["path"])
+        if content.get("tier_report"):
+            trace.count("analysis_tier", tier="video")
+            result = dict(result, tier="video", tier_report=content["tier_report"])
+        return result
+
+    if content["kind"] == "images":
+        report(f"🖼️ 사진 게시물({len(content['paths'])}장) 분석 중...")
+        try:
+            return await ai.analyze_images_async(content["paths"], source_url=url)
+        finally:
+            # 사용한 이미지 파일 삭제
+            for p in content["paths"]:
+                if os.path.exists(p): os.remove(p)
+
+    report("🧠 텍스트 읽는 중...")
+    return await ai.analyze_text_async(content["text"], source_url=url if content["cache_by_url"] else None)
+
+def _confidence(ai_result):
+    try:
+        return float(ai_result.get("confidence") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+async def _analyze_youtube_tiered(content, report):
+    """
+    1단계: 제목/설명/자막을 텍스트로 분석 → 장소 수와 확신도가 충분하면 여기서 끝
+    2단계: 부족하면 영상을 받아서 업로드 분석 (어느 단계에서 답했는지 tier/tier_report에 기록)
+    """
+    url, meta = content["url"], content["meta"]
+    report("🧠 제목/설명/자막으로 먼저 분석 중...")
+    start = time.perf_counter()
+    text_result = await ai.analyze_text_async(_youtube_text(meta))
+    text_seconds = round(time.perf_counter() - start, 2)
+
+    places = text_result.get("places") or []
+    confidence = _confidence(text_result)
+    tier_report = {
+        "tier": "transcript",
+        "escalated": False,
+        "confidence": confidence,
+        "text_seconds": text_seconds,
+        "has_transcript": bool(meta.get("transcript")),
+        "bytes_avoided": meta.get("video_bytes") or 0
+    }
+
+    if len(places) >= TEXT_TIER_MIN_PLACES and confidence >= TEXT_TIER_MIN_CONFIDENCE:
+        saved = tier_report["bytes_avoided"]
+        report(f"⚡ 설명/자막만으로 장소 {len(places)}곳을 찾아 영상 분석을 건너뛰었습니다."
+               + (f" (약 {saved / (1024 * 1024):.0f}MB 절약)" if saved else ""))
+        trace.count("analysis_tier", tier="transcript")
+        trace.count("analysis_bytes_avoided", saved)
+        result = dict(text_result, tier="transcript", tier_report=tier_report)
+        # 캐시에는 분석 결과만 (tier_report를 같이 넣으면 다음 캐시 적중 때 절약한 용량이 또 집계됨)
+        await ai.remember_url_async(url, text_result)
+        return result
+
+    report(f"🎥 설명/자막으로는 부족해서(장소 {len(places)}곳, 확신도 {confidence:.1f}) 영상을 분석합니다...")
+    tier_report.update(tier="video", escalated=True, bytes_avoided=0)
+    video = None
+    try:
+        video = await _fetch_youtube_video(url, report, tier_report)
+        video_result = await analyze_content_async(video, report)
+    except Exception as e:
+        if not places:
+            raise
+        # 영상을 못 받거나 분석하지 못하면 텍스트 분석 결과라도 사용
+        step, reason = ("다운로드", "download_failed") if video is None else ("분석", "video_failed")
+        return _text_fallback(text_result, tier_report, report, f"영상 {step} 실패({e})", reason)
+
+    # 영상 분석은 실패해도 예외 대신 에러 요약 + 빈 places를 돌려주므로 여기서도 확인
+    if places and not video_result.get("places"):
+        return _text_fallback(text_result, tier_report, report,
+                              f"영상 분석 실패({video_result.get('summary', '')})", "video_failed")
+    return video_result
+
+def _text_fallback(text_result, tier_report, report, message, reason):
+    report(f"⚠️ {message}, 설명/자막 분석 결과를 사용합니다.")
+    return dict(text_result, tier="transcript", tier_report=dict(tier_report, tier="transcript", reason=reason))
+
+# [3] 지도 검색 및 결과 정리
+async def enrich_result_async(url, ai_result, report=_noop):
+    # Gemini 단계별 소요 시간 (업로드 / 처리 대기 / 생성)
+    if ai_result.get("timings"):
+        labels = {"upload": "업로드", "processing": "처리 대기", "generate": "생성"}
+        report("⏱️ " + " · ".join(f"{labels.get(k, k)} {v}초" for k, v in ai_result["timings"].items()))
+
+    places_data = []
+    if ai_result.get("places"):
+        report("🗺️ 구글 지도에서 위치 확인 중...")
+
+        # 장소별 검색 → 리뷰를 동시에 실행하고, 끝나는 대로 표시
+        def show_progress(idx, item):
+            name = item["map_info"]["name"] if item["map_info"] else item["ai_info"].get("search_query", "맛집")
+            if item.get("error"):
+                report(f"⚠️ {name} 확인 실패")
+            else:
+                report(f"📍 {name} 확인 완료")
+
+        places_data = await enricher.enrich_places_async(ai_result["places"], on_done=show_progress, region=ai_result.get("region"))
+
+    return {
+        "summary": ai_result.get("summary"),
+        "region": ai_result.get("region"),
+        "analysis_tier": ai_result.get("tier"),
+        "tier_report": ai_result.get("tier_report"),
+        "places_data": places_data,
+        "url": url
+    }
+
+async def curate_url_async(url, report=_noop, timeouts=None):
+    """
+    링크 하나를 끝까지 처리합니다. (가져오기 → 분석 → 지도/리뷰)
+    단계마다 STAGE_TIMEOUTS(또는 timeouts로 덮어쓴 값) 안에 끝나지 않으면 취소하고 CurationError를 냅니다.
+    report(message)로 진행 상황을 알려주고, 결과에 단계별 소요 시간(stage_timings)을 담습니다.
+    같은 링크(youtu.be/shorts/watch, 릴스/게시물처럼 주소 형태만 다른 것 포함)가 동시에 들어오면
+    처음 요청만 처리하고 나머지는 그 결과를 같이 받습니다.
+    """
+    result = await flights.do(
+        ("curate", canonicalize_url(url)), lambda: _curate_url_async(url, report, timeouts),
+        on_join=lambda: report("⏳ 같은 링크를 이미 처리 중이라 그 결과를 기다립니다.")
+    )
+    return dict(result, url=url)
+
+async def _curate_url_async(url, report, timeouts):
+    timeouts = dict(STAGE_TIMEOUTS, **(timeouts or {}))
+    timings = {}
+    async with _stage("fetch", timings, timeouts["fetch"]):
+        content = await fetch_content_async(url, report)
+    async with _stage("analyze", timings, timeouts["analyze"]):
+        ai_result = await analyze_content_async(content, report)
+    async with _stage("enrich", timings, timeouts["enrich"]):
+        result = await enrich_result_async(url, ai_result, report)
+    result["stage_timings"] = timings
+    return result
+
+async def curate_urls_async(urls, report=_noop, timeouts=None):
+    """
+    여러 링크를 동시에 처리합니다. (단계별 상한은 STAGE_LIMITS)
+    한 링크가 실패해도 나머지는 계속하고, 바깥에서 취소하면 진행 중인 링크도 모두 취소됩니다.
+    반환값: [(url, result, error), ...] (입력 순서)
+    """
+    async def run(url):
+        try:
+            return url, await curate_url_async(url, lambda msg: report(f"[{url}] {msg}"), timeouts), None
+        except Exception as e:
+            return url, None, str(e)
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [group.create_task(run(url)) for url in urls]
+    return [task.result() for task in tasks]
+
+# --- 동기 래퍼 (Streamlit, 배치 파이프라인 스레드에서 사용) ---
+# 진행 메시지(report)는 호출한 스레드에서 실행되므로 st.write를 그대로 넘겨도 됨
+# 단계를 따로 부를 때(배치 파이프라인)도 STAGE_TIMEOUTS를 적용 (timeout=0이면 제한 없음)
+async def _within(name, coro, timeout=None):
+    timeout = STAGE_TIMEOUTS[name] if timeout is None else timeout
+    deadline = asyncio.timeout(timeout or None)
+    try:
+        async with deadline:
+            return await coro
+    except TimeoutError:
+        if not deadline.expired():
+            raise
+        raise _timeout_error(name, timeout)
+
+def fetch_content(url, report=_noop, timeout=None):
+    return runtime.run_with_reports(lambda send: _within("fetch", fetch_content_async(url, send), timeout), report)
+
+def analyze_content(content, report=_noop, timeout=None):
+    return runtime.run_with_reports(lambda send: _within("analyze", analyze_content_async(content, send), timeout), report)
+
+def enrich_result(url, ai_result, report=_noop, timeout=None):
+    return runtime.run_with_reports(lambda send: _within("enrich", enrich_result_async(url, ai_result, send), timeout), report)
+
+def curate_url(url, report=_noop, timeouts=None):
+    return runtime.run_with_reports(lambda send: curate_url_async(url, send, timeouts), report)
+
+def build_table_rows(result):
+    """
+    분석 결과를 엑셀/CSV 한 줄씩으로 바꿉니다.
+    """
+    rows = []
+    for item in result["places_data"]:
+        p_ai = item['ai_info']
+        p_map = item['map_info']
+        rows.append({
+            "식당이름": p_map['name'] if p_map else p_ai.get('search_query'),
+            "평점": p_map['rating'] if p_map else 0.0,
+            "특징": p_ai.get('description', ''),
+            "리뷰요약": item.get('review_summary', ''),
+            "주소": p_map['address'] if p_map else "",
+            "구글맵링크": map_api.get_map_link(p_map['place_id']) if p_map else ""
+        })
+    return rows
+
+def build_notion_rows(result):
+    """
+    분석 결과를 노션 데이터베이스 행으로 바꿉니다.
+    """
+    rows = []
+    for item in result["places_data"]:
+        p_ai = item['ai_info']
+        p_map = item['map_info']
+        rows.append({
+            "식당이름": p_map['name'] if p_map else p_ai.get('search_query'),
+            "평점": p_map['rating'] if p_map else 0.0,
+            "특징": p_ai.get('description', ''),
+            "주소": p_map['address'] if p_map else "",
+            "지도링크": map_api.get_map_link(p_map['place_id']) if p_map else "",
+            "원본영상": result.get("url", ""),
+            "사진URL": p_map.get('photo_url') if p_map else None
+        })
+    return rows
+
+def clean_text_for_card(text):
+    if not text: return ""
+    cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s\(\)\-\&]', '', text)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return cleaned
+
+def build_card_entries(result):
+    """
+    장소마다 (화면용 이름, 특징, 리뷰 요약, 지도 정보, 카드 데이터)를 만듭니다.
+    """
+    entries = []
+    for item in result["places_data"]:
+        p_ai = item['ai_info']
+        p_map = item['map_info']
+        review_summ = item.get('review_summary', '')
+
+        if p_map and p_map.get('name'):
+            original_name = p_map['name']
+        elif p_ai.get('display_name'):
+            original_name = p_ai['display_name']
+        else:
+            original_name = p_ai.get('search_query', '알 수 없는 식당')
+
+        card_name_clean = clean_text_for_card(original_name)
+        if not card_name_clean.strip():
+            card_name_clean = clean_text_for_card(p_ai.get('display_name', 'Global Restaurant'))
+
+        desc = p_ai.get('description', '')
+
+        card_data = {
+            "식당이름": card_name_clean,
+            "평점": p_map['rating'] if p_map else 0.0,
+            "특징": desc,
+            "리뷰요약": review_summ,
+            "지도링크": map_api.get_map_link(p_map['place_id']) if p_map else "",
+            "사진URL": p_map.get('photo_url') if p_map else None
+        }
+        entries.append((original_name, desc, review_summ, p_map, card_data))
+    return entries
+
+# [4] 카드 렌더링
+def render_cards(result):
+    """
+    결과의 모든 카드를 파일로 그려두고 경로 목록을 반환합니다. (실패한 카드는 None)
+    """
+    paths = []
+    for entry in build_card_entries(result):
+        try:
+            paths.append(image_gen.create_restaurant_card(entry[4]))
+        except Exception as e:
+            print(f"❌ 카드 생성 실패: {e}")
+            paths.append(None)
+    return paths
@@ -0,0 +1,170 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import services.http_client as http
+import services.trace_service as trace
+
+# 다운로드 설정
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_VIDEO_BYTES = int(os.getenv("MAX_VIDEO_BYTES", str(500 * 1024 * 1024)))
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_ATTEMPTS = int(os.getenv("DOWNLOAD_ATTEMPTS", "3"))
+
+# 임시 파일은 작업 폴더가 아닌 전용 폴더에 모아둠
+TEMP_DIR = os.getenv("CURATOR_TEMP_DIR", os.path.join(tempfile.gettempdir(), "curator_media"))
+TEMP_MAX_AGE = int(os.getenv("CURATOR_TEMP_MAX_AGE", "3600"))
+
+_temp_lock = threading.Lock()
+
+class DownloadError(Exception):
+    pass
+
+def get_temp_dir():
+    with _temp_lock:
+        os.makedirs(TEMP_DIR, exist_ok=True)
+    return TEMP_DIR
+
+def new_temp_path(prefix="media_", suffix=""):
+    """
+    임시 폴더 안에 겹치지 않는 파일 경로를 만들어 줍니다. (동시 세션에서도 안전)
+    """
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=get_temp_dir())
+    os.close(fd)
+    return path
+
+def copy_temp_file(path, prefix="shared_"):
+    """
+    임시 파일을 하나 더 복사해서 새 경로를 돌려줍니다. (같은 다운로드를 여러 요청이 나눠 쓸 때, 각자 지워도 되도록)
+    하드 링크는 사진 축소처럼 같은 경로에 덮어쓰는 처리가 다른 쪽 파일까지 바꾸므로 쓰지 않음
+    """
+    new_path = new_temp_path(prefix=prefix, suffix=os.path.splitext(path)[1])
+    shutil.copyfile(path, new_path)
+    return new_path
+
+def remove_files(paths):
+    """임시 파일들을 지웁니다. (없는 경로, None은 건너뜀)"""
+    for path in paths:
+        try:
+            if path:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def cleanup_temp_dir(max_age=TEMP_MAX_AGE):
+    """
+    오래된 임시 파일을 정리합니다. (중간에 죽은 작업이 남긴 파일 등)
+    """
+    if not os.path.isdir(TEMP_DIR):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for name in os.listdir(TEMP_DIR):
+        path = os.path.join(TEMP_DIR, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+@trace.traced("media.download", "download")
+def download_file(url, dest_path=None, prefix="media_", suffix="", max_bytes=MAX_VIDEO_BYTES,
+                  chunk_size=DOWNLOAD_CHUNK_SIZE, headers=None):
+    """
+    파일을 큰 청크 단위로 스트리밍 저장합니다.
+    dest_path에 이미 일부가 받아져 있으면 Range 요청으로 이어받습니다.
+    반환값: (경로, 정보 dict) / 실패 시 DownloadError
+    실패하면 받다 만 파일은 지웁니다. (dest_path를 직접 넘긴 경우 이어받을 수 있도록 DownloadError일 때만)
+    """
+    own_path = dest_path is None
+    if own_path:
+        dest_path = new_temp_path(prefix, suffix)
+
+    start = time.perf_counter()
+    offset = os.path.getsize(dest_path) if os.path.exists(dest_path) else 0
+    req_headers = dict(headers or {})
+    if offset:
+        req_headers["Range"] = f"bytes={offset}-"
+
+    response = None
+    try:
+        # 연결 실패/타임아웃도 아래에서 임시 파일을 지우도록 try 안에서 요청
+        response = http.get(url, stream=True, headers=req_headers)
+        if response.status_code == 416:
+            # 이미 전부 받아둔 상태
+            return dest_path, {"url": url, "bytes": offset, "seconds": 0.0, "resumed": True}
+        response.raise_for_status()
+
+        resumed = offset > 0 and response.status_code == 206
+        if not resumed:
+            offset = 0
+
+        length = response.headers.get("Content-Length")
+        if length and offset + int(length) > max_bytes:
+            raise DownloadError(f"파일이 너무 큽니다 ({(offset + int(length)) // (1024 * 1024)}MB)")
+
+        written = offset
+        with open(dest_path, "ab" if resumed else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                written += len(chunk)
+                if written > max_bytes:
+                    raise DownloadError(f"최대 크기({max_bytes // (1024 * 1024)}MB)를 넘었습니다")
+                f.write(chunk)
+    except Exception as e:
+        # 크기 초과는 이어받아도 소용없고, 직접 만든 임시 경로는 호출한 쪽이 모르므로 지움
+        if (own_path or isinstance(e, DownloadError)) and os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    finally:
+        if response is not None:
+            response.close()
+
+    info = {
+        "url": url,
+        "bytes": written,
+        "seconds": round(time.perf_counter() - start, 3),
+        "resumed": resumed
+    }
+    trace.annotate(bytes=written, resumed=resumed)
+    print(f"⏱️ 다운로드 {info['bytes'] / 1024:.0f}KB / {info['seconds']}s ({os.path.basename(dest_path)})")
+    return dest_path, info
+
+def _download_with_retry(url, prefix, suffix, max_bytes, attempts):
+    dest_path = new_temp_path(prefix, suffix)
+    last_error = None
+    for _ in range(max(1, attempts)):
+        try:
+            return download_file(url, dest_path=dest_path, max_bytes=max_bytes)
+        except DownloadError as e:
+            # 크기 초과는 재시도해도 같으므로 바로 중단
+            last_error = e
+            break
+        except Exception as e:
+            # 받다 만 부분은 남겨두고 다음 시도에서 이어받음
+            last_error = e
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    return None, {"url": url, "bytes": 0, "seconds": 0.0, "resumed": False, "error": str(last_error)}
+
+def download_many(urls, prefix="media_", suffix="", max_bytes=MAX_IMAGE_BYTES,
+                  max_workers=DOWNLOAD_WORKERS, attempts=DOWNLOAD_ATTEMPTS):
+    """
+    여러 파일을 동시에 받습니다. 실패한 파일은 이어받기로 재시도하고,
+    결과는 입력 순서대로 [(경로 또는 None, 정보 dict), ...] 로 반환합니다.
+    """
+    if not urls:
+        return []
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(trace.propagate(_download_with_retry), url, f"{prefix}{i}_", suffix, max_bytes, attempts)
+            for i, url in enumerate(urls)
+        ]
+        return [future.result() for future in futures]
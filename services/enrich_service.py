@@ -0,0 +1,132 @@
+import os
+import asyncio
+import services.ai_service as ai
+import services.map_service as map_api
+import services.resolve_service as resolver
+import services.runtime_service as runtime
+
+# 동시 실행 설정 (한 번에 조회할 장소 수 + 서비스별 동시 호출 상한)
+MAX_WORKERS = int(os.getenv("ENRICH_MAX_WORKERS", "8"))
+MAPS_CONCURRENCY = int(os.getenv("MAPS_CONCURRENCY", "6"))
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "3"))
+
+async def lookup_place_async(place, region=None, claim=None):
+    """
+    장소 하나에 대해 지도 검색 → 리뷰 조회를 순서대로 실행합니다.
+    리뷰 요약은 enrich_places에서 한 번에 처리하므로 여기서는 리뷰 원문만 담아둡니다.
+    claim(place_id)가 False면 다른 후보가 이미 같은 장소의 리뷰를 받는 중이므로 건너뜁니다.
+    """
+    query = place.get("search_query", "맛집")
+    maps_slots = runtime.semaphore("maps", MAPS_CONCURRENCY)
+    async with maps_slots:
+        map_info = await map_api.search_place_async(query, region=place.get("region") or region)
+
+    reviews = []
+    if map_info and (claim is None or claim(map_info['place_id'])):
+        async with maps_slots:
+            reviews = await map_api.get_place_reviews_async(map_info['place_id'])
+
+    return {
+        "ai_info": place,
+        "map_info": map_info,
+        "review_summary": "",
+        "reviews": reviews
+    }
+
+def lookup_place(place, region=None, claim=None):
+    return runtime.run_sync(lookup_place_async(place, region, claim))
+
+async def iter_looked_up_places_async(places, max_workers=MAX_WORKERS, region=None):
+    """
+    장소들을 동시에 조회하고, 끝나는 순서대로 (원래 인덱스, 결과)를 돌려줍니다.
+    한 장소가 실패해도 나머지는 계속 진행됩니다.
+    """
+    if not places:
+        return
+
+    # 같은 루프 안에서만 불리므로 잠금 없이 확인 후 추가해도 안전
+    claimed = set()
+
+    def claim(place_id):
+        if place_id in claimed:
+            return False
+        claimed.add(place_id)
+        return True
+
+    slots = asyncio.Semaphore(max(1, max_workers))
+
+    async def lookup(idx, place):
+        async with slots:
+            try:
+                return idx, await lookup_place_async(place, region, claim)
+            except Exception as e:
+                print(f"❌ 장소 처리 실패 ({place.get('search_query')}): {e}")
+                return idx, {
+                    "ai_info": place,
+                    "map_info": None,
+                    "review_summary": "",
+                    "reviews": [],
+                    "error": str(e)
+                }
+
+    tasks = [asyncio.ensure_future(lookup(i, place)) for i, place in enumerate(places)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def iter_looked_up_places(places, max_workers=MAX_WORKERS, region=None):
+    """iter_looked_up_places_async의 동기 버전 (항목은 호출한 스레드에서 받음)"""
+    return runtime.iterate_sync(iter_looked_up_places_async(places, max_workers, region))
+
+async def summarize_items_async(items):
+    """
+    조회가 끝난 장소들의 리뷰를 place_id 기준으로 한 번에 요약해 채워 넣습니다.
+    """
+    reviews_by_place = {}
+    for item in items:
+        reviews = item.pop("reviews", [])
+        if item["map_info"]:
+            reviews_by_place[item["map_info"]["place_id"]] = reviews
+
+    if not reviews_by_place:
+        return items
+
+    async with runtime.semaphore("gemini", GEMINI_CONCURRENCY):
+        summaries = await ai.summarize_reviews_batch_async(reviews_by_place)
+    for item in items:
+        if item["map_info"]:
+            item["review_summary"] = summaries.get(item["map_info"]["place_id"], "")
+    return items
+
+def summarize_items(items):
+    return runtime.run_sync(summarize_items_async(items))
+
+async def enrich_places_async(places, on_done=None, max_workers=MAX_WORKERS, region=None):
+    """
+    enrich_places의 비동기 버전. on_done(idx, item)은 이벤트 루프에서 호출됩니다.
+    """
+    places = resolver.dedupe_candidates(places, region)
+    results = [None] * len(places)
+    async for idx, item in iter_looked_up_places_async(places, max_workers=max_workers, region=region):
+        results[idx] = item
+        if on_done:
+            on_done(idx, item)
+    return await summarize_items_async(resolver.merge_by_place_id(results))
+
+def enrich_places(places, on_done=None, max_workers=MAX_WORKERS, region=None):
+    """
+    중복 후보를 합친 뒤 모든 장소를 동시에 조회하고 리뷰를 일괄 요약해 원래 순서대로 반환합니다.
+    검색 결과가 같은 place_id로 모이면 하나로 합쳐서 리뷰/요약/카드는 장소당 한 번만 만듭니다.
+    on_done(idx, item)은 조회가 끝날 때마다 호출한 스레드에서 실행되므로 st.write 등을 써도 안전합니다.
+    """
+    if on_done is None:
+        return runtime.run_sync(enrich_places_async(places, max_workers=max_workers, region=region))
+    # 진행 메시지처럼 (idx, item)을 호출한 스레드로 넘겨서 on_done을 부름
+    return runtime.run_with_reports(
+        lambda send: enrich_places_async(places, on_done=lambda idx, item: send((idx, item)),
+                                         max_workers=max_workers, region=region),
+        lambda done: on_done(*done)
+    )
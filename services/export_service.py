@@ -0,0 +1,165 @@
+import io
+import os
+import csv
+import services.curation_service as engine
+import services.image_service as image_gen
+
+# 결과 내보내기 (xlsx / csv / parquet)
+# 표 전체를 DataFrame으로 모으지 않고 한 줄씩 바로 파일에 씀 → 장소가 몇 만 개여도 메모리가 일정함
+
+SHEET_NAME = "맛집리스트"
+COLUMNS = ["식당이름", "평점", "특징", "리뷰요약", "주소", "구글맵링크"]
+SOURCE_COLUMN = "원본링크"
+FORMATS = ("xlsx", "csv", "parquet")
+# 엑셀에 넣을 카드 미리보기 최대 개수 (그림은 저장할 때까지 메모리에 있어서 상한을 둠)
+MAX_THUMBNAILS = int(os.getenv("EXPORT_MAX_THUMBNAILS", "500"))
+THUMB_HEIGHT = 80
+# 엑셀 수식 안 문자열 길이 제한 (이보다 긴 링크는 글자로만 넣음)
+MAX_FORMULA_TEXT = 255
+# parquet는 이 줄 수만큼 모아서 한 묶음(row group)씩 씀
+PARQUET_BATCH_ROWS = int(os.getenv("EXPORT_PARQUET_BATCH_ROWS", "5000"))
+
+def iter_rows(results, with_source=False, with_cards=False):
+    """
+    분석 결과들을 표 한 줄씩 돌려줍니다. (결과 목록 대신 제너레이터를 넘겨도 됨)
+    with_cards=True면 (행, 카드 데이터)를 돌려줍니다.
+    """
+    for result in results:
+        rows = engine.build_table_rows(result)
+        cards = [e[4] for e in engine.build_card_entries(result)] if with_cards else [None] * len(rows)
+        for row, card in zip(rows, cards):
+            if with_source:
+                row[SOURCE_COLUMN] = result.get("url", "")
+            yield (row, card) if with_cards else row
+
+def _columns(with_source):
+    return COLUMNS + [SOURCE_COLUMN] if with_source else list(COLUMNS)
+
+def _thumbnail(card):
+    # 이미 그려 둔 카드 파일만 씀 (내보내기 때문에 카드를 새로 그리지는 않음)
+    from PIL import Image
+    try:
+        with Image.open(image_gen.card_path(card)) as img:
+            img.thumbnail((THUMB_HEIGHT * 2, THUMB_HEIGHT))
+            buffer = io.BytesIO()
+            img.convert("RGB").save(buffer, format="JPEG", quality=80)
+    except FileNotFoundError:
+        return None
+    buffer.seek(0)
+    return buffer
+
+def _link_formula(url):
+    # 셀 하이퍼링크는 저장할 때까지 전부 메모리에 쌓이므로, HYPERLINK 수식으로 넣어 한 줄씩 바로 씀
+    # (수식의 계산값은 저장되지 않아 pandas.read_excel 등에서는 빈 칸으로 읽힘 - 그래서 선택 사항)
+    if len(url) > MAX_FORMULA_TEXT:
+        return url
+    quoted = url.replace('"', '""')
+    return f'=HYPERLINK("{quoted}", "{quoted}")'
+
+def write_xlsx(results, target, with_source=False, link_formulas=False, thumbnails=False):
+    """
+    openpyxl write-only 모드로 엑셀을 씁니다. target은 파일 경로 또는 BytesIO.
+    링크는 기본으로 주소 글자 그대로 넣습니다. (다른 프로그램에서 다시 읽어도 그대로 보임)
+    link_formulas=True면 지도/원본 링크를 HYPERLINK 수식으로 넣어 엑셀에서 눌러서 열 수 있게,
+    thumbnails=True면 첫 칸에 카드 미리보기를 넣습니다.
+    반환값: 쓴 행 수
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.drawing.image import Image as XLImage
+
+    columns = _columns(with_source)
+    link_columns = {"구글맵링크", SOURCE_COLUMN} if link_formulas else set()
+    offset = 1 if thumbnails else 0
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.freeze_panes = "A2"
+    if thumbnails:
+        ws.column_dimensions["A"].width = THUMB_HEIGHT * 2 / 7
+    header = []
+    for name in (["카드"] if thumbnails else []) + columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    # 링크 글꼴은 하나를 만들어 모든 링크 셀이 같이 씀
+    link_font = Font(color="0563C1", underline="single")
+    count, thumbs = 0, 0
+    if thumbnails:
+        lines = iter_rows(results, with_source=with_source, with_cards=True)
+    else:
+        lines = ((row, None) for row in iter_rows(results, with_source=with_source))
+    for row, card in lines:
+        count += 1
+        line = [None] * offset
+        for name in columns:
+            value = row.get(name)
+            if name in link_columns and value:
+                cell = WriteOnlyCell(ws, value=_link_formula(value))
+                cell.font = link_font
+                value = cell
+            line.append(value)
+        if thumbnails and thumbs < MAX_THUMBNAILS:
+            image = _thumbnail(card)
+            if image is not None:
+                thumbs += 1
+                ws.row_dimensions[count + 1].height = THUMB_HEIGHT * 0.75
+                ws.add_image(XLImage(image), f"A{count + 1}")
+        ws.append(line)
+    wb.save(target)
+    return count
+
+def write_csv(results, target, with_source=False):
+    """
+    CSV로 씁니다. (엑셀에서 한글이 깨지지 않도록 BOM 포함) target은 파일 경로 또는 텍스트 파일 객체.
+    반환값: 쓴 행 수
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", encoding="utf-8-sig", newline="") as f:
+            return write_csv(results, f, with_source)
+    writer = csv.DictWriter(target, fieldnames=_columns(with_source))
+    writer.writeheader()
+    count = 0
+    for row in iter_rows(results, with_source=with_source):
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_parquet(results, target, with_source=False):
+    """
+    Parquet로 씁니다. (pyarrow 필요, PARQUET_BATCH_ROWS줄씩 나눠서 씀)
+    반환값: 쓴 행 수
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet로 저장하려면 pyarrow가 필요합니다. (pip install pyarrow)") from e
+
+    columns = _columns(with_source)
+    schema = pa.schema([(name, pa.float64() if name == "평점" else pa.string()) for name in columns])
+    count = 0
+    with pq.ParquetWriter(target, schema) as writer:
+        batch = []
+        for row in iter_rows(results, with_source=with_source):
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+def export_file(results, path, fmt=None, **options):
+    """경로의 확장자(또는 fmt)에 맞는 형식으로 저장하고 쓴 행 수를 반환합니다."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt} (가능: {', '.join(FORMATS)})")
+    return WRITERS[fmt](results, path, **options)
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from services.cache_service import CACHE_DIR
+from services.url_service import canonicalize_url
+
+# 분석 결과 저장소 (캐시와 달리 만료/삭제 없이 계속 쌓임)
+# 새로고침, 새 세션, 다른 사람이 같은 링크를 넣어도 외부 호출 없이 바로 다시 보여줌
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(CACHE_DIR, "curator_history.sqlite"))
+PAGE_SIZE = 50
+# trigram 검색은 3글자 이상부터 가능 (그보다 짧으면 LIKE로 찾음)
+FTS_MIN_CHARS = 3
+
+_db_lock = threading.Lock()
+_db_conn = None
+_has_fts = False
+
+def _get_conn():
+    global _db_conn, _has_fts
+    if _db_conn is None:
+        os.makedirs(os.path.dirname(HISTORY_DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                canonical_url TEXT NOT NULL,
+                summary TEXT,
+                region TEXT,
+                place_count INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_url ON analyses (canonical_url, created_at);
+            CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+
+            -- latest=1: 같은 place_id 중 가장 최근에 분석된 행 (장소 검색은 이것만 봄)
+            CREATE TABLE IF NOT EXISTS places (
+                id INTEGER PRIMARY KEY,
+                analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+                position INTEGER NOT NULL,
+                place_id TEXT,
+                name TEXT NOT NULL,
+                address TEXT,
+                rating REAL,
+                region TEXT,
+                description TEXT,
+                review_summary TEXT,
+                seen_count INTEGER NOT NULL DEFAULT 1,
+                latest INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_places_place_id ON places (place_id);
+            CREATE INDEX IF NOT EXISTS idx_places_created ON places (created_at);
+            CREATE INDEX IF NOT EXISTS idx_places_analysis ON places (analysis_id);
+            CREATE INDEX IF NOT EXISTS idx_places_latest ON places (id) WHERE latest = 1;
+        """)
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5 (
+                    name, address, region, description,
+                    content='places', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS places_fts_insert AFTER INSERT ON places BEGIN
+                    INSERT INTO places_fts (rowid, name, address, region, description)
+                    VALUES (new.id, new.name, new.address, new.region, new.description);
+                END;
+            """)
+            _has_fts = True
+        except sqlite3.OperationalError as e:
+            # 오래된 SQLite(3.34 미만)는 trigram이 없어서 LIKE 검색만 사용
+            print(f"⚠️ 장소 전문 검색을 쓸 수 없어 LIKE 검색을 사용합니다: {e}")
+        conn.commit()
+        _db_conn = conn
+    return _db_conn
+
+def _place_rows(result):
+    """결과의 places_data를 장소 검색용 행으로 바꿉니다."""
+    rows = []
+    for position, item in enumerate(result.get("places_data") or []):
+        p_ai, p_map = item.get("ai_info") or {}, item.get("map_info")
+        rows.append({
+            "position": position,
+            "place_id": p_map["place_id"] if p_map else None,
+            "name": (p_map or {}).get("name") or p_ai.get("display_name") or p_ai.get("search_query") or "",
+            "address": p_map.get("address") if p_map else "",
+            "rating": p_map.get("rating") if p_map else None,
+            "region": p_ai.get("region") or result.get("region") or "",
+            "description": p_ai.get("description", ""),
+            "review_summary": item.get("review_summary", ""),
+        })
+    return rows
+
+def _insert(conn, result, now):
+    url = result.get("url") or ""
+    places = _place_rows(result)
+    cur = conn.execute(
+        "INSERT INTO analyses (url, canonical_url, summary, region, place_count, result, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (url, canonicalize_url(url), result.get("summary"), result.get("region"), len(places),
+         json.dumps(result, ensure_ascii=False), now)
+    )
+    analysis_id = cur.lastrowid
+    for row in places:
+        seen = 1
+        if row["place_id"]:
+            # 같은 장소의 예전 행은 검색 목록에서 내리고, 몇 번 나왔는지만 이어받음
+            previous = conn.execute(
+                "SELECT MAX(seen_count) FROM places WHERE place_id=? AND latest=1", (row["place_id"],)
+            ).fetchone()[0]
+            if previous:
+                seen = previous + 1
+                conn.execute("UPDATE places SET latest=0 WHERE place_id=? AND latest=1", (row["place_id"],))
+        conn.execute(
+            "INSERT INTO places (analysis_id, position, place_id, name, address, rating, region, description, "
+            "review_summary, seen_count, created_at) VALUES (:analysis_id, :position, :place_id, :name, :address, "
+            ":rating, :region, :description, :review_summary, :seen_count, :created_at)",
+            dict(row, analysis_id=analysis_id, seen_count=seen, created_at=now)
+        )
+    return analysis_id
+
+def _worth_saving(result):
+    # 장소를 못 찾은 결과(Gemini 에러, 크롤링 실패 등 일시적인 실패 포함)는 남기지 않음
+    # (남기면 같은 링크를 다시 넣을 때마다 그 실패를 다시 보여줌 - ai.remember_url과 같은 기준)
+    return bool(result.get("places_data"))
+
+def save_result(result):
+    """
+    분석 결과 하나를 저장하고 id를 반환합니다. (요약, places_data 포함 전체)
+    카드는 저장하지 않음 - 다시 열 때 내용 해시로 찾은 카드 파일(image_gen.card_path)을 읽고, 정리돼서 없으면 새로 그림
+    장소가 하나도 없는 결과는 저장하지 않고 None을 반환합니다.
+    """
+    if not _worth_saving(result):
+        return None
+    with _db_lock:
+        conn = _get_conn()
+        with conn:
+            return _insert(conn, result, time.time())
+
+def save_results(results):
+    """여러 결과를 한 트랜잭션으로 저장합니다. (배치 실행, 가져오기용) 장소가 없는 결과의 id는 None"""
+    now = time.time()
+    with _db_lock:
+        conn = _get_conn()
+        with conn:
+            return [_insert(conn, result, now) if _worth_saving(result) else None for result in results]
+
+def _load(row):
+    if row is None:
+        return None
+    result = json.loads(row["result"])
+    return dict(result, history_id=row["id"], saved_at=row["created_at"])
+
+def get_analysis(analysis_id):
+    """저장된 분석 결과를 그대로 돌려줍니다. (없으면 None)"""
+    with _db_lock:
+        row = _get_conn().execute("SELECT * FROM analyses WHERE id=?", (analysis_id,)).fetchone()
+    return _load(row)
+
+def latest_for_url(url):
+    """같은 링크(정규화 기준)의 장소가 있는 가장 최근 분석 결과 (없으면 None)"""
+    with _db_lock:
+        # 예전에 저장된 빈 결과는 다시 보여주지 않고 새로 분석하게 함
+        row = _get_conn().execute(
+            "SELECT * FROM analyses WHERE canonical_url=? AND place_count > 0 ORDER BY created_at DESC LIMIT 1",
+            (canonicalize_url(url),)
+        ).fetchone()
+    return _load(row)
+
+def list_analyses(limit=PAGE_SIZE, before=None):
+    """
+    최근 분석 목록 (요약 정보만). before에 이전 페이지의 next_cursor를 넘기면 다음 페이지.
+    반환값: (목록, next_cursor 또는 None)
+    """
+    sql = "SELECT id, url, summary, region, place_count, created_at FROM analyses"
+    params = []
+    if before is not None:
+        sql += " WHERE id < ?"
+        params.append(before)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+    with _db_lock:
+        rows = [dict(r) for r in _get_conn().execute(sql, params).fetchall()]
+    return _page(rows, limit)
+
+def _page(rows, limit):
+    # 한 줄 더 읽어서 다음 페이지가 있는지 확인 (OFFSET 없이 id 기준으로 이어감)
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1]["id"]
+    return rows, None
+
+def _fts_query(text):
+    # 사용자가 입력한 따옴표/연산자가 FTS 문법으로 해석되지 않도록 구문 하나로 감쌈
+    return '"' + text.replace('"', '""') + '"'
+
+def search_places(query="", region=None, min_rating=None, limit=PAGE_SIZE, before=None, include_history=False):
+    """
+    지금까지 분석한 모든 장소를 검색합니다. (이름/주소/지역/특징)
+    같은 장소가 여러 번 나왔으면 가장 최근 것 하나만 보여주고, include_history=True면 모두 보여줍니다.
+    반환값: (장소 목록, next_cursor 또는 None) - 다음 페이지는 before=next_cursor
+    """
+    query = (query or "").strip()
+    where, params = [], []
+    if not include_history:
+        where.append("p.latest = 1")
+    if before is not None:
+        where.append("p.id < ?")
+        params.append(before)
+    if region:
+        where.append("p.region LIKE ?")
+        params.append(f"%{region}%")
+    if min_rating is not None:
+        where.append("p.rating >= ?")
+        params.append(min_rating)
+
+    with _db_lock:
+        conn = _get_conn()
+        if query and _has_fts and len(query) >= FTS_MIN_CHARS:
+            where.append("p.id IN (SELECT rowid FROM places_fts WHERE places_fts MATCH ?)")
+            params.append(_fts_query(query))
+        elif query:
+            where.append("(p.name LIKE ? OR p.address LIKE ? OR p.region LIKE ? OR p.description LIKE ?)")
+            params.extend([f"%{query}%"] * 4)
+
+        sql = (
+            "SELECT p.id, p.analysis_id, p.place_id, p.name, p.address, p.rating, p.region, p.description, "
+            "p.review_summary, p.seen_count, p.created_at, a.url FROM places p JOIN analyses a ON a.id = p.analysis_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.id DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+    return _page(rows, limit)
+
+def get_stats():
+    with _db_lock:
+        conn = _get_conn()
+        analyses = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        places = conn.execute("SELECT COUNT(*) FROM places WHERE latest = 1").fetchone()[0]
+    return {"analyses": analyses, "places": places, "full_text_search": _has_fts}
@@ -0,0 +1,132 @@
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+import services.client_registry as clients
+import services.trace_service as trace
+
+# 기본 타임아웃 (연결, 읽기) 초
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# 재시도 설정 (지수 백오프 + 지터, Retry-After 우선)
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "20"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# 호스트별 keep-alive 커넥션 풀 크기
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def get_session(host):
+    """
+    호스트마다 하나의 Session을 만들어 TCP/TLS 연결을 재사용합니다. (client_registry에 보관)
+    """
+    return clients.http_session(host, POOL_SIZE)
+
+def _record(host, elapsed, status=None, error=False, retried=False):
+    with _metrics_lock:
+        m = _metrics.setdefault(host, {
+            "requests": 0, "errors": 0, "retries": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "statuses": {}
+        })
+        if retried:
+            m["retries"] += 1
+            return
+        ms = elapsed * 1000
+        m["requests"] += 1
+        m["total_ms"] += ms
+        m["max_ms"] = max(m["max_ms"], ms)
+        if error:
+            m["errors"] += 1
+        if status is not None:
+            m["statuses"][status] = m["statuses"].get(status, 0) + 1
+
+def get_metrics():
+    """
+    호스트별 요청 수/에러 수/재시도 수/평균·최대 지연(ms)을 반환합니다.
+    """
+    with _metrics_lock:
+        result = {}
+        for host, m in _metrics.items():
+            result[host] = dict(m, statuses=dict(m["statuses"]))
+            result[host]["avg_ms"] = round(m["total_ms"] / m["requests"], 1) if m["requests"] else 0.0
+        return result
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def _backoff_seconds(attempt):
+    # full jitter: 0 ~ min(max, base * 2^attempt)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def request(method, url, retries=MAX_RETRIES, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    공용 HTTP 요청 함수. 커넥션 풀 재사용, 기본 타임아웃, 429/5xx 재시도를 처리합니다.
+    POST처럼 멱등하지 않은 요청은 429와 연결 실패에서만 재시도합니다.
+    """
+    method = method.upper()
+    host = urlsplit(url).netloc
+    with trace.span("http.request", "http", host=host, method=method) as sp:
+        response = _request_with_retry(method, url, host, retries, timeout, **kwargs)
+        sp.set(http_status=response.status_code, bytes=response.headers.get("Content-Length"))
+        return response
+
+def _request_with_retry(method, url, host, retries, timeout, **kwargs):
+    session = get_session(host)
+    idempotent = method in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            safe_to_retry = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+            if attempt < retries and safe_to_retry:
+                _record(host, 0, retried=True)
+                time.sleep(_backoff_seconds(attempt))
+                attempt += 1
+                continue
+            _record(host, time.perf_counter() - start, error=True)
+            raise
+
+        elapsed = time.perf_counter() - start
+        status = response.status_code
+        retryable = status in RETRY_STATUSES and (idempotent or status == 429)
+        if retryable and attempt < retries:
+            delay = _retry_after_seconds(response)
+            if delay is None:
+                delay = _backoff_seconds(attempt)
+            response.close()
+            _record(host, elapsed, retried=True)
+            time.sleep(min(delay, BACKOFF_MAX))
+            attempt += 1
+            continue
+
+        _record(host, elapsed, status=status, error=status >= 400)
+        return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
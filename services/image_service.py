@@ -1,125 +1,477 @@
 import os
+import json
+import time
+import hashlib
 import textwrap
-import requests
+import shutil
+import zipfile
+import threading
+import multiprocessing
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import qrcode
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import services.http_client as http
+import services.download_service as downloader
+from services.cache_service import CACHE_DIR
+import services.trace_service as trace
 
-def create_restaurant_card(data):
-    """
-    맛집 정보를 받아 카드 이미지를 생성하고 경로를 반환
-    """
-    # 1. 캔버스 설정
-    card_width, card_height = 800, 1100 
-    img = Image.new('RGB', (card_width, card_height), color='white')
-    draw = ImageDraw.Draw(img)
-
-    # 2. 폰트 설정 (나눔고딕만 사용)
-    font_path_bold = "/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf"
-    font_path_reg = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
-    
-    if not os.path.exists(font_path_bold): font_path_bold = "arial.ttf"
-    if not os.path.exists(font_path_reg): font_path_reg = "arial.ttf"
+# 폰트 경로 (나눔고딕 우선, 없으면 저장소에 포함된 폰트 사용)
+FONT_PATH_BOLD = "/usr/share/fonts/truetype/nanum/NanumGothicBold.ttf"
+FONT_PATH_REG = "/usr/share/fonts/truetype/nanum/NanumGothic.ttf"
+BUNDLED_FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts", "Hakgyoansim_OcarinaR.ttf")
+
+CARD_WIDTH, CARD_HEIGHT = 800, 1100
+HEADER_HEIGHT = 400
+QR_SIZE = 180
+CARD_CACHE_SIZE = int(os.getenv("CARD_CACHE_SIZE", "256"))
+
+# 출력 형식: png / webp (webp가 훨씬 가벼움)
+CARD_FORMAT = os.getenv("CARD_FORMAT", "png").lower()
+CARD_PNG_OPTIMIZE = os.getenv("CARD_PNG_OPTIMIZE", "0") == "1"
+CARD_WEBP_QUALITY = int(os.getenv("CARD_WEBP_QUALITY", "90"))
+CARD_DIR = os.path.join(CACHE_DIR, "cards")
+# 카드/ZIP 파일 보관 기한(초)과 폴더 최대 크기(MB) - prune_card_dir에서 정리
+CARD_MAX_AGE = int(os.getenv("CARD_MAX_AGE", str(7 * 24 * 3600)))
+CARD_DIR_MAX_MB = int(os.getenv("CARD_DIR_MAX_MB", "500"))
+MIME_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+# 일괄 렌더링: 그리기는 프로세스 풀, 사진 다운로드는 스레드
+RENDER_WORKERS = int(os.getenv("CARD_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PHOTO_FETCH_WORKERS = int(os.getenv("CARD_PHOTO_WORKERS", "8"))
+# 배치 경로에서 사진 받기에 실패했을 때 워커에 넘기는 "사진 없음" 표시
+NO_PHOTO = b""
 
+def _resolve_font_path(preferred):
+    for path in (preferred, BUNDLED_FONT_PATH):
+        if os.path.exists(path):
+            return path
+    return "arial.ttf"
+
+# PIL/qrcode는 카드를 처음 그릴 때 불러옴 (카드를 안 그리는 재실행/CLI 시작을 가볍게)
+def _load_fonts():
+    from PIL import ImageFont
     try:
-        title_font = ImageFont.truetype(font_path_bold, 42) 
-        header_font = ImageFont.truetype(font_path_bold, 26) 
-        text_font = ImageFont.truetype(font_path_reg, 24)   
+        bold = _resolve_font_path(FONT_PATH_BOLD)
+        regular = _resolve_font_path(FONT_PATH_REG)
+        return {
+            "title": ImageFont.truetype(bold, 42),
+            "header": ImageFont.truetype(bold, 26),
+            "text": ImageFont.truetype(regular, 24)
+        }
     except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
-
-    # 3. 상단 이미지 처리
-    current_y = 50 
-    photo_url = data.get('사진URL')
-    
-    if photo_url:
+        default = ImageFont.load_default()
+        return {"title": default, "header": default, "text": default}
+
+def card_fingerprint(data):
+    """카드 데이터가 같으면 같은 값이 나오는 해시"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@lru_cache(maxsize=512)
+def _qr_image(map_link):
+    import qrcode
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=10,
+        border=4
+    )
+    qr.add_data(map_link)
+    qr.make(fit=True)
+
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    return qr_img.resize((QR_SIZE, QR_SIZE)).convert("RGB")
+
+class CardRenderer:
+    """
+    맛집 카드 렌더러. 폰트/배경 템플릿/고정 문구는 한 번만 만들고,
+    완성된 카드는 card_data 해시로 캐시해서 Streamlit 재실행 시 다시 그리지 않습니다.
+    """
+
+    def __init__(self, width=CARD_WIDTH, height=CARD_HEIGHT, cache_size=CARD_CACHE_SIZE):
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        from PIL import Image
+        self.fonts = _load_fonts()
+        self._template = Image.new('RGB', (width, height), color='white')
+        self._labels = {
+            "features": self._render_label("▶ 특징:", "#2980b9"),
+            "reviews": self._render_label("▶ 후기 요약:", "#27ae60")
+        }
+        self._cards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render_label(self, text, color):
+        # 고정 문구는 미리 그려두고 붙여넣기만 함
+        from PIL import Image, ImageDraw
+        font = self.fonts["header"]
+        left, top, right, bottom = font.getbbox(text)
+        label = Image.new('RGBA', (right, bottom), (255, 255, 255, 0))
+        ImageDraw.Draw(label).text((0, 0), text, font=font, fill=color)
+        return label
+
+    def _paste_label(self, img, key, y):
+        label = self._labels[key]
+        img.paste(label, (50, y), label)
+
+    def _fit_photo(self, photo_bytes):
+        from PIL import Image, ImageOps
+        food_img = Image.open(BytesIO(photo_bytes)).convert("RGB")
+        return ImageOps.fit(food_img, (self.width, HEADER_HEIGHT), method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+
+    @trace.traced("card.render", "card")
+    def render(self, data, photo_bytes=None):
+        """
+        카드 이미지를 새로 그려서 (PIL Image, 완성 여부)로 반환합니다. (캐시 사용 안 함)
+        photo_bytes를 주면 사진을 다시 받지 않고 그대로 사용합니다. (b""이면 사진 없이 그림)
+        사진URL이 있는데 사진을 넣지 못했으면 완성 여부가 False - 이런 카드는 캐시/파일로 남기지 않음
+        """
+        from PIL import ImageDraw
+        card_width, card_height = self.width, self.height
+        img = self._template.copy()
+        draw = ImageDraw.Draw(img)
+        title_font, text_font = self.fonts["title"], self.fonts["text"]
+
+        # 1. 상단 이미지 처리
+        current_y = 50
+        photo_url = data.get('사진URL')
+        complete = not photo_url
+
+        if photo_url and photo_bytes != NO_PHOTO:
+            try:
+                if photo_bytes is None:
+                    photo_bytes = fetch_photo(photo_url)
+                img.paste(self._fit_photo(photo_bytes), (0, 0))
+                current_y = HEADER_HEIGHT + 40
+                complete = True
+            except Exception as e:
+                print(f"❌ 이미지 실패: {e}")
+
+        # 2. 텍스트 그리기
+
+        # 식당 이름 (이미 main.py에서 태국어가 제거된 상태로 넘어옴)
+        name = data.get('식당이름', '알 수 없는 식당')
+        wrapped_title = textwrap.wrap(name, width=20)
+        for line in wrapped_title:
+            draw.text((50, current_y), line, font=title_font, fill="#2c3e50")
+            current_y += 50
+
+        current_y += 15
+
+        # 평점
+        rating = data.get('평점', 0.0)
+        draw.text((50, current_y), f"★ 구글 평점: {rating}점", font=text_font, fill="#d35400")
+        current_y += 45
+
+        # 특징
+        self._paste_label(img, "features", current_y)
+        current_y += 35
+
+        desc = data.get('특징', '특징 정보 없음')
+        desc_lines = textwrap.wrap(desc, width=36)
+        for line in desc_lines:
+            draw.text((50, current_y), line, font=text_font, fill="#34495e")
+            current_y += 32
+
+        current_y += 25
+
+        # 후기 요약
+        self._paste_label(img, "reviews", current_y)
+        current_y += 35
+
+        review = data.get('리뷰요약', '리뷰 정보 없음')
+
+        # QR 침범 방지 (좁게 설정)
+        review_lines = textwrap.wrap(review, width=24)
+
+        for line in review_lines:
+            if current_y > card_height - 60:
+                break
+            draw.text((50, current_y), line, font=text_font, fill="#34495e")
+            current_y += 32
+
+        # 3. QR 코드 (같은 링크는 한 번만 생성)
         try:
-            response = requests.get(photo_url, timeout=10)
-            response.raise_for_status()
-            
-            food_img = Image.open(BytesIO(response.content)).convert("RGB")
-            header_height = 400
-            
-            food_img = ImageOps.fit(food_img, (card_width, header_height), method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
-            img.paste(food_img, (0, 0))
-            current_y = header_height + 40 
-            
+            map_link = data.get('지도링크')
+            # 혹시 모를 None 방지
+            if not map_link or not map_link.startswith("http"):
+                map_link = "https://www.google.com/maps"
+
+            # 우측 하단 배치
+            img.paste(_qr_image(map_link), (card_width - 220, card_height - 220))
+
         except Exception as e:
-            print(f"❌ 이미지 실패: {e}")
-
-    # 4. 텍스트 그리기
-    
-    # 식당 이름 (이미 main.py에서 태국어가 제거된 상태로 넘어옴)
-    name = data.get('식당이름', '알 수 없는 식당')
-    wrapped_title = textwrap.wrap(name, width=20)
-    for line in wrapped_title:
-        draw.text((50, current_y), line, font=title_font, fill="#2c3e50") 
-        current_y += 50 
-    
-    current_y += 15
-
-    # 평점
-    rating = data.get('평점', 0.0)
-    draw.text((50, current_y), f"★ 구글 평점: {rating}점", font=text_font, fill="#d35400")
-    current_y += 45
-
-    # 특징
-    draw.text((50, current_y), "▶ 특징:", font=header_font, fill="#2980b9")
-    current_y += 35
-    
-    desc = data.get('특징', '특징 정보 없음')
-    desc_lines = textwrap.wrap(desc, width=36)
-    for line in desc_lines:
-        draw.text((50, current_y), line, font=text_font, fill="#34495e")
-        current_y += 32 
-
-    current_y += 25
-
-    # 후기 요약
-    draw.text((50, current_y), "▶ 후기 요약:", font=header_font, fill="#27ae60")
-    current_y += 35
-    
-    review = data.get('리뷰요약', '리뷰 정보 없음')
-    
-    # QR 침범 방지 (좁게 설정)
-    review_lines = textwrap.wrap(review, width=24)
-    
-    for line in review_lines:
-        if current_y > card_height - 60: 
+            print(f"❌ QR 실패: {e}")
+
+        # 4. 테두리
+        draw.rectangle([(0,0), (card_width-1, card_height-1)], outline="#bdc3c7", width=5)
+        return img, complete
+
+    def encode(self, img, fmt=CARD_FORMAT):
+        buffer = BytesIO()
+        if fmt == "webp":
+            img.save(buffer, format="WEBP", quality=CARD_WEBP_QUALITY, method=4)
+        else:
+            img.save(buffer, format="PNG", optimize=CARD_PNG_OPTIMIZE)
+        return buffer.getvalue()
+
+    def cached(self, data, fmt=CARD_FORMAT):
+        key = f"{fmt}:{card_fingerprint(data)}"
+        with self._lock:
+            if key in self._cards:
+                self._cards.move_to_end(key)
+                return self._cards[key]
+        return None
+
+    def remember(self, data, fmt, encoded):
+        key = f"{fmt}:{card_fingerprint(data)}"
+        with self._lock:
+            self._cards[key] = encoded
+            while len(self._cards) > self.cache_size:
+                self._cards.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cards.clear()
+
+    def render_bytes(self, data, fmt=CARD_FORMAT):
+        """
+        카드 이미지 바이트를 반환합니다. 같은 card_data면 캐시에서 바로 꺼냅니다.
+        파일을 거치지 않으므로 여러 카드/세션을 동시에 그려도 충돌하지 않습니다.
+        """
+        return self._render_encoded(data, fmt)[0]
+
+    def _render_encoded(self, data, fmt):
+        # (바이트, 완성 여부) - 사진을 못 받은 카드는 캐시하지 않아서 다음에 다시 받아봄
+        encoded = self.cached(data, fmt)
+        if encoded is not None:
+            return encoded, True
+        img, complete = self.render(data)
+        encoded = self.encode(img, fmt)
+        if complete:
+            self.remember(data, fmt, encoded)
+        return encoded, complete
+
+@trace.traced("card.photo", "card")
+def fetch_photo(photo_url):
+    response = http.get(photo_url, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+_renderer = None
+_renderer_lock = threading.Lock()
+_process_pool = None
+
+def get_renderer():
+    """프로세스 전체에서 하나의 렌더러를 공유합니다."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = CardRenderer()
+        return _renderer
+
+def render_card_bytes(data, fmt=CARD_FORMAT):
+    """
+    맛집 정보를 받아 카드 이미지 바이트를 반환 (st.image / 다운로드에 바로 사용)
+    """
+    return get_renderer().render_bytes(data, fmt)
+
+def card_path(data, fmt=CARD_FORMAT):
+    """카드 파일 경로 (내용 해시로 파일명을 정하므로 카드끼리/세션끼리 덮어쓰지 않음)"""
+    return os.path.join(CARD_DIR, f"card_{card_fingerprint(data)[:16]}.{fmt}")
+
+def _write_card_file(filename, encoded):
+    os.makedirs(CARD_DIR, exist_ok=True)
+    # 다른 스레드가 같은 파일을 쓰는 중이어도 깨지지 않도록 임시 파일 후 교체
+    tmp_name = f"{filename}.{threading.get_ident()}.tmp"
+    with open(tmp_name, "wb") as f:
+        f.write(encoded)
+    os.replace(tmp_name, filename)
+
+def is_card_saved(data, fmt=CARD_FORMAT):
+    """완성된 카드(사진까지 들어간 카드)로 캐시나 파일에 남아 있는지"""
+    return get_renderer().cached(data, fmt) is not None or os.path.exists(card_path(data, fmt))
+
+def _read_card_file(data, fmt):
+    try:
+        with open(card_path(data, fmt), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def prune_card_dir(max_age=CARD_MAX_AGE, max_bytes=CARD_DIR_MAX_MB * 1024 * 1024):
+    """
+    오래된 카드/ZIP 파일을 지우고, 그래도 폴더가 max_bytes보다 크면 오래 안 쓴 파일부터 지웁니다.
+    (지운 카드는 다음에 필요할 때 다시 그림) 반환값: 지운 파일 수
+    """
+    if not os.path.isdir(CARD_DIR):
+        return 0
+    now = time.time()
+    removed = 0
+    files = []
+    for name in os.listdir(CARD_DIR):
+        path = os.path.join(CARD_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        # 다시 읽기만 한 카드도 최근에 쓴 것으로 봄 (atime이 꺼져 있으면 만든 시각 기준)
+        used_at = max(st.st_atime, st.st_mtime)
+        if now - used_at > max_age:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        elif not name.endswith(".tmp"):
+            # 쓰는 중인 임시 파일은 크기 정리에서 건드리지 않음
+            files.append((used_at, st.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
             break
-        draw.text((50, current_y), line, font=text_font, fill="#34495e")
-        current_y += 32
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except OSError:
+            pass
+    return removed
+
+def create_restaurant_card(data, fmt=CARD_FORMAT):
+    """
+    맛집 정보를 받아 카드 이미지를 생성하고 경로를 반환
+    """
+    filename = card_path(data, fmt)
+    if not os.path.exists(filename):
+        encoded, complete = get_renderer()._render_encoded(data, fmt)
+        if not complete:
+            # 사진이 빠진 카드는 내용 해시 경로에 두지 않음 (임시 폴더는 downloader.cleanup_temp_dir가 정리)
+            filename = downloader.new_temp_path(prefix="card_", suffix=f".{fmt}")
+            with open(filename, "wb") as f:
+                f.write(encoded)
+            return filename
+        _write_card_file(filename, encoded)
+    return filename
+
+# [일괄 렌더링]
+def _render_in_worker(data, photo_bytes, fmt):
+    # 프로세스 풀 안에서 실행 (프로세스마다 렌더러/폰트는 한 번만 로드됨) - (바이트, 완성 여부) 반환
+    renderer = get_renderer()
+    img, complete = renderer.render(data, photo_bytes=photo_bytes)
+    return renderer.encode(img, fmt), complete
 
-    # 5. QR 코드 생성
+def _get_process_pool():
+    global _process_pool
+    with _renderer_lock:
+        if _process_pool is None:
+            # Streamlit 스레드에서 fork하면 위험하므로 spawn 사용
+            _process_pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+def _fetch_photo_safe(photo_url):
+    # 실패하면 NO_PHOTO를 넘겨서 워커 프로세스가 같은 사진을 다시 받지 않게 함
+    if not photo_url:
+        return NO_PHOTO
     try:
-        map_link = data.get('지도링크')
-        # 혹시 모를 None 방지
-        if not map_link or not map_link.startswith("http"):
-            map_link = "https://www.google.com/maps"
-        
-        qr = qrcode.QRCode(
-            version=None,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,
-            box_size=10, 
-            border=4 
-        )
-        qr.add_data(map_link)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        qr_img = qr_img.resize((180, 180))
-        
-        # 우측 하단 배치
-        img.paste(qr_img, (card_width - 220, card_height - 220))
-        
+        return fetch_photo(photo_url)
     except Exception as e:
-        print(f"❌ QR 실패: {e}")
-    
-    # 6. 테두리
-    draw.rectangle([(0,0), (card_width-1, card_height-1)], outline="#bdc3c7", width=5)
+        print(f"❌ 이미지 실패: {e}")
+        return NO_PHOTO
 
-    filename = "restaurant_card.png"
-    img.save(filename)
-    return filename
+def render_cards_batch(cards, fmt=CARD_FORMAT, on_card=None):
+    """
+    여러 카드를 한 번에 그립니다. 캐시에 없는 카드만 사진을 스레드로 받고,
+    사진이 도착하는 대로 프로세스 풀에 넘겨 그리기를 겹쳐서 진행합니다.
+    on_card(idx, bytes)는 카드가 완성될 때마다 호출한 스레드에서 실행됩니다.
+    그린 카드는 파일(card_path)로도 남겨서, 예전 분석을 다시 열 때 사진을 받지 않고 바로 보여줍니다.
+    반환값: 입력 순서대로 카드 바이트 리스트 (실패한 카드는 None)
+    """
+    renderer = get_renderer()
+    results = [None] * len(cards)
+    pending = []
+    for idx, data in enumerate(cards):
+        encoded = renderer.cached(data, fmt)
+        if encoded is None:
+            encoded = _read_card_file(data, fmt)
+            if encoded is not None:
+                renderer.remember(data, fmt, encoded)
+        if encoded is not None:
+            results[idx] = encoded
+            if on_card: on_card(idx, encoded)
+        else:
+            pending.append(idx)
+
+    if not pending:
+        return results
+
+    # 몇 장 안 되면 프로세스를 띄우는 비용이 더 큼
+    if len(pending) <= 2 or RENDER_WORKERS <= 1:
+        for idx in pending:
+            try:
+                results[idx], complete = renderer._render_encoded(cards[idx], fmt)
+                if complete:
+                    _write_card_file(card_path(cards[idx], fmt), results[idx])
+                if on_card: on_card(idx, results[idx])
+            except Exception as e:
+                print(f"❌ 카드 생성 실패: {e}")
+        return results
+
+    pool = _get_process_pool()
+    render_futures = {}
+    with ThreadPoolExecutor(max_workers=min(PHOTO_FETCH_WORKERS, len(pending))) as fetcher:
+        photo_futures = {fetcher.submit(trace.propagate(_fetch_photo_safe), cards[idx].get('사진URL')): idx for idx in pending}
+        for future in as_completed(photo_futures):
+            idx = photo_futures[future]
+            render_futures[pool.submit(_render_in_worker, cards[idx], future.result(), fmt)] = idx
+
+    for future in as_completed(render_futures):
+        idx = render_futures[future]
+        try:
+            results[idx], complete = future.result()
+            # 사진을 못 받은 카드(NO_PHOTO)는 이번에만 보여주고 남기지 않음
+            if complete:
+                renderer.remember(cards[idx], fmt, results[idx])
+                _write_card_file(card_path(cards[idx], fmt), results[idx])
+            if on_card: on_card(idx, results[idx])
+        except Exception as e:
+            print(f"❌ 카드 생성 실패: {e}")
+    return results
+
+def create_cards_zip(cards, names=None, fmt=CARD_FORMAT):
+    """
+    모든 카드를 그리면서 완성되는 대로 ZIP 파일에 바로 써 넣습니다. (메모리에 두 번 쌓지 않음)
+    같은 카드 묶음이면 이미 만들어 둔 ZIP을 재사용합니다.
+    반환값: (카드 바이트 리스트, ZIP 경로)
+    """
+    names = names or [f"card_{i + 1}" for i in range(len(cards))]
+    os.makedirs(CARD_DIR, exist_ok=True)
+    bundle_key = hashlib.sha256("|".join(card_fingerprint(c) for c in cards).encode("utf-8")).hexdigest()
+    zip_path = os.path.join(CARD_DIR, f"cards_{bundle_key[:16]}_{fmt}.zip")
+
+    if os.path.exists(zip_path):
+        return render_cards_batch(cards, fmt), zip_path
+
+    tmp_path = f"{zip_path}.{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        def write_card(idx, encoded):
+            # PNG/WebP는 이미 압축돼 있으므로 그대로 저장
+            safe_name = "".join(ch for ch in names[idx] if ch.isalnum() or ch in " _-").strip() or f"card_{idx + 1}"
+            zf.writestr(f"{idx + 1:02d}_{safe_name}.{fmt}", encoded)
+
+        results = render_cards_batch(cards, fmt, on_card=write_card)
+
+    # 실패한 카드(사진이 빠진 카드 포함)가 있으면 다음에 다시 만들 수 있도록 재사용 경로에 두지 않음
+    # (임시 폴더로 옮겨 두면 downloader.cleanup_temp_dir가 나중에 지움 - 다시 시도할 때마다 쌓이지 않도록)
+    if any(r is None for r in results) or not all(is_card_saved(c, fmt) for c in cards):
+        partial_path = downloader.new_temp_path(prefix="cards_", suffix=".zip")
+        shutil.move(tmp_path, partial_path)
+        return results, partial_path
+    os.replace(tmp_path, zip_path)
+    return results, zip_path
@@ -1,9 +1,28 @@
 import os
-import requests
+import re
+import unicodedata
 from dotenv import load_dotenv
+import services.async_http as ahttp
+import services.runtime_service as runtime
+import services.singleflight_service as flights
+from services.cache_service import DiskCache
+import services.trace_service as trace
 
 load_dotenv()
 
+# 캐시 TTL (초) - 검색 결과는 오래, 리뷰는 하루, 사진 URL은 만료될 수 있어 짧게
+QUERY_CACHE_TTL = int(os.getenv("MAPS_QUERY_CACHE_TTL", str(7 * 24 * 3600)))
+DETAILS_CACHE_TTL = int(os.getenv("MAPS_DETAILS_CACHE_TTL", str(24 * 3600)))
+PHOTO_CACHE_TTL = int(os.getenv("MAPS_PHOTO_CACHE_TTL", str(6 * 3600)))
+REGION_CACHE_TTL = int(os.getenv("MAPS_REGION_CACHE_TTL", str(30 * 24 * 3600)))
+# 지역 힌트가 있을 때 검색을 치우치게 할 반경 (미터)
+LOCATION_BIAS_RADIUS = int(os.getenv("MAPS_LOCATION_BIAS_RADIUS", "20000"))
+
+query_cache = DiskCache("maps_query", ttl=QUERY_CACHE_TTL, max_entries=20000, memory_size=512)
+details_cache = DiskCache("maps_details", ttl=DETAILS_CACHE_TTL, max_entries=20000, memory_size=256)
+photo_cache = DiskCache("maps_photo", ttl=PHOTO_CACHE_TTL, max_entries=20000, memory_size=512)
+region_cache = DiskCache("maps_region", ttl=REGION_CACHE_TTL, max_entries=5000, memory_size=256)
+
 def get_google_maps_api_key():
     try:
         return os.environ["GOOGLE_MAPS_API_KEY"]
@@ -11,13 +30,108 @@ def get_google_maps_api_key():
         print("Error: GOOGLE_MAPS_API_KEY not found in .env")
         return None
 
-def search_place(query):
+def normalize_query(query):
+    """
+    거의 같은 검색어가 같은 캐시를 쓰도록 정규화합니다. (한글 NFC, 대소문자, 공백)
+    """
+    if not query:
+        return ""
+    query = unicodedata.normalize("NFC", query)
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+def get_cache_stats():
+    return [query_cache.stats(), details_cache.stats(), photo_cache.stats(), region_cache.stats()]
+
+@trace.traced("maps.photo", "maps")
+async def resolve_photo_url_async(photo_reference, api_key):
+    """
+    photo_reference를 실제 이미지 주소(리다이렉트 대상)로 바꿉니다.
+    """
+    cached = await photo_cache.get_async(photo_reference)
+    trace.annotate(cache="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+
+    # 사진 크기는 가로 800px로 요청
+    photo_request_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=800&photoreference={photo_reference}&key={api_key}"
+    # 실제 이미지 URL은 리다이렉트된 최종 주소임
+    photo_response = await ahttp.get(photo_request_url, follow_redirects=False)
+    if photo_response.status_code == 302:
+        photo_url = photo_response.headers["Location"]
+        await photo_cache.set_async(photo_reference, photo_url)
+        return photo_url
+    return None
+
+def resolve_photo_url(photo_reference, api_key):
+    return runtime.run_sync(resolve_photo_url_async(photo_reference, api_key))
+
+@trace.traced("maps.region", "maps")
+async def resolve_region_async(region, api_key=None):
+    """
+    "서울 마포구" 같은 지역 힌트를 좌표({"lat", "lng"})로 바꿉니다. 못 찾으면 None.
+    """
+    cache_key = normalize_query(region)
+    api_key = api_key or get_google_maps_api_key()
+    if not cache_key or not api_key:
+        return None
+
+    cached = await region_cache.get_async(cache_key)
+    trace.annotate(cache="hit" if cached is not None else "miss")
+    if cached is not None:
+        # 못 찾은 지역은 빈 dict로 저장해 두고 다시 묻지 않음
+        return cached or None
+
+    params = {
+        "input": region,
+        "inputtype": "textquery",
+        "fields": "geometry",
+        "key": api_key
+    }
+    try:
+        response = await ahttp.get("https://maps.googleapis.com/maps/api/place/findplacefromtext/json", params=params)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        print(f"Google Maps Region Error: {e}")
+        return None
+
+    location = {}
+    if data.get("status") == "OK" and data.get("candidates"):
+        location = data["candidates"][0].get("geometry", {}).get("location", {})
+    await region_cache.set_async(cache_key, location)
+    return location or None
+
+def resolve_region(region, api_key=None):
+    return runtime.run_sync(resolve_region_async(region, api_key))
+
+@trace.traced("maps.search", "maps")
+async def search_place_async(query, region=None):
     """
     구글 장소 검색 API를 사용하여 장소 정보를 찾습니다.
+    region(지역 힌트)이 있으면 그 주변 결과가 먼저 나오도록 검색을 치우치게 합니다.
     """
     api_key = get_google_maps_api_key()
     if not api_key: return None
 
+    location = await resolve_region_async(region, api_key) if region else None
+    cache_key = normalize_query(query)
+    if location:
+        cache_key += f"@{location['lat']:.2f},{location['lng']:.2f}"
+    cached = await query_cache.get_async(cache_key)
+    trace.annotate(cache="hit" if cached is not None else "miss")
+    if cached is not None:
+        result = dict(cached)
+        if result.get("photo_reference"):
+            try:
+                result["photo_url"] = await resolve_photo_url_async(result["photo_reference"], api_key)
+            except Exception as e:
+                print(f"Google Maps Photo Error: {e}")
+        return result
+
+    # 같은 장소를 동시에 찾는 요청들(같은 링크를 넣은 여러 사용자)은 API를 한 번만 부름
+    return await flights.do(("maps.search", cache_key), lambda: _find_place_async(query, location, cache_key, api_key))
+
+async def _find_place_async(query, location, cache_key, api_key):
     # 1. 텍스트 검색 (Find Place Request)
     search_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
     params = {
@@ -27,9 +141,11 @@ def search_place(query):
         "fields": "place_id,name,rating,photos,formatted_address",
         "key": api_key
     }
+    if location:
+        params["locationbias"] = f"circle:{LOCATION_BIAS_RADIUS}@{location['lat']},{location['lng']}"
     
     try:
-        response = requests.get(search_url, params=params)
+        response = await ahttp.get(search_url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -40,19 +156,18 @@ def search_place(query):
                 "name": candidate.get("name"),
                 "rating": candidate.get("rating", 0.0),
                 "address": candidate.get("formatted_address"),
+                "photo_reference": None,
                 "photo_url": None
             }
 
             # 사진이 있으면 첫 번째 사진의 URL 가져오기
             if candidate.get("photos"):
-                photo_reference = candidate["photos"][0]["photo_reference"]
-                # 사진 크기는 가로 800px로 요청
-                photo_request_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=800&photoreference={photo_reference}&key={api_key}"
-                # 실제 이미지 URL은 리다이렉트된 최종 주소임
-                photo_response = requests.get(photo_request_url, allow_redirects=False)
-                if photo_response.status_code == 302:
-                    result["photo_url"] = photo_response.headers["Location"]
-            
+                result["photo_reference"] = candidate["photos"][0]["photo_reference"]
+            await query_cache.set_async(cache_key, result)
+
+            if result["photo_reference"]:
+                result["photo_url"] = await resolve_photo_url_async(result["photo_reference"], api_key)
+
             return result
             
     except Exception as e:
@@ -60,13 +175,24 @@ def search_place(query):
     
     return None
 
-def get_place_reviews(place_id):
+def search_place(query, region=None):
+    return runtime.run_sync(search_place_async(query, region))
+
+@trace.traced("maps.details", "maps")
+async def get_place_reviews_async(place_id):
     """
     Place ID로 상세 정보(리뷰 포함)를 가져옵니다.
     """
     api_key = get_google_maps_api_key()
     if not api_key or not place_id: return []
-    
+
+    cached = await details_cache.get_async(place_id)
+    trace.annotate(cache="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+    return await flights.do(("maps.details", place_id), lambda: _fetch_reviews_async(place_id, api_key))
+
+async def _fetch_reviews_async(place_id, api_key):
     details_url = "https://maps.googleapis.com/maps/api/place/details/json"
     params = {
         "place_id": place_id,
@@ -76,15 +202,20 @@ def get_place_reviews(place_id):
     }
     
     try:
-        response = requests.get(details_url, params=params)
+        response = await ahttp.get(details_url, params=params)
         data = response.json()
         if data.get("status") == "OK" and data.get("result"):
-            return data["result"].get("reviews", [])
+            reviews = data["result"].get("reviews", [])
+            await details_cache.set_async(place_id, reviews)
+            return reviews
     except Exception as e:
         print(f"Review API Error: {e}")
         
     return []
 
+def get_place_reviews(place_id):
+    return runtime.run_sync(get_place_reviews_async(place_id))
+
 # ================================================================================
 # [핵심 수정] QR코드용 링크 생성 함수
 # ================================================================================
@@ -0,0 +1,108 @@
+import os
+import time
+import shutil
+import subprocess
+import services.download_service as downloader
+import services.trace_service as trace
+
+# 업로드 전 용량 줄이기 (ffmpeg 없으면 자동으로 건너뜀)
+MEDIA_PREPROCESS = os.getenv("CURATOR_MEDIA_PREPROCESS", "1") == "1"
+# 절약한 시간 추정용 업로드 속도 (bytes/s)
+ESTIMATED_UPLOAD_BPS = float(os.getenv("ESTIMATED_UPLOAD_BPS", str(5 * 1024 * 1024)))
+FFMPEG_TIMEOUT = int(os.getenv("FFMPEG_TIMEOUT", "300"))
+
+# 소스별 설정: 모델은 저해상도 프레임 + 음성만 있으면 충분함
+PROFILES = {
+    "youtube": {"max_height": 360, "fps": 1, "max_duration": 600, "audio_bitrate": "48k", "crf": 32},
+    "instagram": {"max_height": 480, "fps": 2, "max_duration": 180, "audio_bitrate": "64k", "crf": 30},
+    "image": {"max_dimension": 1280, "quality": 85},
+}
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+def _report(bytes_before, bytes_after, seconds):
+    saved = max(0, bytes_before - bytes_after)
+    upload_saved = saved / ESTIMATED_UPLOAD_BPS
+    return {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": saved,
+        "seconds": round(seconds, 2),
+        # 업로드 절약 시간 - 변환에 쓴 시간
+        "seconds_saved": round(upload_saved - seconds, 2)
+    }
+
+@trace.traced("ffmpeg.transcode", "media")
+def shrink_video(video_path, source="youtube"):
+    """
+    영상을 저해상도/저프레임 + 모노 음성으로 다시 인코딩하고 길이를 자릅니다.
+    반환값: (사용할 경로, 리포트 dict 또는 None)
+    """
+    profile = PROFILES.get(source, PROFILES["youtube"])
+    if not MEDIA_PREPROCESS or not ffmpeg_available() or not os.path.exists(video_path):
+        return video_path, None
+
+    start = time.perf_counter()
+    bytes_before = os.path.getsize(video_path)
+    out_path = downloader.new_temp_path("small_", ".mp4")
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-t", str(profile["max_duration"]),
+        "-vf", f"fps={profile['fps']},scale=-2:'min({profile['max_height']},ih)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", str(profile["crf"]),
+        "-c:a", "aac", "-b:a", profile["audio_bitrate"], "-ac", "1",
+        "-movflags", "+faststart",
+        out_path
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except Exception as e:
+        print(f"⚠️ 영상 변환 실패, 원본 사용: {e}")
+        if os.path.exists(out_path): os.remove(out_path)
+        return video_path, None
+
+    bytes_after = os.path.getsize(out_path)
+    if bytes_after == 0 or bytes_after >= bytes_before:
+        # 오히려 커졌으면 원본 유지
+        os.remove(out_path)
+        return video_path, _report(bytes_before, bytes_before, time.perf_counter() - start)
+
+    os.remove(video_path)
+    report = _report(bytes_before, bytes_after, time.perf_counter() - start)
+    trace.annotate(bytes=bytes_before, bytes_after=bytes_after)
+    print(f"🎞️ 영상 축소: {bytes_before // 1024}KB → {bytes_after // 1024}KB ({report['seconds']}s)")
+    return out_path, report
+
+@trace.traced("images.resize", "media")
+def shrink_images(image_paths, source="image"):
+    """
+    긴 변이 max_dimension을 넘는 사진을 줄여서 같은 경로에 다시 저장합니다.
+    반환값: (경로 리스트, 리포트 dict 또는 None)
+    """
+    if not MEDIA_PREPROCESS or not image_paths:
+        return image_paths, None
+
+    from PIL import Image
+
+    profile = PROFILES.get(source, PROFILES["image"])
+    max_dim = profile["max_dimension"]
+    start = time.perf_counter()
+    bytes_before = bytes_after = 0
+    for path in image_paths:
+        size = os.path.getsize(path)
+        bytes_before += size
+        try:
+            with Image.open(path) as img:
+                if max(img.size) <= max_dim:
+                    bytes_after += size
+                    continue
+                img = img.convert("RGB")
+                img.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+                img.save(path, "JPEG", quality=profile["quality"], optimize=True)
+        except Exception as e:
+            print(f"⚠️ 사진 축소 실패 ({os.path.basename(path)}): {e}")
+        bytes_after += os.path.getsize(path)
+
+    return image_paths, _report(bytes_before, bytes_after, time.perf_counter() - start)
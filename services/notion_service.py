@@ -1,79 +1,309 @@
 import os
-import requests
+import re
+import sys
 import json
+import time
+import asyncio
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
+import services.async_http as ahttp
+import services.runtime_service as runtime
+import services.trace_service as trace
 
 load_dotenv()
 
-def save_to_notion(data_list):
-    token = os.getenv("NOTION_API_KEY")
-    database_id = os.getenv("NOTION_DATABASE_ID")
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+# 노션 API 제한은 평균 초당 3회
+NOTION_RATE_PER_SEC = float(os.getenv("NOTION_RATE_PER_SEC", "3"))
+NOTION_WORKERS = int(os.getenv("NOTION_WORKERS", "3"))
+NOTION_ATTEMPTS = 3
 
-    if not token or not database_id:
-        return False, "❌ .env 파일에 노션 키나 데이터베이스 ID가 없습니다."
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 채워지는 버킷. acquire()/acquire_async()는 토큰이 생길 때까지 기다립니다.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        # 토큰을 가져오면 0, 아니면 기다려야 할 시간(초)을 돌려줌
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while (wait := self._take()):
+            time.sleep(wait)
 
-    headers = {
+    async def acquire_async(self):
+        while (wait := self._take()):
+            await asyncio.sleep(wait)
+
+_bucket = TokenBucket(NOTION_RATE_PER_SEC)
+
+def _get_config():
+    return os.getenv("NOTION_API_KEY"), os.getenv("NOTION_DATABASE_ID")
+
+def _headers(token):
+    return {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
+        "Notion-Version": NOTION_VERSION
     }
 
-    success_count = 0
-    errors = []
-
-    for item in data_list:
-        # 노션에 보낼 데이터 포맷 (이 부분이 까다롭습니다)
-        payload = {
-            "parent": {"database_id": database_id},
-            "properties": {
-                "식당이름": {
-                    "title": [{"text": {"content": item['식당이름']}}]
-                },
-                "특징": {
-                    "rich_text": [{"text": {"content": item['특징']}}]
-                },
-                "주소": {
-                    "rich_text": [{"text": {"content": item['주소']}}]
-                },
-                "평점": {
-                    "number": float(item['평점']) if item['평점'] else 0
-                },
-                "지도링크": {
-                    "url": item['지도링크'] if item['지도링크'] else None
-                },
-                "원본영상": {
-                    "url": item['원본영상'] if item['원본영상'] else None
-                }
+async def _notion_post(path, token, payload):
+    await _bucket.acquire_async()
+    return await ahttp.post(f"{NOTION_API_URL}/{path}", headers=_headers(token), json=payload)
+
+def _place_key(map_link):
+    """지도링크에서 place_id를 꺼내 중복 판단 키로 사용 (없으면 링크 자체)"""
+    if not map_link:
+        return None
+    match = re.search(r"query_place_id=([^&]+)", map_link)
+    return match.group(1) if match else map_link
+
+@trace.traced("notion.query", "notion")
+async def fetch_existing_keys_async(token, database_id):
+    """
+    데이터베이스에 이미 있는 행들의 place_id(또는 지도링크)를 모읍니다.
+    """
+    keys = set()
+    payload = {"page_size": 100}
+    while True:
+        response = await _notion_post(f"databases/{database_id}/query", token, payload)
+        response.raise_for_status()
+        data = response.json()
+        for page in data.get("results", []):
+            link = page.get("properties", {}).get("지도링크", {}).get("url")
+            key = _place_key(link)
+            if key:
+                keys.add(key)
+        if not data.get("has_more"):
+            return keys
+        payload["start_cursor"] = data["next_cursor"]
+
+def fetch_existing_keys(token, database_id):
+    return runtime.run_sync(fetch_existing_keys_async(token, database_id))
+
+async def _page_exists(token, database_id, map_link):
+    payload = {"page_size": 1, "filter": {"property": "지도링크", "url": {"equals": map_link}}}
+    response = await _notion_post(f"databases/{database_id}/query", token, payload)
+    return response.status_code == 200 and bool(response.json().get("results"))
+
+def _build_payload(item, database_id):
+    # 노션에 보낼 데이터 포맷 (이 부분이 까다롭습니다)
+    payload = {
+        "parent": {"database_id": database_id},
+        "properties": {
+            "식당이름": {
+                "title": [{"text": {"content": item['식당이름']}}]
+            },
+            "특징": {
+                "rich_text": [{"text": {"content": item['특징']}}]
+            },
+            "주소": {
+                "rich_text": [{"text": {"content": item['주소']}}]
             },
-            # 페이지 본문(내용)에 사진을 넣어줍니다!
-            "children": []
-        }
-
-        # 사진이 있다면 본문에 이미지 블록 추가
-        if item.get('사진URL'):
-             payload["children"].append({
-                "object": "block",
-                "type": "image",
-                "image": {
-                    "type": "external",
-                    "external": {"url": item['사진URL']}
-                }
-            })
+            "평점": {
+                "number": float(item['평점']) if item['평점'] else 0
+            },
+            "지도링크": {
+                "url": item['지도링크'] if item['지도링크'] else None
+            },
+            "원본영상": {
+                "url": item['원본영상'] if item['원본영상'] else None
+            }
+        },
+        # 페이지 본문(내용)에 사진을 넣어줍니다!
+        "children": []
+    }
+
+    # 사진이 있다면 본문에 이미지 블록 추가
+    if item.get('사진URL'):
+         payload["children"].append({
+            "object": "block",
+            "type": "image",
+            "image": {
+                "type": "external",
+                "external": {"url": item['사진URL']}
+            }
+        })
+    return payload
 
+@trace.traced("notion.create_page", "notion")
+async def _create_page(item, token, database_id):
+    """
+    페이지 하나를 만듭니다. 응답이 애매하게 실패하면(타임아웃/5xx)
+    이미 만들어졌는지 확인한 뒤에만 다시 시도해서 중복 생성을 막습니다.
+    """
+    payload = _build_payload(item, database_id)
+    last_error = "알 수 없는 오류"
+    for attempt in range(NOTION_ATTEMPTS):
+        if attempt and item.get('지도링크') and await _page_exists(token, database_id, item['지도링크']):
+            return "created", None
         try:
-            response = requests.post("https://api.notion.com/v1/pages", headers=headers, json=payload)
-            if response.status_code == 200:
-                success_count += 1
-            else:
-                err_msg = response.json().get('message', '알 수 없는 오류')
-                errors.append(f"{item['식당이름']}: {err_msg}")
+            response = await _notion_post("pages", token, payload)
         except Exception as e:
-            errors.append(str(e))
+            last_error = str(e)
+            continue
+        if response.status_code == 200:
+            return "created", None
+        try:
+            last_error = response.json().get('message', '알 수 없는 오류')
+        except ValueError:
+            # 502/503/504는 HTML이나 빈 본문이 오기도 함
+            last_error = f"HTTP {response.status_code}"
+        if response.status_code < 500:
+            # 4xx(형식 오류 등)는 다시 보내도 같음
+            break
+    return "failed", last_error
+
+async def iter_export_events(data_list, max_workers=NOTION_WORKERS, skip_existing=True):
+    """
+    여러 맛집을 동시에 노션에 저장하면서, 끝나는 순서대로 (인덱스, 결과)를 돌려줍니다.
+    동시 요청 수는 max_workers, 초당 요청 수는 토큰 버킷으로 제한합니다.
+    """
+    token, database_id = _get_config()
+    if not token or not database_id:
+        raise ValueError("❌ .env 파일에 노션 키나 데이터베이스 ID가 없습니다.")
+
+    existing = await fetch_existing_keys_async(token, database_id) if skip_existing else set()
+    todo = []
+    seen = set()
+    for idx, item in enumerate(data_list):
+        key = _place_key(item.get('지도링크'))
+        if key and (key in existing or key in seen):
+            yield idx, {"name": item['식당이름'], "status": "skipped", "error": None}
+            continue
+        if key:
+            seen.add(key)
+        todo.append(idx)
+
+    if not todo:
+        return
+
+    slots = asyncio.Semaphore(max(1, max_workers))
+
+    async def create(idx):
+        async with slots:
+            try:
+                status, error = await _create_page(data_list[idx], token, database_id)
+            except Exception as e:
+                status, error = "failed", str(e)
+        return idx, {"name": data_list[idx]['식당이름'], "status": status, "error": error}
+
+    tasks = [asyncio.ensure_future(create(idx)) for idx in todo]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # 중간에 멈추면(취소/예외) 남은 요청도 정리
+        for task in tasks:
+            task.cancel()
+
+async def export_to_notion_async(data_list, max_workers=NOTION_WORKERS, on_progress=None, skip_existing=True):
+    """
+    export_to_notion의 비동기 버전. on_progress(idx, result)는 이벤트 루프에서 호출됩니다.
+    """
+    start = time.perf_counter()
+    results = [None] * len(data_list)
+    async for idx, result in iter_export_events(data_list, max_workers, skip_existing):
+        results[idx] = result
+        if on_progress: on_progress(idx, result)
+    return _export_report(results, time.perf_counter() - start)
+
+def _export_report(results, seconds):
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("created", "skipped", "failed")}
+    return dict(
+        counts,
+        items=results,
+        seconds=round(seconds, 2),
+        per_sec=round(counts["created"] / seconds, 2) if seconds else 0.0
+    )
+
+def export_to_notion(data_list, max_workers=NOTION_WORKERS, on_progress=None, skip_existing=True):
+    """
+    여러 맛집을 동시에 노션에 저장합니다. (초당 요청 수 제한 + 중복 방지)
+    on_progress(idx, result)는 항목이 끝날 때마다 호출한 스레드에서 실행됩니다.
+    반환값: {"items": [...], "created": n, "skipped": n, "failed": n, "seconds": s, "per_sec": r}
+    """
+    start = time.perf_counter()
+    results = [None] * len(data_list)
+    for idx, result in runtime.iterate_sync(iter_export_events(data_list, max_workers, skip_existing)):
+        results[idx] = result
+        if on_progress: on_progress(idx, result)
+    return _export_report(results, time.perf_counter() - start)
+
+def save_to_notion(data_list):
+    try:
+        report = export_to_notion(data_list)
+    except ValueError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"❌ 저장 실패: {str(e)}"
+
+    success_count = report["created"] + report["skipped"]
+    errors = [f"{r['name']}: {r['error']}" for r in report["items"] if r["status"] == "failed"]
 
     if success_count == len(data_list):
-        return True, f"✅ 총 {success_count}개 맛집을 노션에 저장했습니다!"
+        return True, f"✅ 총 {report['created']}개 맛집을 노션에 저장했습니다! (중복 {report['skipped']}개 제외)"
     elif success_count > 0:
         return True, f"⚠️ {success_count}개는 저장했지만, {len(errors)}개는 실패했습니다.\n({errors[0]})"
     else:
-        return False, f"❌ 저장 실패: {errors[0] if errors else '알 수 없는 오류'}"
\ No newline at end of file
+        return False, f"❌ 저장 실패: {errors[0] if errors else '알 수 없는 오류'}"
+
+def _load_rows(path):
+    """
+    노션 행 목록(json/jsonl)이나 배치 결과(journal.jsonl / curation.jsonl)를 읽어 노션 행으로 돌려줍니다.
+    배치 결과는 화면에서 노션에 저장할 때와 같은 변환(build_notion_rows)을 거칩니다.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = json.load(f)
+
+    rows, results = [], {}
+    for item in items:
+        if "status" in item and "result" in item:
+            # journal.jsonl - 성공한 줄만, 같은 링크는 마지막 결과로
+            if item["status"] == "ok":
+                results[item["url"]] = item["result"]
+        elif "places_data" in item:
+            # curation.jsonl
+            results[item.get("url") or len(results)] = item
+        else:
+            rows.append(item)
+    if results:
+        # 분석 엔진은 무거워서 배치 결과를 받을 때만 불러옴
+        import services.curation_service as engine
+        for result in results.values():
+            rows.extend(engine.build_notion_rows(result))
+    return rows
+
+if __name__ == "__main__":
+    # 사용법: python -m services.notion_service rows.json|rows.jsonl|output/journal.jsonl|output/curation.jsonl
+    if len(sys.argv) != 2:
+        print("사용법: python -m services.notion_service <rows.json|rows.jsonl|journal.jsonl|curation.jsonl>")
+        sys.exit(1)
+
+    rows = _load_rows(sys.argv[1])
+    report = export_to_notion(
+        rows,
+        on_progress=lambda idx, r: print(f"[{r['status']}] {r['name']}" + (f" - {r['error']}" if r['error'] else ""))
+    )
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} 생성 {report['created']} / 중복 {report['skipped']} / 실패 {report['failed']} "
+          f"({report['seconds']}초, 초당 {report['per_sec']}건)")
+    sys.exit(1 if report["failed"] else 0)
@@ -0,0 +1,125 @@
+import time
+import queue
+import threading
+
+_STOP = object()
+
+class Stage:
+    """
+    파이프라인의 한 단계. 자기 입력 큐와 워커 스레드들을 가지고,
+    func(payload)의 결과를 다음 단계 큐로 넘깁니다.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=8):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self._threads = []
+
+    def _record(self, seconds, ok):
+        with self.lock:
+            self.in_flight -= 1
+            self.busy_seconds += seconds
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    def stats(self, elapsed):
+        with self.lock:
+            done = self.processed + self.failed
+            return {
+                "queue": self.queue.qsize(),
+                "in_flight": self.in_flight,
+                "processed": self.processed,
+                "failed": self.failed,
+                "per_sec": round(self.processed / elapsed, 3) if elapsed else 0.0,
+                "avg_seconds": round(self.busy_seconds / done, 3) if done else 0.0,
+                # 워커가 일한 시간 비율 (1에 가까우면 이 단계가 병목)
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0
+            }
+
+class Pipeline:
+    """
+    단계마다 크기가 정해진 큐와 워커 풀을 두는 생산자/소비자 파이프라인.
+    다음 단계 큐가 가득 차면 앞 단계가 기다리므로(backpressure) 메모리가 무한히 늘지 않습니다.
+
+    on_result(job_id, payload)는 마지막 단계를 통과한 작업마다,
+    on_error(job_id, stage_name, error)는 실패한 작업마다 워커 스레드에서 호출됩니다.
+    콜백에서 예외가 나도 로그만 남기고 워커는 계속 돕니다. (워커가 죽으면 앞 단계가 큐에서 영원히 기다림)
+    """
+
+    def __init__(self, stages, on_result=None, on_error=None):
+        self.stages = stages
+        self.on_result = on_result
+        self.on_error = on_error
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        for idx, stage in enumerate(self.stages):
+            next_stage = self.stages[idx + 1] if idx + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._work, args=(stage, next_stage), name=f"{stage.name}-{n}", daemon=True)
+                t.start()
+                stage._threads.append(t)
+        return self
+
+    def _notify(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"⚠️ {getattr(callback, '__name__', '결과')} 콜백 실패 ({args[0]}): {type(e).__name__}: {e}")
+
+    def _work(self, stage, next_stage):
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            job_id, payload = item
+            with stage.lock:
+                stage.in_flight += 1
+            start = time.perf_counter()
+            try:
+                output = stage.func(payload)
+            except Exception as e:
+                stage._record(time.perf_counter() - start, ok=False)
+                if self.on_error:
+                    self._notify(self.on_error, job_id, stage.name, e)
+                continue
+            stage._record(time.perf_counter() - start, ok=True)
+
+            if next_stage is not None:
+                # 다음 단계가 밀려 있으면 여기서 기다림 (backpressure)
+                next_stage.queue.put((job_id, output))
+            elif self.on_result:
+                self._notify(self.on_result, job_id, output)
+
+    def submit(self, job_id, payload):
+        """첫 단계 큐에 작업을 넣습니다. 큐가 가득 차면 자리가 날 때까지 기다립니다."""
+        self.stages[0].queue.put((job_id, payload))
+
+    def join(self):
+        """더 이상 작업을 넣지 않고, 모든 단계가 끝날 때까지 기다립니다."""
+        for stage in self.stages:
+            for _ in stage._threads:
+                stage.queue.put(_STOP)
+            for t in stage._threads:
+                t.join()
+
+    def stats(self):
+        """단계별 큐 길이 / 처리 중 / 처리량 / 평균 시간 / 가동률"""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self.stages}
+
+    def format_stats(self):
+        return " | ".join(
+            f"{name} q={s['queue']} run={s['in_flight']} done={s['processed']} fail={s['failed']} {s['per_sec']}/s"
+            for name, s in self.stats().items()
+        )
@@ -0,0 +1,143 @@
+import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# 영문 표기끼리의 유사도가 이 값 이상이면 같은 장소로 봄 ("Ichiran Namba" vs "Ichiran Nanba")
+# 한글은 한 글자 차이로 다른 가게가 되는 경우가 많아("할머니국수" vs "할머니칼국수") 정확히 같을 때만 합침
+NAME_MATCH_THRESHOLD = float(os.getenv("PLACE_NAME_MATCH_THRESHOLD", "0.9"))
+# 이보다 짧은 이름 조각은 비교에 쓰지 않음 ("국수", "카페" 등) - 한자/가나는 두 글자도 허용 ("一蘭")
+MIN_KEY_LENGTH = 3
+FUZZY_MIN_LENGTH = 6
+
+_PAREN = re.compile(r"[\(\[（【]([^\)\]）】]*)[\)\]）】]")
+_SEPARATORS = re.compile(r"\s*[/|·,]\s*")
+_NOISE = re.compile(r"[\W_]+")
+_CJK = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]")
+
+def normalize_name(name):
+    """
+    가게 이름 비교용 정규화: 전각/반각 통일(NFKC), 대소문자 무시, 공백/기호 제거
+    """
+    name = unicodedata.normalize("NFKC", name or "").casefold()
+    return _NOISE.sub("", name)
+
+def _usable(key):
+    return len(key) >= MIN_KEY_LENGTH or (len(key) == 2 and bool(_CJK.search(key)))
+
+def _region_tokens(region):
+    return {normalize_name(t) for t in (region or "").split() if t.strip()}
+
+def name_keys(place, region=None, fields=("display_name", "search_query", "name")):
+    """
+    후보 하나의 비교용 이름 조각들을 만듭니다.
+    "할머니국수 (Grandma Noodles)" → 전체 / 괄호 밖 / 괄호 안 / 지역명을 뺀 이름
+    """
+    drop = _region_tokens(region or place.get("region"))
+    keys = set()
+    for field in fields:
+        value = place.get(field)
+        if not value:
+            continue
+        outer = _PAREN.sub(" ", value)
+        parts = [value, outer, *_PAREN.findall(value), *_SEPARATORS.split(outer)]
+        # 검색어에 붙은 지역명("망원동 할머니국수"의 "망원동")은 빼고도 비교
+        parts.append(" ".join(t for t in outer.split() if normalize_name(t) not in drop))
+        for part in parts:
+            key = normalize_name(part)
+            if _usable(key):
+                keys.add(key)
+    return keys
+
+def _fuzzy_ok(key):
+    return key.isascii() and len(key) >= FUZZY_MIN_LENGTH
+
+def same_place(keys_a, keys_b, threshold=NAME_MATCH_THRESHOLD):
+    if keys_a & keys_b:
+        return True
+    return any(
+        SequenceMatcher(None, a, b).ratio() >= threshold
+        for a in keys_a if _fuzzy_ok(a)
+        for b in keys_b if _fuzzy_ok(b)
+    )
+
+def merge_ai_info(infos):
+    """
+    같은 장소로 판단된 AI 후보들을 하나로 합칩니다. (첫 후보 기준, 설명은 이어붙이고 나머지 이름은 aliases로)
+    """
+    merged = dict(infos[0])
+    descriptions, aliases = [], []
+    for info in infos:
+        desc = (info.get("description") or "").strip()
+        if desc and desc not in descriptions:
+            descriptions.append(desc)
+        for alias in [info.get("display_name"), info.get("search_query"), *info.get("aliases", [])]:
+            if alias and alias not in aliases and alias not in (merged.get("display_name"), merged.get("search_query")):
+                aliases.append(alias)
+        if not merged.get("region") and info.get("region"):
+            merged["region"] = info["region"]
+    merged["description"] = " / ".join(descriptions)
+    if aliases:
+        merged["aliases"] = aliases
+    return merged
+
+def _query_keys(place, region=None):
+    # 검색어가 없으면 이름 전체로 비교
+    if place.get("search_query"):
+        return name_keys(place, region, fields=("search_query",))
+    return name_keys(place, region)
+
+def _same_region(place, group):
+    # 후보마다 지역이 적혀 있는데 서로 다르면 다른 지점으로 봄
+    region = normalize_name(place.get("region"))
+    return not region or not group["regions"] or region in group["regions"]
+
+def dedupe_candidates(places, region=None, threshold=NAME_MATCH_THRESHOLD):
+    """
+    지도 검색 전에 확실히 같은 후보만 하나로 합칩니다. (처음 나온 순서 유지)
+    이름뿐 아니라 검색어도 겹쳐야 합칩니다. 이름만 같은 후보("스타벅스 강남점" / "스타벅스 홍대점")는
+    지점이 다를 수 있으므로 그대로 두고, 지도 검색 후 merge_by_place_id에서 같은 장소면 합칩니다.
+    """
+    groups = []
+    for place in places or []:
+        keys, query_keys = name_keys(place, region), _query_keys(place, region)
+        target = next((
+            group for group in groups
+            if keys and same_place(keys, group["keys"], threshold)
+            and query_keys and same_place(query_keys, group["query_keys"], threshold)
+            and _same_region(place, group)
+        ), None)
+        if target is None:
+            target = {"keys": set(), "query_keys": set(), "regions": set(), "infos": []}
+            groups.append(target)
+        target["infos"].append(place)
+        target["keys"] |= keys
+        target["query_keys"] |= query_keys
+        if place.get("region"):
+            target["regions"].add(normalize_name(place["region"]))
+
+    merged = [merge_ai_info(g["infos"]) for g in groups]
+    if len(merged) < len(places or []):
+        print(f"🔗 중복 후보 {len(places) - len(merged)}개를 합쳤습니다.")
+    return merged
+
+def merge_by_place_id(items):
+    """
+    지도 검색 후 같은 place_id로 확인된 결과를 하나로 합칩니다.
+    리뷰는 먼저 받아둔 쪽 것을 사용하므로 요약도 장소당 한 번만 합니다.
+    """
+    merged, index = [], {}
+    for item in items:
+        place_id = item["map_info"]["place_id"] if item.get("map_info") else None
+        if place_id is None:
+            merged.append(item)
+            continue
+        if place_id not in index:
+            index[place_id] = len(merged)
+            merged.append(item)
+            continue
+        first = merged[index[place_id]]
+        first["ai_info"] = merge_ai_info([first["ai_info"], item["ai_info"]])
+        if item.get("reviews") and not first.get("reviews"):
+            first["reviews"] = item["reviews"]
+    return merged
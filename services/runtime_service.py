@@ -0,0 +1,128 @@
+import queue
+import asyncio
+import weakref
+import threading
+import contextvars
+import concurrent.futures
+
+# 동기 코드(Streamlit 스크립트, 배치 워커 스레드)에서 비동기 서비스 함수를 부를 때 쓰는 공용 이벤트 루프
+# 루프가 하나라서 HTTP 커넥션 풀/동시 실행 제한을 모든 호출이 같이 씀
+
+_loop = None
+_loop_lock = threading.Lock()
+_loop_locals = weakref.WeakKeyDictionary()
+
+def get_loop():
+    """백그라운드 스레드에서 도는 공용 이벤트 루프 (처음 부를 때 한 번만 시작)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="curator-async", daemon=True).start()
+            _loop = loop
+        return _loop
+
+def _in_shared_loop():
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+def _transfer(task, future):
+    if future.done():
+        return
+    try:
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+    except concurrent.futures.InvalidStateError:
+        # 기다리던 쪽에서 이미 취소함
+        pass
+
+def submit(coro):
+    """
+    코루틴을 공용 루프에 올리고 concurrent.futures.Future를 돌려줍니다.
+    호출한 쪽의 contextvars(trace 등)를 그대로 이어받습니다.
+    """
+    if _in_shared_loop():
+        coro.close()
+        raise RuntimeError("이벤트 루프 안에서는 동기 함수 대신 *_async 함수를 await 하세요.")
+
+    loop = get_loop()
+    ctx = contextvars.copy_context()
+    future = concurrent.futures.Future()
+
+    def start():
+        task = loop.create_task(coro)
+        task.add_done_callback(lambda t: _transfer(t, future))
+        # 기다리던 쪽이 취소하면 루프 안의 작업도 취소
+        future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(ctx.run, start)
+    return future
+
+def run_sync(coro, timeout=None):
+    """코루틴을 공용 루프에서 실행하고 결과를 기다립니다. (기존 동기 함수들의 얇은 래퍼용)"""
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"비동기 작업 대기 시간 초과 ({timeout}초)")
+
+def iterate_sync(agen):
+    """
+    비동기 이터레이터를 동기 for문으로 돌립니다.
+    항목은 호출한 스레드에서 받으므로 st.write 같은 콜백을 바로 불러도 안전합니다.
+    """
+    async def step():
+        return await agen.__anext__()
+
+    try:
+        while True:
+            try:
+                yield run_sync(step())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_sync(agen.aclose())
+
+def run_with_reports(make_coro, report):
+    """
+    make_coro(send)로 만든 코루틴을 공용 루프에서 실행하면서,
+    그 안에서 send(msg)로 보낸 진행 메시지는 호출한 스레드에서 report(msg)로 전달합니다.
+    """
+    messages = queue.SimpleQueue()
+    future = submit(make_coro(messages.put))
+    try:
+        while not future.done() or not messages.empty():
+            try:
+                report(messages.get(timeout=0.05))
+            except queue.Empty:
+                continue
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
+
+def loop_local(key, factory):
+    """
+    지금 실행 중인 이벤트 루프마다 하나씩 객체를 만들어 둡니다.
+    (asyncio.Semaphore, httpx 클라이언트처럼 루프에 묶이는 객체용)
+    """
+    loop = asyncio.get_running_loop()
+    values = _loop_locals.setdefault(loop, {})
+    if key not in values:
+        values[key] = factory()
+    return values[key]
+
+def discard_loop_local(key):
+    loop = asyncio.get_running_loop()
+    return _loop_locals.get(loop, {}).pop(key, None)
+
+def semaphore(name, limit):
+    """이름별 동시 실행 제한 (루프마다 따로)"""
+    return loop_local(("semaphore", name), lambda: asyncio.Semaphore(limit))
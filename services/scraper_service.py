@@ -1,49 +1,155 @@
 import os
-import time
-import requests
-import re
-from pytubefix import YouTube
-from apify_client import ApifyClient
+import asyncio
 from dotenv import load_dotenv
+import services.async_http as ahttp
+import services.http_client as sync_http
+import services.runtime_service as runtime
+import services.blog_service as blog
+import services.download_service as downloader
+import services.client_registry as clients
+import services.singleflight_service as flights
+import services.trace_service as trace
+from services.url_service import canonicalize_url, youtube_video_id
 
 load_dotenv()
 
+# 모델은 저해상도로도 충분하므로 이 해상도 이하의 스트림을 우선 선택
+YOUTUBE_MAX_RESOLUTION = int(os.getenv("YOUTUBE_MAX_RESOLUTION", "480"))
+# 자막 언어 우선순위
+YOUTUBE_TRANSCRIPT_LANGS = [lang.strip() for lang in os.getenv("YOUTUBE_TRANSCRIPT_LANGS", "ko,en,ja").split(",") if lang.strip()]
+
+# 네이버 블로그는 응답이 느리면 오래 기다리지 않음 (연결, 읽기)
+NAVER_TIMEOUT = (sync_http.CONNECT_TIMEOUT, float(os.getenv("NAVER_READ_TIMEOUT", "10")))
+_NAVER_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+def _pick_stream(yt, max_height=YOUTUBE_MAX_RESOLUTION):
+    """max_height 이하 중 가장 높은 해상도의 mp4 스트림 (없으면 가장 낮은 것)"""
+    for progressive in (True, None):
+        filters = {"file_extension": "mp4"}
+        if progressive:
+            filters["progressive"] = True
+        streams = yt.streams.filter(**filters).order_by('resolution').desc()
+        candidates = [s for s in streams if s.resolution and int(s.resolution.rstrip("p")) <= max_height]
+        if candidates:
+            return candidates[0]
+        if streams.last():
+            return streams.last()
+    return None
+
 # [기존] 유튜브 다운로드 함수
+@trace.traced("youtube.download", "youtube")
 def get_video_file(url):
     """유튜브 영상을 다운로드하여 로컬 파일 경로 반환"""
     try:
+        from pytubefix import YouTube
         yt = YouTube(url, use_oauth=True, allow_oauth_cache=True)
         print(f"📥 유튜브 다운로드 시작: {yt.title}")
         
-        # 쇼츠나 일반 영상 모두 처리
-        stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+        # 쇼츠나 일반 영상 모두 처리 (필요 이상 높은 해상도는 받지 않음)
+        stream = _pick_stream(yt)
         if not stream:
-            stream = yt.streams.filter(file_extension='mp4').order_by('resolution').desc().first()
+            return None, "다운로드 가능한 mp4 스트림이 없습니다."
             
-        out_file = stream.download()
-        
-        # 파일명 단순화 (오류 방지)
-        base, ext = os.path.splitext(out_file)
-        new_file = f"video_{int(time.time())}.mp4"
-        os.rename(out_file, new_file)
+        # 임시 폴더에 겹치지 않는 이름으로 저장 (파일명 단순화 + 동시 세션 충돌 방지)
+        new_file = downloader.new_temp_path("video_", ".mp4")
+        stream.download(output_path=os.path.dirname(new_file), filename=os.path.basename(new_file))
         
+        trace.annotate(bytes=os.path.getsize(new_file), resolution=stream.resolution)
         return new_file, None
     except Exception as e:
         return None, f"유튜브 다운로드 에러: {str(e)}"
 
-# [신규] 인스타그램 다운로드 함수 (Apify 사용)
-def get_instagram_content(url):
+def _fetch_transcript(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
+    if hasattr(YouTubeTranscriptApi, "get_transcript"):
+        # 0.6.x
+        segments = YouTubeTranscriptApi.get_transcript(video_id, languages=YOUTUBE_TRANSCRIPT_LANGS)
+        return " ".join(seg["text"] for seg in segments)
+    # 1.x
+    fetched = YouTubeTranscriptApi().fetch(video_id, languages=YOUTUBE_TRANSCRIPT_LANGS)
+    return " ".join(snippet.text for snippet in fetched)
+
+def _estimate_video_bytes(info, max_height=YOUTUBE_MAX_RESOLUTION):
+    """영상을 받았다면 내려받았을 크기 (절약량 추정용)"""
+    sizes = [
+        f.get("filesize") or f.get("filesize_approx") or 0
+        for f in info.get("formats") or []
+        if f.get("ext") == "mp4" and (f.get("height") or 0) <= max_height
+    ]
+    return max(sizes, default=0)
+
+# [신규] 유튜브 제목/설명/자막만 가져오기 (영상 다운로드 없이)
+@trace.traced("youtube.metadata", "youtube")
+def get_youtube_text(url):
     """
-    인스타 링크를 분석하여 콘텐츠(영상 or 이미지들)를 다운로드함
-    반환값: (type, paths, error)
-    type: 'video' 또는 'image'
-    paths: 파일 경로(문자열) 또는 파일 경로 리스트
+    영상을 받지 않고 제목/채널/설명/태그/자막만 가져옵니다.
+    반환값: (정보 dict, error)
     """
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True, "skip_download": True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        return None, f"유튜브 정보 가져오기 에러: {str(e)}"
+
+    video_id = info.get("id") or youtube_video_id(url)
+    transcript = ""
+    try:
+        transcript = _fetch_transcript(video_id)
+    except Exception as e:
+        # 자막이 꺼져 있는 영상이 많으므로 설명만으로 진행
+        print(f"⚠️ 자막 없음 ({video_id}): {type(e).__name__}")
+
+    meta = {
+        "title": info.get("title") or "",
+        "channel": info.get("channel") or info.get("uploader") or "",
+        "description": info.get("description") or "",
+        "tags": info.get("tags") or [],
+        "location": info.get("location") or "",
+        "duration": info.get("duration"),
+        "transcript": transcript,
+        "video_bytes": _estimate_video_bytes(info)
+    }
+    trace.annotate(transcript_chars=len(transcript), description_chars=len(meta["description"]))
+    return meta, None
+
+# 같은 링크를 동시에 요청하면 다운로드/Apify 실행은 한 번만 하고, 파일은 요청마다 복사본을 줌 (각자 지워도 됨)
+def _share_video(result):
+    path, error = result
+    return (downloader.copy_temp_file(path), error) if path else result
+
+def _share_instagram(result):
+    kind, paths, error = result
+    if kind == "video":
+        return kind, downloader.copy_temp_file(paths), error
+    if kind == "image":
+        return kind, [downloader.copy_temp_file(p) for p in paths], error
+    return result
+
+# 복사본을 받기 전에 취소된 요청 몫은 지움
+def _discard_video(result):
+    downloader.remove_files([result[0]])
+
+def _discard_instagram(result):
+    kind, paths, _ = result
+    downloader.remove_files([paths] if kind == "video" else paths or [])
+
+# pytubefix / yt-dlp는 동기 라이브러리라 비동기 버전은 스레드에서 실행
+async def get_video_file_async(url):
+    return await flights.do(("youtube.video", canonicalize_url(url)),
+                            lambda: asyncio.to_thread(get_video_file, url), share=_share_video, discard=_discard_video)
+
+async def get_youtube_text_async(url):
+    return await flights.do(("youtube.text", canonicalize_url(url)), lambda: asyncio.to_thread(get_youtube_text, url))
+
+# [신규] 인스타그램 다운로드 함수 (Apify 사용)
+@trace.traced("instagram.fetch", "instagram")
+async def _fetch_instagram_content_async(url):
     api_token = os.getenv("APIFY_API_TOKEN")
     if not api_token:
         return None, None, "Apify API 토큰이 없습니다. .env를 확인해주세요."
 
-    client = ApifyClient(api_token)
+    client = clients.apify(api_token)
     
     print(f"📸 인스타그램 분석 요청 (Apify): {url}")
 
@@ -56,10 +162,13 @@ def get_instagram_content(url):
 
     try:
         # Actor 실행
-        run = client.actor("apify/instagram-scraper").call(run_input=run_input)
+        with trace.span("apify.actor_call", "apify"):
+            run = await client.actor("apify/instagram-scraper").call(run_input=run_input)
         
         # 결과 가져오기
-        dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
+        with trace.span("apify.dataset", "apify") as sp:
+            dataset_items = (await client.dataset(run["defaultDatasetId"]).list_items()).items
+            sp.set(items=len(dataset_items))
         
         if not dataset_items:
             return None, None, "인스타 게시물을 찾을 수 없습니다. (비공개 계정일 수 있음)"
@@ -72,12 +181,15 @@ def get_instagram_content(url):
             print("🎥 릴스(동영상) 감지됨")
             video_url = item["videoUrl"]
             
-            # 영상 다운로드
-            res = requests.get(video_url, stream=True)
-            filename = f"insta_reel_{int(time.time())}.mp4"
-            with open(filename, 'wb') as f:
-                for chunk in res.iter_content(chunk_size=1024):
-                    f.write(chunk)
+            # 영상 다운로드 (큰 청크 스트리밍 + 용량 제한)
+            try:
+                filename, _ = await asyncio.to_thread(
+                    downloader.download_file,
+                    video_url, prefix="insta_reel_", suffix=".mp4",
+                    max_bytes=downloader.MAX_VIDEO_BYTES
+                )
+            except downloader.DownloadError as e:
+                return None, None, f"릴스 다운로드 실패: {str(e)}"
             return "video", filename, None
 
         # --- B. 게시물 (사진) 인 경우 ---
@@ -90,17 +202,9 @@ def get_instagram_content(url):
             if not image_urls and item.get("displayUrl"):
                 image_urls = [item["displayUrl"]]
             
-            # 최대 5장까지만 다운로드 (AI 토큰 절약)
-            saved_files = []
-            for i, img_url in enumerate(image_urls[:5]):
-                try:
-                    res = requests.get(img_url)
-                    fname = f"insta_img_{int(time.time())}_{i}.jpg"
-                    with open(fname, 'wb') as f:
-                        f.write(res.content)
-                    saved_files.append(fname)
-                except:
-                    continue
+            # 최대 5장까지만 다운로드 (AI 토큰 절약) - 동시에 받고 실패한 장은 건너뜀
+            results = await asyncio.to_thread(downloader.download_many, image_urls[:5], prefix="insta_img_", suffix=".jpg")
+            saved_files = [path for path, _ in results if path]
             
             if not saved_files:
                 return None, None, "사진을 다운로드할 수 없습니다."
@@ -113,21 +217,50 @@ def get_instagram_content(url):
     except Exception as e:
         return None, None, f"Apify 에러: {str(e)}"
 
+async def get_instagram_content_async(url):
+    """
+    인스타 링크를 분석하여 콘텐츠(영상 or 이미지들)를 다운로드함
+    같은 게시물(p/reel 주소 모두)을 동시에 요청하면 Apify 실행과 다운로드는 한 번만 함
+    반환값: (type, paths, error)
+    type: 'video' 또는 'image'
+    paths: 파일 경로(문자열) 또는 파일 경로 리스트
+    """
+    return await flights.do(("instagram", canonicalize_url(url)),
+                            lambda: _fetch_instagram_content_async(url), share=_share_instagram,
+                            discard=_discard_instagram)
+
+def get_instagram_content(url):
+    return runtime.run_sync(get_instagram_content_async(url))
+
 # [통합] 네이버 블로그 등 텍스트
-def get_naver_blog_content(url):
+def _extract_blog_text(html):
+    post = blog.extract_post(html)
+    return blog.post_to_text(post) if post else "본문 없음"
+
+async def _resolve_blog_url(url):
+    """
+    블로그 링크를 모바일 글 주소로 바꿉니다.
+    주소만으로 모를 때(블로그 홈, naver.me 단축 링크)는 페이지를 열어 리다이렉트/본문 iframe(PostView)을 따라갑니다.
+    """
+    mobile = blog.post_url(url)
+    if mobile:
+        return mobile
+    response = await ahttp.get(url, headers=_NAVER_HEADERS, timeout=NAVER_TIMEOUT)
+    final_url = str(response.url)
+    frame = blog.find_post_frame(response.text, final_url)
+    return blog.post_url(final_url) or (blog.post_url(frame) if frame else None)
+
+@trace.traced("naver.fetch", "naver")
+async def get_naver_blog_content_async(url):
     try:
-        if "m.blog.naver.com" not in url:
-            url = url.replace("blog.naver.com", "m.blog.naver.com")
-        
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        content = soup.find('div', class_='se-main-container')
-        if not content:
-            content = soup.find('div', id='viewTypeSelector')
-            
-        return content.get_text(strip=True) if content else "본문 없음"
+        target = await _resolve_blog_url(url) or url
+        response = await ahttp.get(target, headers=_NAVER_HEADERS, timeout=NAVER_TIMEOUT)
+        if response.status_code >= 400:
+            return f"크롤링 실패: HTTP {response.status_code}"
+        # HTML 파싱은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드에서
+        return await asyncio.to_thread(_extract_blog_text, response.text)
     except Exception as e:
         return f"크롤링 실패: {str(e)}"
+
+def get_naver_blog_content(url):
+    return runtime.run_sync(get_naver_blog_content_async(url))
@@ -0,0 +1,69 @@
+import copy
+import asyncio
+import services.runtime_service as runtime
+import services.trace_service as trace
+
+# 같은 작업이 동시에 여러 번 요청되면 처음 요청만 실제로 실행하고 나머지는 그 결과를 같이 받음
+# (여러 사용자 / Streamlit 재실행이 같은 릴스를 한꺼번에 넣을 때 Apify 실행, 다운로드, Gemini 업로드, 장소 검색을 한 번만)
+# 끝난 결과는 보관하지 않음 - 끝난 뒤에 들어온 요청은 각 서비스의 캐시가 처리
+
+class _Flight:
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+        self.shares = []
+
+def _flights():
+    # 공용 루프 하나에서 모든 요청이 돌기 때문에 잠금 없이 dict로 충분함
+    return runtime.loop_local("singleflight", dict)
+
+async def _run(key, flight, make_coro, share):
+    try:
+        result = await make_coro()
+    finally:
+        flights = _flights()
+        if flights.get(key) is flight:
+            del flights[key]
+    # 기다리는 요청마다 따로 쓸 결과를 여기서 미리 만들어 둠
+    # (먼저 깨어난 요청이 파일을 지우거나 결과 dict를 고쳐도 다른 요청에는 영향 없음)
+    # 새 요청은 더 합류할 수 없으므로(위에서 목록에서 뺌) 개수가 늘지 않음. 파일 복사는 스레드에서
+    extra = flight.waiters - 1
+    copies = await asyncio.to_thread(lambda: [share(result) for _ in range(extra)]) if extra > 0 else []
+    flight.shares = [result] + copies
+
+async def do(key, make_coro, share=copy.deepcopy, on_join=None, discard=None):
+    """
+    key(예: ("instagram", 정규화된 링크))로 진행 중인 작업이 있으면 그 결과를 같이 기다리고,
+    없으면 make_coro()를 실행합니다. 실패하면 기다리던 요청 모두 같은 예외를 받습니다.
+    share(result)는 함께 기다린 요청마다 따로 받을 결과를 만듭니다. (기본은 깊은 복사, 파일이면 파일 복사본)
+    discard(result)는 작업이 끝난 뒤 결과를 받기 전에 취소된 요청 몫을 정리합니다. (파일이면 삭제)
+    on_join()은 이미 진행 중인 작업에 합류할 때 불립니다. (진행 메시지용)
+    한 요청이 취소돼도 작업은 계속되고, 기다리는 요청이 모두 취소되면 작업도 취소합니다.
+    """
+    flights = _flights()
+    flight = flights.get(key)
+    if flight is None:
+        flight = flights[key] = _Flight()
+        flight.task = asyncio.ensure_future(_run(key, flight, make_coro, share))
+        trace.count("singleflight", op=key[0], role="leader")
+    else:
+        trace.count("singleflight", op=key[0], role="joined")
+        if on_join:
+            on_join()
+
+    flight.waiters += 1
+    try:
+        await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        # 이 요청 몫은 작업이 끝날 때 이미 만들어졌으므로, 받지 못하고 취소되면 여기서 정리
+        task = flight.task
+        if task.done() and not task.cancelled() and task.exception() is None and flight.shares:
+            leftover = flight.shares.pop()
+            if discard:
+                discard(leftover)
+        raise
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel()
+    return flight.shares.pop()
@@ -0,0 +1,243 @@
+import os
+import json
+import asyncio
+import functools
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 외부 호출 구간(span) 기록
+# - TRACE_JSONL_PATH를 지정하면 모든 구간을 JSONL로 남김
+# - METRICS_PORT를 지정하면 Prometheus 형식 /metrics 엔드포인트를 띄움
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH")
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_lock = threading.RLock()
+_span_stats = {}
+_counters = {}
+_metrics_server = None
+
+class Span:
+    def __init__(self, name, service, attrs):
+        self.name = name
+        self.service = service
+        self.attrs = dict(attrs)
+        self.status = "ok"
+        self.start = time.time()
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        """구간에 정보 추가 (bytes, http_status, tokens, cache 등)"""
+        self.attrs.update({k: v for k, v in attrs.items() if v is not None})
+
+    def to_dict(self, trace_id=None):
+        return {
+            "trace_id": trace_id,
+            "name": self.name,
+            "service": self.service,
+            "start": round(self.start, 4),
+            "duration_ms": round(self.duration * 1000, 1),
+            "status": self.status,
+            "attrs": self.attrs
+        }
+
+class Trace:
+    """요청 하나(링크 하나)에 속한 구간들을 모아둡니다."""
+
+    def __init__(self, name=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.time()
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+@contextmanager
+def collect(name=None):
+    """
+    이 블록 안(및 propagate로 넘긴 스레드)에서 생긴 구간들을 하나의 Trace로 모읍니다.
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def use(trace):
+    """이미 만든 Trace를 현재 스레드의 Trace로 지정 (파이프라인 단계마다 작업의 Trace를 이어감)"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def propagate(func):
+    """
+    스레드 풀에 넘기는 함수가 현재 Trace를 이어받도록 감쌉니다.
+    (executor.submit(trace.propagate(fn), ...))
+    """
+    ctx = contextvars.copy_context()
+    def run(*args, **kwargs):
+        return ctx.copy().run(func, *args, **kwargs)
+    return run
+
+@contextmanager
+def span(name, service, **attrs):
+    """
+    외부 호출 하나를 감싸서 소요 시간/상태/부가 정보를 기록합니다.
+    with trace.span("maps.search", "maps") as sp: ...; sp.set(cache="hit")
+    """
+    sp = Span(name, service, attrs)
+    token = _current_span.set(sp)
+    start = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status = "error"
+        sp.set(error=type(e).__name__)
+        raise
+    finally:
+        sp.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        _finish(sp)
+
+def traced(name, service):
+    """함수 전체를 하나의 구간으로 기록하는 데코레이터 (async 함수도 가능)"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, service):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, service):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def annotate(**attrs):
+    """지금 실행 중인 구간에 정보 추가 (traced 함수 안에서 cache="hit" 등)"""
+    sp = _current_span.get()
+    if sp is not None:
+        sp.set(**attrs)
+
+def _finish(sp):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(sp)
+
+    key = (sp.service, sp.name, sp.status)
+    with _lock:
+        stat = _span_stats.setdefault(key, {"count": 0, "seconds": 0.0, "bytes": 0})
+        stat["count"] += 1
+        stat["seconds"] += sp.duration
+        stat["bytes"] += int(sp.attrs.get("bytes") or 0)
+        for token_key in ("input_tokens", "output_tokens"):
+            if sp.attrs.get(token_key):
+                count(f"gemini_{token_key}", sp.attrs[token_key], model=sp.attrs.get("model", ""))
+        if sp.attrs.get("cache") in ("hit", "miss"):
+            count("cache_lookups", 1, service=sp.service, result=sp.attrs["cache"])
+
+    if TRACE_JSONL_PATH:
+        line = json.dumps(sp.to_dict(trace.trace_id if trace else None), ensure_ascii=False, default=str)
+        with _lock:
+            with open(TRACE_JSONL_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+def count(name, value=1, **labels):
+    """단순 카운터 (캐시 적중 등)"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def _labels(**labels):
+    return ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels.items())
+
+def prometheus_text():
+    """Prometheus 텍스트 형식으로 지금까지의 통계를 반환합니다."""
+    lines = [
+        "# TYPE curator_span_seconds_total counter",
+        "# TYPE curator_span_count_total counter",
+        "# TYPE curator_span_bytes_total counter",
+    ]
+    with _lock:
+        for (service, name, status), stat in sorted(_span_stats.items()):
+            labels = _labels(service=service, span=name, status=status)
+            lines.append(f"curator_span_count_total{{{labels}}} {stat['count']}")
+            lines.append(f"curator_span_seconds_total{{{labels}}} {stat['seconds']:.6f}")
+            if stat["bytes"]:
+                lines.append(f"curator_span_bytes_total{{{labels}}} {stat['bytes']}")
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"curator_{name}_total{{{_labels(**dict(labels))}}} {value}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_metrics_server(port=None):
+    """
+    /metrics 엔드포인트를 백그라운드 스레드로 한 번만 띄웁니다. (Streamlit 재실행에도 안전)
+    """
+    global _metrics_server
+    port = int(port or METRICS_PORT or 0)
+    if not port:
+        return None
+    with _lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️ 메트릭 서버 시작 실패: {e}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
+
+def format_waterfall(trace, width=40):
+    """
+    Trace의 구간들을 시작 시각 순으로 막대그래프 텍스트로 만듭니다.
+    """
+    if not trace.spans:
+        return ""
+    spans = sorted(trace.spans, key=lambda s: s.start)
+    origin = min(s.start for s in spans)
+    total = max(s.start + s.duration for s in spans) - origin or 1e-9
+    lines = []
+    for sp in spans:
+        offset = int((sp.start - origin) / total * width)
+        length = max(1, int(sp.duration / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        extra = []
+        if sp.attrs.get("cache"):
+            extra.append(f"cache={sp.attrs['cache']}")
+        if sp.attrs.get("bytes"):
+            extra.append(f"{int(sp.attrs['bytes']) // 1024}KB")
+        if sp.status != "ok":
+            extra.append(sp.status)
+        lines.append(f"{sp.name:<22} {bar:<{width}} {sp.duration * 1000:>8.0f}ms {' '.join(extra)}")
+    return "\n".join(lines)
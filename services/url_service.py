@@ -0,0 +1,59 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 같은 콘텐츠인데 공유할 때마다 붙는 추적용 파라미터
+TRACKING_PARAMS = {"si", "feature", "igsh", "igshid", "fbclid", "gclid", "ref", "ref_src"}
+
+# 같은 영상/게시물을 가리키는 여러 주소 형태 (youtu.be, shorts, watch / 인스타 p, reel, tv)
+_YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"}
+_YOUTUBE_ID = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/|live/)([\w-]{11})")
+_YOUTUBE_PATH_ID = re.compile(r"^/(?:shorts|embed|live|v)/([\w-]{11})(?:/|$)")
+_VIDEO_ID = re.compile(r"^[\w-]{11}$")
+_INSTAGRAM_HOSTS = {"instagram.com", "m.instagram.com"}
+_INSTAGRAM_POST = re.compile(r"^/(?:[\w.]+/)?(?:p|reels?|tv)/([\w-]+)(?:/|$)")
+
+def youtube_video_id(url):
+    match = _YOUTUBE_ID.search(url or "")
+    return match.group(1) if match else None
+
+def _media_url(host, path, query):
+    """유튜브 영상 / 인스타 게시물이면 하나의 대표 주소로 (아니면 None)"""
+    if host == "youtu.be":
+        video_id = path.strip("/").split("/")[0]
+    elif host in _YOUTUBE_HOSTS:
+        match = _YOUTUBE_PATH_ID.match(path)
+        video_id = match.group(1) if match else dict(query).get("v", "")
+    elif host in _INSTAGRAM_HOSTS:
+        # 릴스와 게시물은 같은 코드를 쓰고, 계정 이름이 앞에 붙은 주소도 같은 게시물
+        match = _INSTAGRAM_POST.match(path)
+        return f"https://instagram.com/p/{match.group(1)}" if match else None
+    else:
+        return None
+    return f"https://youtube.com/watch?v={video_id}" if _VIDEO_ID.match(video_id) else None
+
+def canonicalize_url(url):
+    """
+    캐시 키로 쓰기 위해 URL을 정규화합니다.
+    (공백/대소문자/추적 파라미터/프래그먼트/끝 슬래시 제거)
+    유튜브는 youtu.be/shorts/watch 모두 youtube.com/watch?v=아이디로, 인스타는 p/reel/tv 모두 instagram.com/p/코드로 모읍니다.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    ]
+    media = _media_url(host, parts.path, query)
+    if media:
+        return media
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
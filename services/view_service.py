@@ -0,0 +1,116 @@
+import io
+import os
+import json
+import threading
+from collections import OrderedDict
+from services.cache_service import hash_bytes
+import services.curation_service as engine
+import services.image_service as image_gen
+import services.export_service as export
+
+# 결과 화면에 필요한 것(카드, 표, 엑셀 파일)을 분석 결과마다 한 번만 만들어 두는 곳
+# Streamlit은 버튼 하나만 눌러도 스크립트 전체를 다시 실행하므로, 재실행 때는 여기서 꺼내 쓰기만 함
+
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", "16"))
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIME = "text/csv"
+
+_views = OrderedDict()
+_views_lock = threading.Lock()
+
+def result_fingerprint(result):
+    """화면 내용을 바꾸는 부분(링크, 요약, 장소)만으로 만든 해시 (소요 시간/저장 id는 제외)"""
+    payload = {key: result.get(key) for key in ("url", "summary", "places_data")}
+    return hash_bytes(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str))
+
+class ResultView:
+    """
+    분석 결과 하나의 화면용 산출물. 표/노션 행은 바로 만들고,
+    카드·DataFrame·엑셀 바이트는 처음 필요할 때 한 번만 만든 뒤 재사용합니다.
+    """
+
+    def __init__(self, result, fingerprint=None):
+        self.fingerprint = fingerprint or result_fingerprint(result)
+        self.result = result
+        self.entries = engine.build_card_entries(result)
+        self.table_rows = engine.build_table_rows(result)
+        self.notion_rows = engine.build_notion_rows(result)
+        self._artifacts = {}
+        # 엑셀을 만들 때 DataFrame도 같이 만들므로 재진입 가능한 잠금
+        self._lock = threading.RLock()
+
+    def _memo(self, name, build, keep=None):
+        """keep(value)가 False면 이번 값은 돌려주기만 하고 저장하지 않음 (다음 재실행 때 다시 만듦)"""
+        with self._lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            value = build()
+            if keep is None or keep(value):
+                self._artifacts[name] = value
+            return value
+
+    def _all_cards_ok(self, cards_bytes):
+        # 그리지 못한 카드나 사진이 빠진 카드가 있으면 다음 재실행 때 다시 그려봄
+        return all(b is not None for b in cards_bytes) and all(image_gen.is_card_saved(e[4]) for e in self.entries)
+
+    def cards(self):
+        """(카드 바이트 리스트, ZIP 경로) - 예외가 나거나 실패한 카드가 있으면 다음 재실행 때 다시 시도"""
+        if not self.entries:
+            return [], None
+        return self._memo("cards", lambda: image_gen.create_cards_zip(
+            [e[4] for e in self.entries], names=[e[4]["식당이름"] for e in self.entries]
+        ), keep=lambda value: self._all_cards_ok(value[0]))
+
+    def zip_bytes(self):
+        cards_bytes, zip_path = self.cards()
+        if not zip_path:
+            return None
+
+        def read():
+            with open(zip_path, "rb") as f:
+                return f.read()
+        # 일부 카드가 빠진 ZIP은 저장하지 않음
+        complete = self._all_cards_ok(cards_bytes)
+        return self._memo("zip", read, keep=lambda _: complete)
+
+    def dataframe(self):
+        # pandas는 결과가 있을 때만 필요해서 여기서 불러옴 (첫 화면 로딩을 가볍게)
+        import pandas as pd
+        return self._memo("dataframe", lambda: pd.DataFrame(self.table_rows))
+
+    def xlsx_bytes(self, thumbnails=False):
+        """표 그대로의 엑셀. thumbnails=True면 카드 미리보기도 넣음 (카드를 먼저 그려야 미리보기가 들어감)"""
+        def build():
+            buffer = io.BytesIO()
+            export.write_xlsx([self.result], buffer, thumbnails=thumbnails)
+            return buffer.getvalue()
+        return self._memo(("xlsx", thumbnails), build)
+
+    def csv_bytes(self):
+        def build():
+            buffer = io.StringIO()
+            export.write_csv([self.result], buffer)
+            # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+            return buffer.getvalue().encode("utf-8-sig")
+        return self._memo("csv", build)
+
+def get_view(result):
+    """같은 결과면 (세션이 달라도) 이미 만들어 둔 ResultView를 돌려줍니다."""
+    key = result_fingerprint(result)
+    with _views_lock:
+        view = _views.get(key)
+        if view is not None:
+            _views.move_to_end(key)
+            return view
+    view = ResultView(result, key)
+    with _views_lock:
+        # 다른 스레드가 먼저 만들었으면 그것을 씀
+        view = _views.setdefault(key, view)
+        _views.move_to_end(key)
+        while len(_views) > VIEW_CACHE_SIZE:
+            _views.popitem(last=False)
+    return view
+
+def clear():
+    with _views_lock:
+        _views.clear()
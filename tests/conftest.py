@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# 서비스 모듈은 불러올 때 캐시/임시 폴더 경로를 정하므로 먼저 임시 폴더로 돌려둠
+_WORK_DIR = tempfile.mkdtemp(prefix="curator_test_")
+os.environ["CURATOR_CACHE_DIR"] = os.path.join(_WORK_DIR, "cache")
+os.environ["CURATOR_TEMP_DIR"] = os.path.join(_WORK_DIR, "tmp")
+os.environ["HISTORY_DB_PATH"] = os.path.join(_WORK_DIR, "history.sqlite")
+os.environ.pop("TRACE_JSONL_PATH", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
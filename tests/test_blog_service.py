@@ -0,0 +1,28 @@
+from services.blog_service import pack_text, _estimate_tokens
+
+def test_short_text_is_unchanged():
+    text = "제목: 맛집\n본문"
+    assert pack_text(text, budget=100) == text
+
+def test_place_lines_are_kept_first_in_original_order():
+    filler = ["그냥 일상 이야기 " * 40 for _ in range(10)]
+    lines = filler[:5] + ["[지도] 할머니국수 서울 마포구 망원동 123"] + filler[5:] + ["제목: 망원동 맛집"]
+    packed = pack_text("\n".join(lines), budget=120)
+    kept = packed.splitlines()
+    # 장소 줄은 남고, 남은 예산은 (잘린) 일반 문단이 채우며, 원래 순서는 유지
+    assert kept.index("[지도] 할머니국수 서울 마포구 망원동 123") < kept.index("제목: 망원동 맛집")
+    assert sum(line in filler for line in kept) == 0
+    assert _estimate_tokens(packed) <= 120 + len(kept)
+
+def test_long_line_is_truncated_not_dropped():
+    # 유튜브 자막처럼 줄바꿈 없는 긴 본문 + 짧은 설명
+    transcript = "자막 " * 20000
+    packed = pack_text("제목: 영상\n설명 한 줄\n" + transcript, budget=1000)
+    lines = packed.splitlines()
+    assert lines[:2] == ["제목: 영상", "설명 한 줄"]
+    assert lines[2].startswith("자막 자막")
+    assert _estimate_tokens(packed) <= 1000 + len(lines)
+
+def test_single_huge_line_is_cut_to_budget():
+    packed = pack_text("가" * 50000, budget=100)
+    assert 0 < len(packed) <= 200
@@ -0,0 +1,69 @@
+import itertools
+import pytest
+import services.cache_service as cache_service
+from services.cache_service import DiskCache
+
+_namespaces = itertools.count()
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 호출할 때마다 1초씩 흐르는 가짜 시계 (LRU 순서가 같은 시각으로 겹치지 않게)
+    now = {"t": 1_000_000.0}
+
+    def fake_time():
+        now["t"] += 1
+        return now["t"]
+    monkeypatch.setattr(cache_service.time, "time", fake_time)
+    return now
+
+def _cache(**kwargs):
+    return DiskCache(f"test_{next(_namespaces)}", **kwargs)
+
+def test_get_returns_stored_value():
+    cache = _cache()
+    cache.set("k", {"places": ["a"]})
+    assert cache.get("k") == {"places": ["a"]}
+    assert cache.get("missing") is None
+
+def test_expired_entry_is_a_miss(clock):
+    cache = _cache(ttl=10)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    clock["t"] += 60
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+def test_per_key_ttl_overrides_default(clock):
+    cache = _cache(ttl=10)
+    cache.set("long", "v", ttl=1000)
+    clock["t"] += 60
+    assert cache.get("long") == "v"
+
+def test_expired_entry_is_a_miss_in_memory_front(clock):
+    cache = _cache(ttl=10, memory_size=4)
+    cache.set("k", "v")
+    clock["t"] += 60
+    assert cache.get("k") is None
+
+def test_evicts_least_recently_used(clock):
+    cache = _cache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # a를 다시 써서 b가 가장 오래 안 쓴 항목이 됨
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_memory_hits_keep_entries_recent_in_db(clock):
+    cache = _cache(max_entries=2, memory_size=8)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    assert cache.stats()["memory_hits"] == 1
+    cache.set("c", 3)
+    # 메모리에서 찾은 사용 기록도 DB의 LRU 순서에 반영됨
+    fresh = DiskCache(cache.namespace, max_entries=2)
+    assert fresh.get("a") == 1
+    assert fresh.get("b") is None
@@ -0,0 +1,68 @@
+import pytest
+import services.history_service as history
+
+@pytest.fixture(autouse=True)
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DB_PATH", str(tmp_path / "history.sqlite"))
+    monkeypatch.setattr(history, "_db_conn", None)
+    yield
+    if history._db_conn is not None:
+        history._db_conn.close()
+
+def _result(url, *places, region="서울 마포구"):
+    return {
+        "url": url,
+        "summary": "요약",
+        "region": region,
+        "places_data": [
+            {
+                "ai_info": {"display_name": name, "description": desc},
+                "map_info": {"place_id": pid, "name": name, "address": address, "rating": rating},
+                "review_summary": "",
+            }
+            for pid, name, address, rating, desc in places
+        ],
+    }
+
+def test_results_without_places_are_not_saved():
+    assert history.save_result({"url": "https://a", "summary": "에러", "places_data": []}) is None
+    assert history.latest_for_url("https://a") is None
+
+def test_latest_for_url_uses_canonical_url():
+    history.save_result(_result("https://youtu.be/dQw4w9WgXcQ", ("p1", "할머니국수", "망원동 1", 4.5, "국수")))
+    saved = history.latest_for_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert saved is not None and saved["places_data"][0]["map_info"]["place_id"] == "p1"
+
+def test_search_by_name_full_text_and_short_query():
+    history.save_result(_result("https://a", ("p1", "할머니국수", "망원동 1", 4.5, "멸치 육수"),
+                                ("p2", "대림창고", "성수동 2", 4.0, "창고 카페")))
+    names = [p["name"] for p in history.search_places("할머니")[0]]
+    assert names == ["할머니국수"]
+    # 3글자 미만은 LIKE 검색
+    assert [p["name"] for p in history.search_places("창고")[0]] == ["대림창고"]
+    assert [p["name"] for p in history.search_places("육수")[0]] == ["할머니국수"]
+
+def test_search_shows_latest_occurrence_with_seen_count():
+    history.save_result(_result("https://a", ("p1", "할머니국수", "망원동 1", 4.5, "첫 번째")))
+    history.save_result(_result("https://b", ("p1", "할머니국수", "망원동 1", 4.6, "두 번째")))
+    places, _ = history.search_places("할머니국수")
+    assert len(places) == 1
+    assert places[0]["description"] == "두 번째"
+    assert places[0]["seen_count"] == 2
+    assert len(history.search_places("할머니국수", include_history=True)[0]) == 2
+
+def test_search_filters_and_pagination():
+    history.save_results([
+        _result(f"https://x/{i}", (f"p{i}", f"가게{i:02d}", "주소", 3.0 + i / 10, "설명"))
+        for i in range(7)
+    ] + [_result("https://busan", ("pb", "부산가게", "해운대", 4.9, "설명"), region="부산 해운대")])
+    assert [p["name"] for p in history.search_places(region="부산")[0]] == ["부산가게"]
+    assert {p["name"] for p in history.search_places(min_rating=3.5)[0]} == {"가게05", "가게06", "부산가게"}
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = history.search_places("가게", limit=3, before=cursor)
+        seen.extend(p["name"] for p in page)
+        if cursor is None:
+            break
+    assert len(seen) == 8 and len(set(seen)) == 8
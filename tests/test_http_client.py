@@ -0,0 +1,94 @@
+import pytest
+import requests
+import services.http_client as http
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+@pytest.fixture
+def session(monkeypatch):
+    holder = {}
+    monkeypatch.setattr(http, "get_session", lambda host: holder["session"])
+
+    def install(*outcomes):
+        holder["session"] = FakeSession(outcomes)
+        return holder["session"]
+    return install
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(http.time, "sleep", delays.append)
+    return delays
+
+def test_retries_server_errors_then_succeeds(session, sleeps):
+    first = FakeResponse(503)
+    fake = session(first, FakeResponse(502), FakeResponse(200))
+    response = http.get("https://example.com/a", retries=3)
+    assert response.status_code == 200
+    assert fake.calls == 3
+    assert len(sleeps) == 2
+    assert first.closed
+
+def test_gives_up_after_max_retries(session, sleeps):
+    fake = session(*[FakeResponse(500) for _ in range(3)])
+    response = http.get("https://example.com/a", retries=2)
+    assert response.status_code == 500
+    assert fake.calls == 3
+
+def test_retry_after_header_is_respected(session, sleeps):
+    session(FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200))
+    http.get("https://example.com/a")
+    assert sleeps == [7.0]
+
+def test_backoff_is_capped(session, sleeps, monkeypatch):
+    monkeypatch.setattr(http, "BACKOFF_MAX", 1.0)
+    session(FakeResponse(429, {"Retry-After": "600"}), FakeResponse(200))
+    http.get("https://example.com/a")
+    assert sleeps == [1.0]
+
+def test_backoff_grows_with_attempts(monkeypatch):
+    # full jitter의 상한이 2배씩 늘어나는지 (uniform이 상한을 그대로 돌려주게 함)
+    monkeypatch.setattr(http.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(http, "BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(http, "BACKOFF_MAX", 3.0)
+    assert [http._backoff_seconds(i) for i in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+def test_post_is_not_retried_on_server_error(session, sleeps):
+    fake = session(FakeResponse(503), FakeResponse(200))
+    assert http.post("https://example.com/a").status_code == 503
+    assert fake.calls == 1
+    assert sleeps == []
+
+def test_post_is_retried_on_rate_limit(session, sleeps):
+    fake = session(FakeResponse(429), FakeResponse(200))
+    assert http.post("https://example.com/a").status_code == 200
+    assert fake.calls == 2
+
+def test_connection_errors_are_retried_for_get(session, sleeps):
+    fake = session(requests.ConnectionError("reset"), FakeResponse(200))
+    assert http.get("https://example.com/a").status_code == 200
+    assert fake.calls == 2
+
+def test_connection_errors_are_raised_for_post(session, sleeps):
+    session(requests.ConnectionError("reset"), FakeResponse(200))
+    with pytest.raises(requests.ConnectionError):
+        http.post("https://example.com/a")
@@ -0,0 +1,53 @@
+from services.resolve_service import dedupe_candidates, merge_by_place_id, normalize_name
+
+def test_normalize_name_ignores_width_case_and_symbols():
+    assert normalize_name("Ｉｃｈｉｒａｎ (Namba)") == normalize_name("ichiran namba")
+
+def test_same_place_is_merged_with_descriptions_and_aliases():
+    places = [
+        {"search_query": "망원동 할머니 국수", "display_name": "할머니국수", "description": "멸치 육수"},
+        {"search_query": "할머니국수", "display_name": "할머니국수 (Grandma Noodles)", "description": "면이 쫄깃"},
+    ]
+    merged = dedupe_candidates(places, region="망원동")
+    assert len(merged) == 1
+    assert merged[0]["description"] == "멸치 육수 / 면이 쫄깃"
+    assert "할머니국수 (Grandma Noodles)" in merged[0]["aliases"]
+
+def test_branches_of_a_chain_are_kept_apart():
+    places = [
+        {"search_query": "스타벅스 강남점", "display_name": "스타벅스"},
+        {"search_query": "스타벅스 홍대점", "display_name": "스타벅스"},
+    ]
+    assert len(dedupe_candidates(places)) == 2
+
+def test_branches_in_local_script_are_kept_apart():
+    places = [
+        {"search_query": "一蘭 道頓堀店", "display_name": "Ichiran"},
+        {"search_query": "一蘭 渋谷店", "display_name": "Ichiran"},
+    ]
+    assert len(dedupe_candidates(places)) == 2
+
+def test_different_regions_are_not_merged():
+    places = [
+        {"search_query": "할머니국수", "display_name": "할머니국수", "region": "망원동"},
+        {"search_query": "할머니국수", "display_name": "할머니국수", "region": "부산 해운대"},
+    ]
+    assert len(dedupe_candidates(places)) == 2
+
+def test_similar_korean_names_are_not_merged():
+    places = [
+        {"search_query": "할머니국수", "display_name": "할머니국수"},
+        {"search_query": "할머니칼국수", "display_name": "할머니칼국수"},
+    ]
+    assert len(dedupe_candidates(places)) == 2
+
+def test_merge_by_place_id_after_lookup():
+    items = [
+        {"ai_info": {"display_name": "툭툭누들타이"}, "map_info": {"place_id": "p1"}, "reviews": []},
+        {"ai_info": {"display_name": "Tuk Tuk Noodle Thai"}, "map_info": {"place_id": "p1"}, "reviews": ["맛있어요"]},
+        {"ai_info": {"display_name": "없는 가게"}, "map_info": None, "reviews": []},
+    ]
+    merged = merge_by_place_id(items)
+    assert len(merged) == 2
+    assert merged[0]["reviews"] == ["맛있어요"]
+    assert merged[0]["ai_info"]["aliases"] == ["Tuk Tuk Noodle Thai"]